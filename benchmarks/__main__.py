@@ -0,0 +1,35 @@
+"""
+Runs all benchmarks offline:
+
+    python -m benchmarks [--json results.json]
+"""
+
+import argparse
+import json
+
+from benchmarks import bench_http, bench_memory, bench_parsing
+
+def main():
+    parser = argparse.ArgumentParser(description="SwissWeather benchmarks")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per parsing benchmark")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    print("== Parsing")
+    results = bench_parsing.run(args.calls)
+    for result in results:
+        print(result)
+    print("== HTTP")
+    httpResults = bench_http.run(max(args.calls // 4, 10))
+    for result in httpResults:
+        print(result)
+    results += httpResults
+    print("== Memory")
+    bench_memory.main()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
+
+if __name__ == "__main__":
+    main()
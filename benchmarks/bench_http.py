@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+End to end benchmarks against a local HTTP server serving the recorded fixtures, to measure
+connection reuse and concurrent fetching.
+
+    python -m benchmarks.bench_http
+"""
+
+from http.server import ThreadingHTTPServer
+import threading
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import FORECAST_POST_CODE, FixtureTransport
+from benchmarks.runner import Result, measure
+from swissweather.meteo import FORECAST_URL, MeteoClient
+from swissweather.serve import KeepAliveHandler
+from swissweather.transport import RequestsTransport, Response
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves fixture payloads by URL path and query, counting accepted connections.
+    The recorded forecast is served for every post code.
+    """
+    daemon_threads = True
+
+    def __init__(self, payloads: dict[str, bytes]):
+        super().__init__(("127.0.0.1", 0), _FixtureHandler)
+        self.payloads = {_path(url): content for url, content in payloads.items()}
+        self.forecast = payloads[FORECAST_URL.format(FORECAST_POST_CODE)]
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def get_request(self):
+        with self._lock:
+            self.connections += 1
+        return super().get_request()
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class _FixtureHandler(KeepAliveHandler):
+
+    def get(self) -> tuple[int, dict[str, str], bytes]:
+        content = self.server.payloads.get(self.path)
+        if content is None and self.path.startswith("/v1/plzDetail"):
+            content = self.server.forecast
+        if content is None:
+            return 404, {}, b""
+        return 200, {}, content
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + ("?" + parts.query if parts.query else "")
+
+class LocalTransport(RequestsTransport):
+    """
+    Sends requests for the upstream URLs to the local fixture server instead.
+    """
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def get(self, url, headers=None):
+        response = super().get(self.base_url + _path(url), headers)
+        return Response(url, response.status, response.content, response.headers)
+
+def run(calls: int = 50) -> list[Result]:
+    server = FixtureServer(FixtureTransport().payloads).start()
+    results = []
+    try:
+        pooled = MeteoClient(transport=LocalTransport(server.base_url))
+        results.append(measure("get_forecast, pooled connection", lambda: pooled.get_forecast(FORECAST_POST_CODE), calls))
+        pooledConnections = server.connections
+
+        def unpooled_forecast():
+            client = MeteoClient(transport=LocalTransport(server.base_url))
+            client.get_forecast(FORECAST_POST_CODE)
+            client.close()
+        results.append(measure("get_forecast, new connection per call", unpooled_forecast, calls))
+        unpooledConnections = server.connections - pooledConnections
+
+        for workers in (1, 4, 16):
+            client = MeteoClient(transport=LocalTransport(server.base_url, connections_per_host=workers))
+            # Distinct post codes, so requests aren't coalesced.
+            postCodes = [FORECAST_POST_CODE] + list(range(1000, 1063))
+            results.append(measure(f"get_forecasts x64, {workers} workers",
+                                   lambda: client.get_forecasts(postCodes, max_workers=workers), max(calls // 5, 5), units=64))
+
+        results.append(measure("all stations over HTTP",
+                               MeteoClient(transport=LocalTransport(server.base_url), current_weather_ttl=0).get_current_weather_for_all_stations, calls))
+    finally:
+        server.stop()
+    print(f"Connections opened: {pooledConnections} pooled vs {unpooledConnections} unpooled")
+    return results
+
+if __name__ == "__main__":
+    for result in run():
+        print(result)
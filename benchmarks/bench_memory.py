@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares memory used by an all-stations current weather snapshot held as CurrentWeather
+objects against the slotted CompactCurrentWeather variant.
+
+    python -m benchmarks.bench_memory
+"""
+
+import sys
+
+from benchmarks.fixtures import FixtureTransport
+from swissweather.meteo import MeteoClient
+
+def deep_size(obj, seen=None) -> int:
+    """
+    Size of obj and everything reachable from it, counting shared objects once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_size(getattr(obj, slot), seen)
+    return size
+
+def load_snapshot(compact: bool = False):
+    client = MeteoClient(transport=FixtureTransport(), compact=compact)
+    return client.get_current_weather_for_all_stations()
+
+def main():
+    snapshot = load_snapshot()
+    compact = load_snapshot(compact=True)
+    before = deep_size(snapshot)
+    after = deep_size(compact)
+    print(f"Stations per snapshot:       {len(snapshot)}")
+    print(f"CurrentWeather snapshot:     {before:>10,} bytes ({before / len(snapshot):,.0f} per station)")
+    print(f"CompactCurrentWeather:       {after:>10,} bytes ({after / len(compact):,.0f} per station)")
+    print(f"Saved:                       {1 - after / before:.0%}")
+    # A week of 10 minute snapshots
+    print(f"Week of history (1008 snapshots): {before * 1008 / 2**20:,.1f} MiB -> {after * 1008 / 2**20:,.1f} MiB")
+
+if __name__ == "__main__":
+    main()
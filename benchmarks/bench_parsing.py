@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Parsing benchmarks over the recorded fixtures, without any network access.
+
+    python -m benchmarks.bench_parsing
+"""
+
+import json
+
+from benchmarks.fixtures import FORECAST_POST_CODE, FixtureTransport, large_forecast_json, read_fixture
+from benchmarks.runner import Result, measure
+from swissweather import decoding, fastcsv
+from swissweather.meteo import MeteoClient
+
+def run(calls: int = 200) -> list[Result]:
+    client = MeteoClient(transport=FixtureTransport(), current_weather_ttl=0)
+    forecastJson = large_forecast_json()
+    forecastContent = json.dumps(forecastJson).encode('utf-8')
+    currentContent = read_fixture("full_current_response.csv")
+    pollenContent = read_fixture("pollen_data_response.csv")
+
+    results = [
+        measure("json decode plzDetail", lambda: json.loads(forecastContent), calls),
+        *[measure(f"{decoder.name} decode + parse plzDetail",
+                  lambda decoder=decoder: client._get_forecast_for_json(decoder.decode_forecast(forecastContent)), calls)
+          for decoder in _available_decoders()],
+        measure("_get_forecast_for_json", lambda: client._get_forecast_for_json(forecastJson), calls),
+        measure("_get_hourly_forecast", lambda: client._get_hourly_forecast(forecastJson), calls),
+        measure("_get_weather_warnings", lambda: client._get_weather_warnings(forecastJson), calls),
+        measure("get_forecast (in-memory transport)", lambda: client.get_forecast(FORECAST_POST_CODE), calls),
+        measure("all stations (csv.DictReader)",
+                lambda: [client._get_current_data_for_row(row) for row in client._get_csv_rows(currentContent)], calls),
+        measure("all stations (fastcsv)", lambda: fastcsv.parse_current_weather(currentContent), calls),
+        measure("get_current_weather_for_all_stations", client.get_current_weather_for_all_stations, calls),
+        measure("latest pollen (csv.DictReader)",
+                lambda: client._get_current_pollen_for_rows(client._get_csv_rows(pollenContent, encoding='latin-1')),
+                max(calls // 10, 10)),
+        measure("latest pollen (fastcsv)", lambda: fastcsv.parse_latest_pollen(pollenContent), max(calls // 10, 10)),
+        measure("get_current_pollen_for_station", lambda: client.get_current_pollen_for_station("PBE"), max(calls // 10, 10)),
+    ]
+    return results
+
+def _available_decoders() -> list[decoding.JsonDecoder]:
+    decoders = [decoding.JsonDecoder()]
+    if decoding.orjson is not None:
+        decoders.append(decoding.OrjsonDecoder())
+    if decoding.msgspec is not None:
+        decoders.append(decoding.MsgspecDecoder())
+    return decoders
+
+if __name__ == "__main__":
+    for result in run():
+        print(result)
@@ -0,0 +1,56 @@
+"""
+Offline fixtures for the benchmarks, served from the recorded responses in tests/.
+"""
+
+import copy
+import json
+import os
+
+from swissweather.meteo import CURRENT_CONDITION_URL, FORECAST_URL, POLLEN_DATA_URL, POLLEN_STATIONS_URL
+from swissweather.transport import Response, Transport
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "tests")
+
+FORECAST_POST_CODE = 9999
+
+FIXTURES = {
+    CURRENT_CONDITION_URL: "full_current_response.csv",
+    POLLEN_STATIONS_URL: "pollen_stations_response.csv",
+    POLLEN_DATA_URL.format("pbe", "pbe"): "pollen_data_response.csv",
+    FORECAST_URL.format(FORECAST_POST_CODE): "full_forecast_response.json",
+}
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURE_PATH, name), "rb") as f:
+        return f.read()
+
+def large_forecast_json(hours: int = 240, warnings: int = 8) -> dict:
+    """
+    The recorded plzDetail response extended to the given forecast horizon, with hourly wind
+    data (which the recording predates) and several warnings.
+    """
+    forecastJson = json.loads(read_fixture("full_forecast_response.json"))
+    graphJson = forecastJson["graph"]
+    for key in ("temperatureMin1h", "temperatureMax1h", "temperatureMean1h", "precipitation1h"):
+        values = graphJson[key]
+        graphJson[key] = [values[i % len(values)] for i in range(hours)]
+    for key in ("weatherIcon3h", "windDirection3h", "windSpeed3h"):
+        values = graphJson[key]
+        graphJson[key] = [values[i % len(values)] for i in range((hours + 2) // 3)]
+    graphJson["windSpeed1h"] = [float(i % 25) for i in range(hours)]
+    graphJson["gustSpeed1h"] = [float(i % 40) for i in range(hours)]
+    forecastJson["warnings"] = [copy.deepcopy(forecastJson["warnings"][i % len(forecastJson["warnings"])]) for i in range(warnings)]
+    return forecastJson
+
+class FixtureTransport(Transport):
+    """
+    Serves fixtures from memory. Extra payloads can be given as url -> bytes.
+    """
+    def __init__(self, payloads: dict[str, bytes] | None = None):
+        self.payloads = {url: read_fixture(name) for url, name in FIXTURES.items()}
+        self.payloads.update(payloads or {})
+
+    def get(self, url, headers=None):
+        if url not in self.payloads:
+            return Response(url, 404, b"")
+        return Response(url, 200, self.payloads[url])
@@ -0,0 +1,53 @@
+"""
+Timing and memory measurement helpers shared by the benchmarks.
+"""
+
+from dataclasses import asdict, dataclass
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+@dataclass
+class Result:
+    name: str
+    calls: int
+    throughput: float # calls per second
+    p50: float # milliseconds
+    p90: float
+    p99: float
+    peakMemory: int # bytes allocated at peak during a single call
+
+    def __str__(self) -> str:
+        return (f"{self.name:<40} {self.throughput:>10,.0f}/s  p50 {self.p50:>8.3f} ms  p90 {self.p90:>8.3f} ms  "
+                f"p99 {self.p99:>8.3f} ms  peak {self.peakMemory / 1024:>8,.1f} KiB")
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(name: str, fn: Callable[[], Any], calls: int = 200, warmup: int = 5, units: int = 1) -> Result:
+    """
+    Runs fn calls times and reports latency percentiles per call and throughput in
+    units per second (e.g. forecasts when one call fetches several).
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        callStart = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - callStart) * 1000)
+    total = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return Result(name, calls, calls * units / total, percentiles[49], percentiles[89], percentiles[98], peak_memory(fn))
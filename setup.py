@@ -8,6 +8,7 @@ setup(name="SwissWeather",
       author_email="jernej@virag.si",      
       setup_requires=['pytest-runner==5.3.1'],
       install_requires = ["requests==2.28.1"],
+      extras_require = {"async": ["aiohttp>=3.8"], "fast": ["msgspec>=0.18"], "vectorized": ["numpy"]},
       tests_require = ["responses==0.13.3", "pytest==7.1.2"],
       classifiers=[
         "Operating System :: OS Independent",
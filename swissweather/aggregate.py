@@ -0,0 +1,129 @@
+"""
+Group-by statistics over a current weather snapshot.
+
+SnapshotFrame converts a snapshot into one float64 array per variable once, with NaN for
+missing values, and computes per group count, min, max, mean and sum of a variable. Groups
+come from the station metadata, e.g. the canton or an altitude band. With numpy installed
+the statistics are computed with vectorized operations, otherwise in plain Python.
+"""
+
+from array import array
+from dataclasses import dataclass
+import math
+from typing import Callable, Hashable, Iterable
+
+from swissweather.meteo import CURRENT_WEATHER_UNITS, CurrentWeather, StationInfo, measurement_value
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+GroupKey = str | Callable[[StationInfo], Hashable] | None
+
+@dataclass
+class Aggregate:
+    count: int # Number of stations with a value
+    min: float | None # None if no station in the group has a value
+    max: float | None
+    mean: float | None
+    sum: float | None
+    unit: str
+
+def altitude_band(width: float = 500) -> Callable[[StationInfo], float | None]:
+    """
+    Groups stations by altitude, e.g. 0, 500, 1000, ... for width=500. The key is the
+    lower end of the band in metres.
+    """
+    def band(station: StationInfo) -> float | None:
+        if station.altitude is None:
+            return None
+        return math.floor(station.altitude / width) * width
+    return band
+
+class SnapshotFrame(object):
+    """
+    Columnar current weather of all stations. Stations are matched by abbreviation with
+    stations (e.g. from MeteoClient.get_smn_station_list()) to group them. Stations without
+    metadata end up in the None group.
+    """
+    def __init__(self, snapshot: Iterable[CurrentWeather], stations: Iterable[StationInfo] = (),
+                 use_numpy: bool = True):
+        snapshot = list(snapshot)
+        metadata = {station.abbreviation: station for station in stations if station.abbreviation is not None}
+        self.abbreviations = [weather.station for weather in snapshot]
+        self.stations: list[StationInfo | None] = [metadata.get(abbreviation) for abbreviation in self.abbreviations]
+        self.numpy = use_numpy and numpy is not None
+        self.columns = {}
+        for variable in CURRENT_WEATHER_UNITS:
+            values = [measurement_value(getattr(weather, variable)) for weather in snapshot]
+            column = array('d', [math.nan if value is None else value for value in values])
+            self.columns[variable] = numpy.frombuffer(column, dtype=numpy.float64) if self.numpy else column
+        self._groups: dict[str | None, tuple[list[Hashable], list[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.abbreviations)
+
+    def groups(self, by: GroupKey) -> tuple[list[Hashable], list[int]]:
+        """
+        Returns the distinct group keys and the index of each station's group in them.
+        by is a StationInfo attribute name, a function of a StationInfo or None for a single group.
+        Only groupings by attribute name or None are cached, functions are usually new closures.
+        """
+        cacheable = by is None or isinstance(by, str)
+        cached = self._groups.get(by) if cacheable else None
+        if cached is not None:
+            return cached
+        if by is None:
+            key = lambda station: None
+        elif isinstance(by, str):
+            key = lambda station: getattr(station, by)
+        else:
+            key = by
+        indices: dict[Hashable, int] = {}
+        codes = [indices.setdefault(key(station) if station is not None else None, len(indices))
+                 for station in self.stations]
+        groups = (list(indices), codes)
+        if cacheable:
+            self._groups[by] = groups
+        return groups
+
+    def aggregate(self, variable: str, by: GroupKey = "canton") -> dict[Hashable, Aggregate]:
+        if variable not in CURRENT_WEATHER_UNITS:
+            raise ValueError(f"Unknown variable {variable}")
+        keys, codes = self.groups(by)
+        if self.numpy:
+            statistics = self._aggregate_numpy(self.columns[variable], codes, len(keys))
+        else:
+            statistics = self._aggregate_python(self.columns[variable], codes, len(keys))
+        unit = CURRENT_WEATHER_UNITS[variable]
+        return {key: Aggregate(count, minimum, maximum, total / count if count else None, total if count else None, unit)
+                for key, (count, minimum, maximum, total) in zip(keys, statistics)}
+
+    def _aggregate_numpy(self, values, codes: list[int], groups: int) -> list[tuple]:
+        codes = numpy.asarray(codes, dtype=numpy.intp)
+        valid = ~numpy.isnan(values)
+        counts = numpy.bincount(codes[valid], minlength=groups)
+        sums = numpy.bincount(codes[valid], weights=values[valid], minlength=groups)
+        minimums = numpy.full(groups, numpy.inf)
+        maximums = numpy.full(groups, -numpy.inf)
+        numpy.minimum.at(minimums, codes[valid], values[valid])
+        numpy.maximum.at(maximums, codes[valid], values[valid])
+        return [(count, float(minimum) if count else None, float(maximum) if count else None, float(total))
+                for count, minimum, maximum, total in zip(counts.tolist(), minimums, maximums, sums)]
+
+    def _aggregate_python(self, values, codes: list[int], groups: int) -> list[tuple]:
+        counts = [0] * groups
+        sums = [0.0] * groups
+        minimums: list[float | None] = [None] * groups
+        maximums: list[float | None] = [None] * groups
+        for value, code in zip(values, codes):
+            if math.isnan(value):
+                continue
+            counts[code] += 1
+            sums[code] += value
+            if minimums[code] is None or value < minimums[code]:
+                minimums[code] = value
+            if maximums[code] is None or value > maximums[code]:
+                maximums[code] = value
+        return list(zip(counts, minimums, maximums, sums))
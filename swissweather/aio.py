@@ -0,0 +1,220 @@
+import asyncio
+import contextlib
+import csv
+import logging
+from typing import AsyncIterator
+
+from swissweather.decoding import JsonDecoder
+from swissweather.meteo import (CURRENT_CONDITION_URL, FORECAST_URL, FORECAST_USER_AGENT, POLLEN_DATA_URL,
+                                POLLEN_STATIONS_URL, SMN_STATIONS_URL, BaseMeteoClient, CurrentPollen, CurrentWeather,
+                                LazyWeatherForecast, StationInfo, WeatherForecast)
+from swissweather.metrics import Metrics
+from swissweather.transport import DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_CONNECTIONS_PER_HOST, DEFAULT_READ_TIMEOUT
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 20
+
+class AsyncTransportError(Exception):
+    pass
+
+class AsyncResponse(object):
+    status: int
+    headers: dict[str, str]
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    def iter_chunks(self) -> AsyncIterator[bytes]:
+        raise NotImplementedError()
+
+class AsyncTransport(object):
+    """
+    Performs HTTP GET requests for AsyncMeteoClient.
+
+    get() returns an async context manager yielding an AsyncResponse. Implementations raise
+    AsyncTransportError on connection failures and timeouts, also while the body is being read.
+    """
+    def get(self, url: str, headers: dict[str, str] | None = None) -> contextlib.AbstractAsyncContextManager[AsyncResponse]:
+        raise NotImplementedError()
+
+    async def close(self):
+        pass
+
+class _AiohttpResponse(AsyncResponse):
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._response.content.iter_any():
+                yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AsyncTransportError(str(e)) from e
+
+class AiohttpTransport(AsyncTransport):
+    """
+    Transport backed by a pooled keep-alive aiohttp.ClientSession. Requires the aiohttp package.
+    """
+    def __init__(self, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 connections_per_host: int = DEFAULT_POOL_CONNECTIONS_PER_HOST):
+        if aiohttp is None:
+            raise ImportError("AiohttpTransport requires the aiohttp package.")
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.connections_per_host = connections_per_host
+        self._session = None
+
+    # The session has to be created from within the running event loop.
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.connections_per_host),
+                timeout=self.timeout)
+        return self._session
+
+    @contextlib.asynccontextmanager
+    async def get(self, url: str, headers: dict[str, str] | None = None):
+        try:
+            async with self._get_session().get(url, headers=headers) as r:
+                yield _AiohttpResponse(r)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AsyncTransportError(str(e)) from e
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class RateLimiter(object):
+    """
+    Spaces out request starts so that at most rate requests are started per second.
+    """
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+class AsyncMeteoClient(BaseMeteoClient):
+    """
+    asyncio version of MeteoClient.
+
+    At most max_concurrency requests are in flight at once and, if rate_limit is set, at most
+    rate_limit requests are started per second. By default requests go through an AiohttpTransport.
+    Parsing times are reported to metrics.
+    """
+    def __init__(self, language="en", transport: AsyncTransport | None = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, rate_limit: float | None = None,
+                 metrics: Metrics | None = None, decoder: JsonDecoder | None = None, compact: bool = False):
+        super().__init__(language, metrics, decoder, compact)
+        self.transport = transport if transport is not None else AiohttpTransport()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rate_limit) if rate_limit is not None else None
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get_current_weather_for_all_stations(self) -> list[CurrentWeather] | None:
+        logger.debug("Retrieving current weather for all stations ...")
+        return [self._get_current_data_for_row(row) async for row in self._get_csv_dictionary_for_url(CURRENT_CONDITION_URL)]
+
+    async def get_forecast(self, postCode, lazy: bool = False) -> WeatherForecast | None:
+        forecastJson = await self._get_forecast_json(postCode, self.language)
+        logger.debug("Forecast JSON: %s", forecastJson)
+        if forecastJson is None:
+            return None
+        if lazy:
+            return LazyWeatherForecast(forecastJson, self)
+        return self._get_forecast_for_json(forecastJson)
+
+    async def get_smn_station_list(self) -> list[StationInfo] | None:
+        station_list = [row async for row in self._get_csv_dictionary_for_url(SMN_STATIONS_URL, encoding='latin-1')]
+        return self._get_stations_for_rows(station_list)
+
+    async def get_pollen_station_list(self) -> list[StationInfo]:
+        station_list = [row async for row in self._get_csv_dictionary_for_url(POLLEN_STATIONS_URL, encoding='latin-1')]
+        return self._get_stations_for_rows(station_list)
+
+    async def get_current_pollen_for_station(self, stationAbbrev: str) -> CurrentPollen | None:
+        url = POLLEN_DATA_URL.format(stationAbbrev.lower(), stationAbbrev.lower())
+        pollen_csv = [row async for row in self._get_csv_dictionary_for_url(url, encoding='latin-1')]
+        return self._get_current_pollen_for_rows(pollen_csv)
+
+    async def _throttle(self):
+        if self._rate_limiter is not None:
+            await self._rate_limiter.wait()
+
+    async def _get_csv_dictionary_for_url(self, url, encoding='utf-8'):
+        logger.debug("Requesting station data...")
+        async with self._semaphore:
+            await self._throttle()
+            try:
+                async with self.transport.get(url) as response:
+                    if response.status >= 400:
+                        logger.error("Request to %s failed with HTTP %d.", url, response.status)
+                        return
+                    # Rows are parsed as soon as complete lines arrive instead of waiting for the whole body.
+                    fieldnames = None
+                    remainder = b""
+                    async for chunk in response.iter_chunks():
+                        lines = (remainder + chunk).split(b"\n")
+                        remainder = lines.pop()
+                        fieldnames, rows = _parse_csv_lines(lines, fieldnames, encoding)
+                        for row in rows:
+                            yield row
+                    _, rows = _parse_csv_lines([remainder], fieldnames, encoding)
+                    for row in rows:
+                        yield row
+            except AsyncTransportError as _:
+                logger.error("Connection failure.", exc_info=1)
+
+    async def _get_forecast_json(self, postCode, language):
+        url = FORECAST_URL.format(int(postCode))
+        logger.debug("Requesting forecast data from %s...", url)
+        headers = { "User-Agent": FORECAST_USER_AGENT,
+                    "Accept-Language": language,
+                    "Accept": "application/json" }
+        async with self._semaphore:
+            await self._throttle()
+            try:
+                async with self.transport.get(url, headers) as response:
+                    if response.status >= 400:
+                        logger.error("Request to %s failed with HTTP %d.", url, response.status)
+                        return None
+                    content = await response.read()
+            except AsyncTransportError as _:
+                logger.error("Connection failure.", exc_info=1)
+                return None
+        try:
+            return self.decoder.decode_forecast(content)
+        except ValueError as _:
+            logger.error("Failed to decode forecast data.", exc_info=1)
+            return None
+
+def _parse_csv_lines(lines: list[bytes], fieldnames: list[str] | None, encoding: str) -> tuple[list[str] | None, list[dict[str, str]]]:
+    reader = csv.reader((line.rstrip(b"\r").decode(encoding) for line in lines if line.strip()), delimiter=';')
+    if fieldnames is None:
+        fieldnames = next(reader, None)
+    return fieldnames, [dict(zip(fieldnames, values)) for values in reader]
@@ -0,0 +1,145 @@
+"""
+Memory compact variants of CurrentWeather, Forecast and CurrentPollen.
+
+Values are stored as plain floats in slotted, frozen instances and units are kept once per
+class in UNITS, instead of a (value, unit) tuple per field and instance. MeteoClient(compact=True)
+returns these directly. Indexing a value like weather.airTemperature[0] doesn't work on them,
+use tuples for code that still expects the FloatValue form:
+
+    weather.airTemperature         # 24.8
+    weather.tuples.airTemperature  # (24.8, "°C")
+"""
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, ClassVar
+
+# meteo imports this module, so its names are only looked up when converting.
+from swissweather import meteo
+
+class _TupleView(object):
+    __slots__ = ("_model",)
+
+    def __init__(self, model: "_CompactModel"):
+        self._model = model
+
+    def __getattr__(self, name: str) -> "meteo.FloatValue":
+        return self._model.measurement(name)
+
+class _CompactModel(object):
+    __slots__ = ()
+
+    UNITS: ClassVar[dict[str, str]] = {}
+    # Fields which are None (instead of (None, unit)) in the legacy class when the value is missing.
+    OPTIONAL: ClassVar[frozenset[str]] = frozenset()
+    LEGACY: ClassVar[str] # Name of the legacy class in swissweather.meteo
+
+    def measurement(self, name: str) -> "meteo.FloatValue":
+        if name not in self.UNITS:
+            raise AttributeError(name)
+        return (getattr(self, name), self.UNITS[name])
+
+    @property
+    def tuples(self) -> _TupleView:
+        return _TupleView(self)
+
+    @classmethod
+    def from_legacy(cls, legacy: Any):
+        values = []
+        for field in fields(cls):
+            value = getattr(legacy, field.name)
+            if field.name in cls.UNITS:
+                value = value[0] if value is not None else None
+            values.append(value)
+        return cls(*values)
+
+    def to_legacy(self):
+        values = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name in self.UNITS and not (value is None and field.name in self.OPTIONAL):
+                value = (value, self.UNITS[field.name])
+            values[field.name] = value
+        return getattr(meteo, self.LEGACY)(**values)
+
+@dataclass(frozen=True, slots=True)
+class CompactCurrentWeather(_CompactModel):
+    UNITS: ClassVar[dict[str, str]] = {
+        "airTemperature": "°C",
+        "precipitation": "mm",
+        "sunshine": "min",
+        "globalRadiation": "W/m²",
+        "relativeHumidity": "%",
+        "dewPoint": "°C",
+        "windDirection": "°",
+        "windSpeed": "km/h",
+        "gustPeak1s": "km/h",
+        "pressureStationLevel": "hPa",
+        "pressureSeaLevel": "hPa",
+        "pressureSeaLevelAtStandardAtmosphere": "hPa",
+    }
+    LEGACY: ClassVar[str] = "CurrentWeather"
+
+    station: str | None
+    date: datetime | None
+    airTemperature: float | None
+    precipitation: float | None
+    sunshine: float | None
+    globalRadiation: float | None
+    relativeHumidity: float | None
+    dewPoint: float | None
+    windDirection: float | None
+    windSpeed: float | None
+    gustPeak1s: float | None
+    pressureStationLevel: float | None
+    pressureSeaLevel: float | None
+    pressureSeaLevelAtStandardAtmosphere: float | None
+
+@dataclass(frozen=True, slots=True)
+class CompactForecast(_CompactModel):
+    UNITS: ClassVar[dict[str, str]] = {
+        "temperatureMax": "°C",
+        "temperatureMin": "°C",
+        "precipitation": "mm",
+        "temperatureMean": "°C",
+        "windSpeed": "km/h",
+        "windDirection": "°",
+        "windGustSpeed": "km/h",
+    }
+    OPTIONAL: ClassVar[frozenset[str]] = frozenset({"temperatureMean", "windSpeed", "windDirection", "windGustSpeed"})
+    LEGACY: ClassVar[str] = "Forecast"
+
+    timestamp: datetime
+    icon: int
+    condition: str | None
+    temperatureMax: float | None
+    temperatureMin: float | None
+    precipitation: float | None
+    # Only available for hourly forecast
+    temperatureMean: float | None = None
+    windSpeed: float | None = None
+    windDirection: float | None = None
+    windGustSpeed: float | None = None
+
+@dataclass(frozen=True, slots=True)
+class CompactCurrentPollen(_CompactModel):
+    UNITS: ClassVar[dict[str, str]] = {
+        "birch": "No/m3",
+        "grasses": "No/m3",
+        "alder": "No/m3",
+        "hazel": "No/m3",
+        "beech": "No/m3",
+        "ash": "No/m3",
+        "oak": "No/m3",
+    }
+    LEGACY: ClassVar[str] = "CurrentPollen"
+
+    stationAbbr: str
+    timestamp: datetime
+    birch: float | None
+    grasses: float | None
+    alder: float | None
+    hazel: float | None
+    beech: float | None
+    ash: float | None
+    oak: float | None
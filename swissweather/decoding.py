@@ -0,0 +1,148 @@
+"""
+JSON decoding backends for forecast (plzDetail) responses.
+
+MsgspecDecoder decodes the response bytes directly into the typed structs below, which only
+hold the currentWeather, forecast, graph and warnings sections and store the graph series as
+lists of floats. Everything else in the payload is skipped while decoding. The
+BaseMeteoClient._get_* methods read the structs by attribute. They can also be read like the
+decoded dicts (get(), in and []), which ForecastFrame does.
+
+Without msgspec, orjson or the json module decode into plain dicts.
+"""
+
+import json
+import logging
+from typing import Any
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+class JsonDecoder(object):
+    """
+    Decodes forecast responses with the json module. Decoders raise ValueError for invalid data.
+    """
+    name = "json"
+
+    def decode_forecast(self, content: bytes) -> Any:
+        return json.loads(content)
+
+class OrjsonDecoder(JsonDecoder):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonDecoder requires the orjson package.")
+
+    def decode_forecast(self, content: bytes) -> Any:
+        return orjson.loads(content)
+
+if msgspec is not None:
+    # Scalars are passed through to_int/to_float by the parsers, so any JSON scalar is accepted.
+    _Scalar = int | float | str | None
+
+    class JsonStruct(msgspec.Struct):
+        """
+        Struct which can also be read like a dict. Fields missing from the JSON are None and
+        read as absent.
+        """
+        def get(self, key: str, default=None):
+            value = getattr(self, key, None)
+            return default if value is None else value
+
+        def __contains__(self, key: str) -> bool:
+            return getattr(self, key, None) is not None
+
+        def __getitem__(self, key: str):
+            value = getattr(self, key, None)
+            if value is None:
+                raise KeyError(key)
+            return value
+
+    class CurrentWeatherStruct(JsonStruct):
+        time: _Scalar = None
+        icon: _Scalar = None
+        temperature: _Scalar = None
+
+    class DailyForecastStruct(JsonStruct):
+        dayDate: str | None = None
+        iconDay: _Scalar = None
+        temperatureMax: _Scalar = None
+        temperatureMin: _Scalar = None
+        precipitation: _Scalar = None
+
+    class GraphStruct(JsonStruct):
+        start: _Scalar = None
+        weatherIcon3h: list[int | None] | None = None
+        windDirection3h: list[float | None] | None = None
+        temperatureMin1h: list[float | None] | None = None
+        temperatureMax1h: list[float | None] | None = None
+        temperatureMean1h: list[float | None] | None = None
+        precipitation1h: list[float | None] | None = None
+        windSpeed1h: list[float | None] | None = None
+        gustSpeed1h: list[float | None] | None = None
+        sunrise: list[int] | None = None
+        sunset: list[int] | None = None
+
+    class WarningLinkStruct(JsonStruct):
+        text: str | None = None
+        url: str | None = None
+
+    class WarningStruct(JsonStruct):
+        warnType: _Scalar = None
+        warnLevel: _Scalar = None
+        text: str | None = None
+        htmlText: str | None = None
+        outlook: bool | None = None
+        validFrom: _Scalar = None
+        validTo: _Scalar = None
+        links: list[WarningLinkStruct] | None = None
+
+    class ForecastStruct(JsonStruct):
+        currentWeather: CurrentWeatherStruct | None = None
+        forecast: list[DailyForecastStruct] | None = None
+        graph: GraphStruct | None = None
+        warnings: list[WarningStruct] | None = None
+
+    STRUCT_TYPES: tuple[type, ...] = (JsonStruct,)
+else:
+    STRUCT_TYPES = ()
+
+class MsgspecDecoder(JsonDecoder):
+    """
+    Decodes into ForecastStruct. Payloads which don't match the structs are decoded into
+    plain dicts instead.
+    """
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("MsgspecDecoder requires the msgspec package.")
+        self._decoder = msgspec.json.Decoder(ForecastStruct)
+        self._fallback = msgspec.json.Decoder()
+
+    def decode_forecast(self, content: bytes) -> Any:
+        try:
+            return self._decoder.decode(content)
+        except msgspec.ValidationError as _:
+            logger.debug("Forecast doesn't match the expected structure, decoding generically.", exc_info=1)
+            return self._fallback.decode(content)
+
+def default_decoder() -> JsonDecoder:
+    """
+    Returns the first decoder available of msgspec, orjson and the json module. msgspec
+    decodes a bit faster than orjson and skips the unused sections, parsing takes the same time.
+    """
+    if msgspec is not None:
+        return MsgspecDecoder()
+    if orjson is not None:
+        return OrjsonDecoder()
+    return JsonDecoder()
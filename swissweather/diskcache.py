@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Reads only record the access time when the stored one is older, so hot entries don't cause writes
+LAST_ACCESS_RESOLUTION = 60
+
+@dataclass
+class CacheEntry:
+    key: str
+    content: bytes
+    etag: str | None
+    lastModified: str | None
+    expires: float # Unix timestamp after which the entry has to be revalidated
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires
+
+class Cache(object):
+    """
+    Persistent store for raw responses, used by MeteoClient before going to the network.
+    """
+    def get(self, key: str) -> CacheEntry | None:
+        raise NotImplementedError()
+
+    def set(self, entry: CacheEntry):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+class SQLiteCache(Cache):
+    """
+    Cache stored in a SQLite database, which can be shared by several processes.
+
+    When the stored payloads grow beyond max_bytes, the least recently used entries are evicted.
+    """
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                content BLOB NOT NULL,
+                                etag TEXT,
+                                last_modified TEXT,
+                                expires REAL NOT NULL,
+                                size INTEGER NOT NULL,
+                                last_access REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def get(self, key: str) -> CacheEntry | None:
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT content, etag, last_modified, expires, last_access FROM responses WHERE key = ?",
+                                       (key,)).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[4] >= LAST_ACCESS_RESOLUTION:
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as _:
+            logger.error("Failed to read from cache %s", self.path, exc_info=1)
+            return None
+        return CacheEntry(key, row[0], row[1], row[2], row[3])
+
+    def set(self, entry: CacheEntry):
+        try:
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (entry.key, entry.content, entry.etag, entry.lastModified, entry.expires,
+                                      len(entry.content), time.time()))
+                    self._evict()
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as _:
+            logger.error("Failed to write to cache %s", self.path, exc_info=1)
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.debug("Evicted %d entries from cache %s", len(evicted), self.path)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,124 @@
+"""
+Fast parsers for the semicolon separated MeteoSwiss CSV files.
+
+They work directly on the raw response bytes: the header is resolved into column indices
+once, only the needed columns of each row are converted, and timestamps, which repeat across
+rows, are parsed only once. Results are identical to parsing the csv.DictReader rows with the
+BaseMeteoClient._get_* methods. Files with quoted fields aren't handled and return None, so the
+caller can fall back to the csv module.
+"""
+
+from datetime import UTC, datetime
+from typing import Iterator
+
+# meteo imports these modules, so their names are only looked up when parsing.
+from swissweather import compact as compactmodels, meteo
+
+def can_parse(content: bytes) -> bool:
+    return b'"' not in content
+
+def select_columns(content: bytes, columns: list[str]) -> Iterator[list[bytes | None]]:
+    """
+    Yields the values of the given columns for each row. Columns missing from the header
+    or from a short row are None.
+    """
+    lines = (line for line in content.splitlines() if line)
+    header = next(lines, None)
+    if header is None:
+        return
+    # Like csv.DictReader, the last of duplicate column names wins.
+    indices = {name: i for i, name in enumerate(header.split(b';'))}
+    selected = [indices.get(column.encode('utf-8')) for column in columns]
+    if None not in selected:
+        for line in lines:
+            fields = line.split(b';')
+            try:
+                yield [fields[i] for i in selected]
+            except IndexError:
+                yield [fields[i] if i < len(fields) else None for i in selected]
+    else:
+        for line in lines:
+            fields = line.split(b';')
+            yield [fields[i] if i is not None and i < len(fields) else None for i in selected]
+
+class TimestampCache(object):
+    def __init__(self, format: str, encoding: str = 'utf-8'):
+        self.format = format
+        self.encoding = encoding
+        self._cache: dict[bytes, datetime] = {}
+
+    def parse(self, raw: bytes) -> datetime:
+        timestamp = self._cache.get(raw)
+        if timestamp is None:
+            timestamp = datetime.strptime(raw.decode(self.encoding), self.format).replace(tzinfo=UTC)
+            self._cache[raw] = timestamp
+        return timestamp
+
+class PollenTimestampCache(TimestampCache):
+    """
+    Pollen timestamps are hourly and rarely repeat, so only the date part is cached and
+    the time of day is added to it.
+    """
+    def __init__(self, encoding: str = 'latin-1'):
+        super().__init__(meteo.POLLEN_DATE_FORMAT, encoding)
+        self._days = TimestampCache('%d.%m.%Y', encoding)
+
+    def parse(self, raw: bytes) -> datetime:
+        # dd.mm.YYYY HH:MM
+        if len(raw) == 16 and raw[10:11] == b' ' and raw[13:14] == b':' and raw[11:13].isdigit() and raw[14:16].isdigit():
+            hour = int(raw[11:13])
+            minute = int(raw[14:16])
+            if hour < 24 and minute < 60:
+                return self._days.parse(raw[:10]).replace(hour=hour, minute=minute)
+        return super().parse(raw)
+
+def _decode(raw: bytes | None, encoding: str) -> str | None:
+    return raw.decode(encoding) if raw is not None else None
+
+def parse_current_weather(content: bytes, encoding: str = 'utf-8', compact: bool = False) -> "list[meteo.CurrentWeather] | None":
+    """
+    With compact=True returns swissweather.compact.CompactCurrentWeather objects instead.
+    """
+    if not can_parse(content):
+        return None
+    units = [unit for _, unit in meteo.CURRENT_WEATHER_COLUMNS]
+    columns = ['Station/Location', 'Date'] + [column for column, _ in meteo.CURRENT_WEATHER_COLUMNS]
+    timestamps = TimestampCache(meteo.CURRENT_WEATHER_DATE_FORMAT, encoding)
+    if compact:
+        return [compactmodels.CompactCurrentWeather(_decode(station, encoding), timestamps.parse(date) if date is not None else None,
+                                                    *[meteo.to_float(value) for value in values])
+                for station, date, *values in select_columns(content, columns)]
+
+    weather = []
+    for station, date, *values in select_columns(content, columns):
+        weather.append(meteo.CurrentWeather(
+            _decode(station, encoding),
+            timestamps.parse(date) if date is not None else None,
+            *[(meteo.to_float(value), unit) for value, unit in zip(values, units)]))
+    return weather
+
+def parse_latest_pollen(content: bytes, encoding: str = 'latin-1', compact: bool = False) -> "meteo.CurrentPollen | None":
+    """
+    Returns the most recent row of a pollen data file. Only that row's values are converted.
+    With compact=True returns a swissweather.compact.CompactCurrentPollen instead.
+    """
+    if not can_parse(content):
+        return None
+    columns = ['station_abbr', 'reference_timestamp'] + [column for column, _ in meteo.POLLEN_COLUMNS]
+    timestamps = PollenTimestampCache(encoding)
+    latest = None
+    latestTimestamp = None
+    for row in select_columns(content, columns):
+        timestamp = timestamps.parse(row[1])
+        if latestTimestamp is None or timestamp > latestTimestamp:
+            latest = row
+            latestTimestamp = timestamp
+    if latest is None:
+        return None
+
+    if compact:
+        return compactmodels.CompactCurrentPollen(_decode(latest[0], encoding), latestTimestamp,
+                                                  *[meteo.to_float(value) for value in latest[2:]])
+    units = [unit for _, unit in meteo.POLLEN_COLUMNS]
+    return meteo.CurrentPollen(_decode(latest[0], encoding), latestTimestamp,
+                               *[(meteo.to_float(value), unit) for value, unit in zip(latest[2:], units)])
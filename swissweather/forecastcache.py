@@ -0,0 +1,152 @@
+"""
+In-memory cache of decoded forecast responses which follows the HTTP caching headers
+of the app API.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import threading
+import time
+from typing import Any, Callable, Mapping
+
+DEFAULT_MIN_TTL = 60
+DEFAULT_MAX_TTL = 3600
+# Used when the response has no caching headers
+DEFAULT_TTL = 600
+DEFAULT_STALE_WHILE_REVALIDATE = 300
+DEFAULT_MAX_ENTRIES = 4096
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+def _to_seconds(value: str | None) -> float | None:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _to_timestamp(value: str | None) -> float | None:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def cache_lifetime(headers: Mapping[str, str], default_ttl: float = DEFAULT_TTL,
+                   default_stale: float = DEFAULT_STALE_WHILE_REVALIDATE) -> tuple[float, float]:
+    """
+    Returns how many seconds a response stays fresh and for how many seconds after that
+    it may still be served while it's revalidated, based on its Cache-Control, Expires,
+    Date and Age headers.
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    stale = _to_seconds(directives.get("stale-while-revalidate"))
+    if stale is None:
+        stale = default_stale
+
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0, stale
+    maxAge = _to_seconds(directives.get("max-age"))
+    if maxAge is not None:
+        return max(0.0, maxAge - (_to_seconds(headers.get("Age")) or 0.0)), stale
+    expires = headers.get("Expires")
+    if expires is not None:
+        expiresAt = _to_timestamp(expires)
+        if expiresAt is None:
+            # Invalid dates, e.g. "0", mean already expired.
+            return 0.0, stale
+        date = _to_timestamp(headers.get("Date"))
+        return max(0.0, expiresAt - (date if date is not None else time.time())), stale
+    return default_ttl, stale
+
+@dataclass
+class ForecastCacheEntry:
+    forecastJson: Any
+    etag: str | None
+    lastModified: str | None
+    expires: float # Clock time until which the entry is fresh
+    staleUntil: float # Clock time until which the entry is served while it's refreshed
+    refreshing: bool = False
+
+class ForecastCache(object):
+    """
+    Keeps decoded forecasts by (post code, language) for as long as the response headers
+    allow, but at least min_ttl and at most max_ttl seconds.
+
+    Once expired, an entry is still returned for the stale-while-revalidate time of the
+    response (or stale_while_revalidate seconds if it doesn't say) while a single background
+    request refreshes it. Beyond max_entries, the least recently used entries are dropped.
+    """
+    def __init__(self, min_ttl: float = DEFAULT_MIN_TTL, max_ttl: float = DEFAULT_MAX_TTL,
+                 stale_while_revalidate: float = DEFAULT_STALE_WHILE_REVALIDATE,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[tuple[int, str], ForecastCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[int, str]) -> ForecastCacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry: ForecastCacheEntry) -> bool:
+        return self.clock() < entry.expires
+
+    def is_usable(self, entry: ForecastCacheEntry) -> bool:
+        return self.clock() < entry.staleUntil
+
+    def set(self, key: tuple[int, str], forecastJson, headers: Mapping[str, str]):
+        entry = ForecastCacheEntry(forecastJson, headers.get("ETag"), headers.get("Last-Modified"), 0, 0)
+        self._set_lifetime(entry, headers)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    """
+    Extends the lifetime of an entry after upstream confirmed it with a 304 response.
+    """
+    def renew(self, key: tuple[int, str], headers: Mapping[str, str]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._set_lifetime(entry, headers)
+
+    """
+    Marks the entry as being refreshed. Returns False if a refresh is already running.
+    """
+    def start_refresh(self, key: tuple[int, str]) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refreshing:
+                return False
+            entry.refreshing = True
+            return True
+
+    def finish_refresh(self, key: tuple[int, str]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def _set_lifetime(self, entry: ForecastCacheEntry, headers: Mapping[str, str]):
+        ttl, stale = cache_lifetime(headers, default_stale=self.stale_while_revalidate)
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        now = self.clock()
+        entry.expires = now + ttl
+        entry.staleUntil = entry.expires + stale
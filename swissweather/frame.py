@@ -0,0 +1,125 @@
+from array import array
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from functools import cached_property
+import math
+
+from swissweather.meteo import ICON_TO_CONDITION_MAP, Forecast, to_int
+
+NO_ICON = -1
+
+# Condition lookup table indexed by icon number.
+CONDITION_TABLE: list[str | None] = [ICON_TO_CONDITION_MAP.get(i) for i in range(max(ICON_TO_CONDITION_MAP) + 1)]
+
+# Column name -> (graph JSON key, unit, number of hours each value covers)
+HOURLY_COLUMNS = {
+    "temperatureMax": ("temperatureMax1h", "°C", 1),
+    "temperatureMean": ("temperatureMean1h", "°C", 1),
+    "temperatureMin": ("temperatureMin1h", "°C", 1),
+    "precipitation": ("precipitation1h", "mm", 1),
+    "windSpeed": ("windSpeed1h", "km/h", 1),
+    "windGustSpeed": ("gustSpeed1h", "km/h", 1),
+    "windDirection": ("windDirection3h", "°", 3),
+}
+
+@dataclass
+class ForecastColumn:
+    values: array # Doubles, NaN if the value is missing
+    unit: str
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> float | None:
+        value = self.values[index]
+        return None if math.isnan(value) else value
+
+def condition_for_icon(icon: int) -> str | None:
+    if 0 <= icon < len(CONDITION_TABLE):
+        return CONDITION_TABLE[icon]
+    return None
+
+def expand(values: array, factor: int) -> array:
+    """
+    Repeats every element factor times, e.g. to turn 3-hourly values into hourly ones.
+    """
+    expanded = array(values.typecode, bytes(len(values) * factor * values.itemsize))
+    for offset in range(factor):
+        expanded[offset::factor] = values
+    return expanded
+
+def _to_double_array(values: list) -> array:
+    try:
+        return array('d', values)
+    except TypeError:
+        # Missing values are sent as null
+        return array('d', [math.nan if value is None else value for value in values])
+
+def _to_icon_array(values: list) -> array:
+    try:
+        return array('i', values)
+    except TypeError:
+        return array('i', [NO_ICON if value is None else value for value in values])
+
+class ForecastFrame(object):
+    """
+    Columnar hourly forecast.
+
+    Holds one array per variable (see HOURLY_COLUMNS), all sharing the same hourly time axis
+    starting at start. Units are stored once per column. The per-hour list of Forecast objects
+    is only built when forecasts is accessed.
+    """
+    def __init__(self, start: datetime, icons: array, columns: dict[str, ForecastColumn]):
+        self.start = start
+        self.icons = icons
+        self.columns = columns
+
+    @classmethod
+    def from_json(cls, forecastJson) -> "ForecastFrame | None":
+        graphJson = forecastJson.get("graph", None)
+        if graphJson is None:
+            return None
+
+        startTimestampEpoch = to_int(graphJson.get('start', None))
+        if startTimestampEpoch is None:
+            return None
+        start = datetime.fromtimestamp(startTimestampEpoch / 1000, UTC)
+
+        icons = expand(_to_icon_array(graphJson.get("weatherIcon3h", [])), 3)
+        columns = {}
+        for name, (key, unit, hours) in HOURLY_COLUMNS.items():
+            values = _to_double_array(graphJson.get(key, []))
+            if hours > 1:
+                values = expand(values, hours)
+            columns[name] = ForecastColumn(values, unit)
+
+        # Like MeteoClient._get_hourly_forecast, only keep hours for which all variables are known.
+        hours = min(len(icons), *(len(column) for column in columns.values()))
+        icons = icons[:hours]
+        for column in columns.values():
+            del column.values[hours:]
+        return cls(start, icons, columns)
+
+    def __len__(self) -> int:
+        return len(self.icons)
+
+    def __getitem__(self, name: str) -> ForecastColumn:
+        return self.columns[name]
+
+    @cached_property
+    def timestamps(self) -> list[datetime]:
+        return [self.start + timedelta(hours=hour) for hour in range(len(self))]
+
+    @cached_property
+    def conditions(self) -> list[str | None]:
+        return [condition_for_icon(icon) for icon in self.icons]
+
+    @cached_property
+    def forecasts(self) -> list[Forecast]:
+        icons = [None if icon == NO_ICON else icon for icon in self.icons]
+        columns = {name: [(value, column.unit) for value in map(column.__getitem__, range(len(column)))]
+                   for name, column in self.columns.items()}
+        return [Forecast(timestamp, icon, condition, tMax, tMin, precipitation, windSpeed=windSpeed,
+                         windDirection=windDirection, windGustSpeed=windGustSpeed, temperatureMean=tMean)
+                for timestamp, icon, condition, tMax, tMean, tMin, precipitation, windSpeed, windGustSpeed, windDirection
+                in zip(self.timestamps, icons, self.conditions, *(columns[name] for name in HOURLY_COLUMNS))]
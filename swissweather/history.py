@@ -0,0 +1,180 @@
+"""
+Append-only on-disk history of current weather snapshots.
+
+Every station gets a directory with one file of int64 Unix timestamps and one file of float64
+values per variable (NaN for missing values), all in native byte order:
+
+    <directory>/KLO/timestamps.i64
+    <directory>/KLO/airTemperature.f64
+    ...
+
+Range queries memory-map the files and binary search the timestamps, so only the requested
+range is read.
+"""
+
+from array import array
+import bisect
+from dataclasses import dataclass
+from datetime import UTC, datetime
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+from typing import Iterator
+
+from swissweather.meteo import CURRENT_WEATHER_UNITS, CurrentWeather, measurement_value
+
+logger = logging.getLogger(__name__)
+
+VARIABLES = CURRENT_WEATHER_UNITS
+
+TIMESTAMPS_FILE = "timestamps.i64"
+_STATION_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+@dataclass
+class HistorySeries:
+    station: str
+    variable: str
+    unit: str
+    timestamps: array # int64 Unix timestamps
+    values: array # float64, NaN if missing
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def items(self) -> Iterator[tuple[datetime, float | None]]:
+        for timestamp, value in zip(self.timestamps, self.values):
+            yield datetime.fromtimestamp(timestamp, UTC), None if math.isnan(value) else value
+
+class HistoryStore(object):
+    """
+    Stores current weather snapshots per station and variable. Snapshots whose timestamp
+    isn't newer than the last stored one for a station are skipped, so the same snapshot
+    can be ingested repeatedly.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._lastTimestamps: dict[str, int | None] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def stations(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isfile(os.path.join(self.directory, name, TIMESTAMPS_FILE)))
+
+    def ingest(self, snapshot: list[CurrentWeather]) -> int:
+        """
+        Appends the snapshot and returns the number of stations that had new data.
+        """
+        appended = 0
+        with self._lock:
+            for weather in snapshot:
+                if weather.station is None or weather.date is None or not _STATION_PATTERN.match(weather.station):
+                    continue
+                timestamp = int(weather.date.timestamp())
+                last = self._last_timestamp(weather.station)
+                if last is not None and timestamp <= last:
+                    continue
+                self._append(weather, timestamp)
+                self._lastTimestamps[weather.station] = timestamp
+                appended += 1
+        return appended
+
+    def history(self, station: str, variable: str, start: datetime | None = None, end: datetime | None = None) -> HistorySeries:
+        """
+        Returns the values of variable for station with start <= timestamp < end (timezone aware).
+        """
+        if variable not in VARIABLES:
+            raise ValueError(f"Unknown variable {variable}")
+        if (start is not None and start.tzinfo is None) or (end is not None and end.tzinfo is None):
+            raise ValueError("start and end must be timezone aware datetimes")
+        series = HistorySeries(station, variable, VARIABLES[variable], array('q'), array('d'))
+        if not _STATION_PATTERN.match(station):
+            return series
+
+        timestampsPath = self._path(station, TIMESTAMPS_FILE)
+        valuesPath = self._path(station, variable + ".f64")
+        if not os.path.exists(timestampsPath) or not os.path.exists(valuesPath):
+            return series
+        with _MappedArray(timestampsPath, 'q') as timestamps:
+            startIndex = 0 if start is None else bisect.bisect_left(timestamps, start.timestamp())
+            endIndex = len(timestamps) if end is None else bisect.bisect_left(timestamps, end.timestamp())
+            if startIndex >= endIndex:
+                return series
+            series.timestamps.frombytes(timestamps[startIndex:endIndex].tobytes())
+        with _MappedArray(valuesPath, 'd') as values:
+            series.values.frombytes(values[startIndex:endIndex].tobytes())
+        return series
+
+    def _path(self, station: str, name: str) -> str:
+        return os.path.join(self.directory, station, name)
+
+    def _last_timestamp(self, station: str) -> int | None:
+        if station not in self._lastTimestamps:
+            self._lastTimestamps[station] = self._repair(station)
+        return self._lastTimestamps[station]
+
+    def _repair(self, station: str) -> int | None:
+        """
+        Timestamps are written last, so they decide how many rows exist. Values beyond that
+        are left over from an interrupted write and cut off. Returns the last timestamp.
+        """
+        timestampsPath = self._path(station, TIMESTAMPS_FILE)
+        if not os.path.exists(timestampsPath):
+            return None
+        rows = os.path.getsize(timestampsPath) // 8
+        os.truncate(timestampsPath, rows * 8)
+        for variable in VARIABLES:
+            valuesPath = self._path(station, variable + ".f64")
+            if not os.path.exists(valuesPath):
+                # Variable added later, fill with missing values
+                with open(valuesPath, "wb") as f:
+                    array('d', [math.nan] * rows).tofile(f)
+            elif os.path.getsize(valuesPath) != rows * 8:
+                logger.warning("Repairing history of %s/%s", station, variable)
+                os.truncate(valuesPath, rows * 8)
+        if rows == 0:
+            return None
+        with open(timestampsPath, "rb") as f:
+            f.seek((rows - 1) * 8)
+            last = array('q')
+            last.fromfile(f, 1)
+            return last[0]
+
+    def _append(self, weather: CurrentWeather, timestamp: int):
+        os.makedirs(os.path.join(self.directory, weather.station), exist_ok=True)
+        for variable in VARIABLES:
+            value = measurement_value(getattr(weather, variable))
+            with open(self._path(weather.station, variable + ".f64"), "ab") as f:
+                array('d', [math.nan if value is None else value]).tofile(f)
+        with open(self._path(weather.station, TIMESTAMPS_FILE), "ab") as f:
+            array('q', [timestamp]).tofile(f)
+
+class _MappedArray(object):
+    """
+    Read-only memory-mapped view of a file as a typed memoryview.
+    """
+    def __init__(self, path: str, typecode: str):
+        self.path = path
+        self.typecode = typecode
+        self._file = None
+        self._map = None
+        self._view = None
+
+    def __enter__(self) -> memoryview:
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            return memoryview(b"").cast('B').cast(self.typecode)
+        self._map = mmap.mmap(self._file.fileno(), size - size % 8, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map).cast(self.typecode)
+        return self._view
+
+    def __exit__(self, *exc_info):
+        if self._view is not None:
+            self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
@@ -1,21 +1,66 @@
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import contextvars
 import csv
 from enum import IntEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import UTC, datetime, timedelta
+from functools import cached_property, wraps
 import itertools
 import logging
-from typing import List, NewType
+import threading
+import time
+from typing import Iterable, Iterator, List, NewType
+from urllib.parse import urlsplit
 
 import requests
 
+from swissweather import compact as compactmodels, fastcsv
+from swissweather.decoding import STRUCT_TYPES, JsonDecoder, default_decoder
+from swissweather.diskcache import Cache, CacheEntry
+from swissweather.forecastcache import ForecastCache
+from swissweather.metrics import NOOP_METRICS, Metrics
+from swissweather.retry import DeadlineExceeded, HedgePolicy, LatencyTracker, Provenance, RetryPolicy, deadline_at
+from swissweather.singleflight import SingleFlight
+from swissweather.transport import RequestsTransport, Response, Transport
+
 logger = logging.getLogger(__name__)
 
 CURRENT_CONDITION_URL= 'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv'
+# VQHA80 is republished every 10 minutes, so there's no point in fetching it more often.
+CURRENT_CONDITION_INTERVAL = 600
+SMN_STATIONS_URL = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/ogd-smn_meta_stations.csv'
 POLLEN_STATIONS_URL = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv'
 POLLEN_DATA_URL = "https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/{}/ogd-pollen_{}_d_recent.csv"
+# How long responses are reused from a persistent cache before they're revalidated, in seconds
+STATIONS_TTL = 24 * 3600
+POLLEN_STATIONS_TTL = STATIONS_TTL
+POLLEN_DATA_TTL = 3600
+# Bytes before the known end of a pollen file requested again, to notice rewritten files
+POLLEN_OVERLAP = 64
+FORECAST_TTL = 600
 
 FORECAST_URL= "https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz={:<06d}"
 FORECAST_USER_AGENT = "android-31 ch.admin.meteoswiss-2160000"
+# Endpoint labels used for metrics
+ENDPOINTS = {
+    CURRENT_CONDITION_URL: "current_weather",
+    SMN_STATIONS_URL: "smn_stations",
+    POLLEN_STATIONS_URL: "pollen_stations",
+}
+
+# Number of parallel requests used by bulk calls
+DEFAULT_MAX_WORKERS = 8
+# Threads running requests which are hedged or have a deadline
+DEFAULT_REQUEST_THREADS = 32
+# Threads refreshing stale forecasts in the background
+DEFAULT_REFRESH_THREADS = 4
+# Languages of MeteoSwiss forecasts
+FORECAST_LANGUAGES = ("de", "fr", "it", "en")
+# Number of distinct texts kept by a TextTable
+DEFAULT_MAX_TEXTS = 16384
+# Number of warnings whose translations are remembered
+WARNING_TRANSLATIONS = 4096
 
 CONDITION_CLASSES = {
     "clear-night": [101],
@@ -37,6 +82,35 @@ CONDITION_CLASSES = {
 
 ICON_TO_CONDITION_MAP : dict[int, str] =  {i: k for k, v in CONDITION_CLASSES.items() for i in v}
 
+# VQHA80 column and unit of each measurement in CurrentWeather, in field order
+CURRENT_WEATHER_COLUMNS = [
+    ('tre200s0', "°C"),
+    ('rre150z0', "mm"),
+    ('sre000z0', "min"),
+    ('gre000z0', "W/m²"),
+    ('ure200s0', '%'),
+    ('tde200s0', '°C'),
+    ('dkl010z0', '°'),
+    ('fu3010z0', 'km/h'),
+    ('fu3010z1', 'km/h'),
+    ('prestas0', 'hPa'),
+    ('prestas0', 'hPa'),
+    ('pp0qnhs0', 'hPa'),
+]
+CURRENT_WEATHER_DATE_FORMAT = '%Y%m%d%H%M'
+
+# Pollen data column and unit of each measurement in CurrentPollen, in field order
+POLLEN_COLUMNS = [
+    ("kabetuh0", 'No/m3'),
+    ("khpoach0", 'No/m3'),
+    ("kaalnuh0", 'No/m3'),
+    ("kacoryh0", 'No/m3'),
+    ("kafaguh0", 'No/m3'),
+    ("kafraxh0", 'No/m3'),
+    ("kaquerh0", 'No/m3'),
+]
+POLLEN_DATE_FORMAT = '%d.%m.%Y %H:%M'
+
 """
 Returns float or None
 """
@@ -60,6 +134,35 @@ def to_int(string: str) -> int | None:
 
 FloatValue = NewType('FloatValue', tuple[float | None, str])
 
+"""
+Returns the value of a FloatValue, which is a plain float or None in the compact models.
+"""
+def measurement_value(measurement: FloatValue | float | None) -> float | None:
+    if isinstance(measurement, tuple):
+        return measurement[0]
+    return measurement
+
+def endpoint_for_url(url: str) -> str:
+    endpoint = ENDPOINTS.get(url)
+    if endpoint is not None:
+        return endpoint
+    if url.startswith(FORECAST_URL.split("?")[0]):
+        return "forecast"
+    if url.startswith(POLLEN_DATA_URL.split("{")[0]):
+        return "pollen_data"
+    return "other"
+
+# Reports the run time of a parsing method to the client's metrics.
+def _timed_section(section: str):
+    labels = {"section": section}
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer("parse", labels):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 @dataclass
 class StationInfo:
     name: str
@@ -90,6 +193,18 @@ class CurrentWeather:
     pressureSeaLevel: FloatValue
     pressureSeaLevelAtStandardAtmosphere: FloatValue
 
+# Measurement fields of CurrentWeather and their units
+CURRENT_WEATHER_UNITS: dict[str, str] = {field.name: unit for field, (_, unit) in zip(fields(CurrentWeather)[2:], CURRENT_WEATHER_COLUMNS)}
+
+@dataclass
+class CurrentWeatherSnapshot:
+    rows: list[CurrentWeather]
+    stations: dict[str, CurrentWeather] # Rows indexed by casefolded station abbreviation
+    etag: str | None
+    lastModified: str | None
+    expires: float # time.monotonic() timestamp after which the snapshot is revalidated
+    provenance: Provenance = Provenance(0)
+
 @dataclass
 class CurrentState:
     currentTemperature: FloatValue
@@ -153,6 +268,52 @@ class WeatherForecast(object):
     sunrise: list[datetime]
     sunset: list[datetime]
     warnings: list[Warning]
+    # How the forecast was retrieved. Not a field, so it doesn't take part in comparisons.
+    provenance = Provenance(0)
+
+class LazyWeatherForecast(WeatherForecast):
+    """
+    WeatherForecast which keeps the decoded forecast JSON and parses each section
+    only when it's first accessed.
+    """
+    def __init__(self, forecastJson, client: "BaseMeteoClient"):
+        self._forecastJson = forecastJson
+        self._client = client
+
+    @cached_property
+    def current(self) -> CurrentState | None:
+        return self._client._get_current_state(self._forecastJson)
+
+    @cached_property
+    def dailyForecast(self) -> list[Forecast]:
+        return self._client._get_daily_forecast(self._forecastJson)
+
+    @cached_property
+    def hourlyForecast(self) -> list[Forecast] | None:
+        return self._client._get_hourly_forecast(self._forecastJson)
+
+    @cached_property
+    def sunrise(self) -> list[datetime] | None:
+        return self._client._get_graph_timestamps(self._forecastJson, "sunrise")
+
+    @cached_property
+    def sunset(self) -> list[datetime] | None:
+        return self._client._get_graph_timestamps(self._forecastJson, "sunset")
+
+    @cached_property
+    def warnings(self) -> list[Warning]:
+        return self._client._get_weather_warnings(self._forecastJson)
+
+    def __eq__(self, other):
+        if not isinstance(other, WeatherForecast):
+            return NotImplemented
+        return all(getattr(self, f.name) == getattr(other, f.name) for f in fields(WeatherForecast))
+
+@dataclass
+class ForecastResult(object):
+    postCode: int
+    forecast: WeatherForecast | None
+    error: Exception | None = None # Set if retrieving the forecast raised
 
 @dataclass
 class CurrentPollen(object):
@@ -166,205 +327,253 @@ class CurrentPollen(object):
     ash: FloatValue
     oak: FloatValue
 
-class MeteoClient(object):
-    language: str = "en"
+@dataclass
+class PollenFileState(object):
+    header: bytes # First line of the file, needed to parse appended rows
+    offset: int # Length of the file up to the end of the last complete line we've seen
+    tail: bytes # Last bytes of the file up to offset, compared to notice a rewritten file
+    latest: CurrentPollen | None
 
+class TextTable(object):
     """
-    Initializes the client.
-
-    Languages available are en, de, fr and it.
+    Deduplicates strings, so texts repeated across many forecasts (like the warnings of a
+    region) are kept in memory once. Beyond max_entries, the least recently used texts are
+    forgotten.
     """
-    def __init__(self, language="en"):
-        self.language = language
+    def __init__(self, max_entries: int = DEFAULT_MAX_TEXTS):
+        self.max_entries = max_entries
+        self._texts: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
 
-    def get_current_weather_for_all_stations(self) -> list[CurrentWeather] | None:
-        logger.debug("Retrieving current weather for all stations ...")
-        data = self._get_csv_dictionary_for_url(CURRENT_CONDITION_URL)
-        weather = []
-        for row in data:
-            weather.append(self._get_current_data_for_row(row))
-        return weather
+    def __len__(self) -> int:
+        return len(self._texts)
 
-    def get_current_weather_for_station(self, station: str) -> CurrentWeather | None:
-        logger.debug("Retrieving current weather...")
-        data = self._get_current_weather_line_for_station(station)
-        if data is None:
-            logger.warning("Couldn't find data for station %s", station)
+    def intern(self, text: str | None) -> str | None:
+        if text is None:
             return None
+        with self._lock:
+            existing = self._texts.get(text)
+            if existing is not None:
+                self._texts.move_to_end(text)
+                return existing
+            self._texts[text] = text
+            while len(self._texts) > self.max_entries:
+                self._texts.popitem(last=False)
+            return text
+
+def _warning_key(warning: Warning) -> tuple:
+    # Identifies a warning independent of the language of its texts
+    return (warning.warningType, warning.warningLevel, warning.outlook, warning.validFrom, warning.validTo)
+
+class BaseMeteoClient(object):
+    """
+    Parsing shared by MeteoClient and AsyncMeteoClient. Subclasses do the I/O and
+    hand the decoded CSV rows and forecast JSON to the _get_* methods.
 
-        return self._get_current_data_for_row(data)
+    Timings and counters are reported to metrics, see swissweather.metrics. Forecast responses
+    are decoded by decoder, by default the fastest one installed (see swissweather.decoding).
+    Warning texts are deduplicated in texts.
+
+    With compact=True, current weather, forecasts and pollen are returned as the slotted
+    swissweather.compact models holding plain floats, built directly by the parsers.
+    """
+    language: str = "en"
+    metrics: Metrics = NOOP_METRICS
+    compact: bool = False
+
+    def __init__(self, language="en", metrics: Metrics | None = None, decoder: JsonDecoder | None = None,
+                 compact: bool = False):
+        self.language = language
+        self.compact = compact
+        self.metrics = metrics if metrics is not None else NOOP_METRICS
+        self.decoder = decoder if decoder is not None else default_decoder()
+        self.texts = TextTable()
 
     def _get_current_data_for_row(self, csv_row) -> CurrentWeather:
         timestamp = None
         timestamp_raw = csv_row.get('Date', None)
         if timestamp_raw is not None:
-            timestamp = datetime.strptime(timestamp_raw, '%Y%m%d%H%M').replace(tzinfo=UTC)
+            timestamp = datetime.strptime(timestamp_raw, CURRENT_WEATHER_DATE_FORMAT).replace(tzinfo=UTC)
+
+        if self.compact:
+            return compactmodels.CompactCurrentWeather(
+                csv_row.get('Station/Location'),
+                timestamp,
+                *[to_float(csv_row.get(column, None)) for column, _ in CURRENT_WEATHER_COLUMNS])
 
         return CurrentWeather(
             csv_row.get('Station/Location'),
             timestamp,
-            (to_float(csv_row.get('tre200s0', None)), "°C") ,
-            (to_float(csv_row.get('rre150z0', None)), "mm"),
-            (to_float(csv_row.get('sre000z0', None)), "min"),
-            (to_float(csv_row.get('gre000z0', None)), "W/m²"),
-            (to_float(csv_row.get('ure200s0', None)), '%'),
-            (to_float(csv_row.get('tde200s0', None)), '°C'),
-            (to_float(csv_row.get('dkl010z0', None)), '°'),
-            (to_float(csv_row.get('fu3010z0', None)), 'km/h'),
-            (to_float(csv_row.get('fu3010z1', None)), 'km/h'),
-            (to_float(csv_row.get('prestas0', None)), 'hPa'),
-            (to_float(csv_row.get('prestas0', None)), 'hPa'),
-            (to_float(csv_row.get('pp0qnhs0', None)), 'hPa'),
-        )
-
-    ## Forecast
-    def get_forecast(self, postCode) -> WeatherForecast | None:
-        forecastJson = self._get_forecast_json(postCode, self.language)
-        logger.debug("Forecast JSON: %s", forecastJson)
-        if forecastJson is None:
-            return None
+            *[(to_float(csv_row.get(column, None)), unit) for column, unit in CURRENT_WEATHER_COLUMNS])
 
+    def _get_forecast_for_json(self, forecastJson) -> WeatherForecast:
         currentState = self._get_current_state(forecastJson)
         dailyForecast = self._get_daily_forecast(forecastJson)
         hourlyForecast = self._get_hourly_forecast(forecastJson)
         warnings = self._get_weather_warnings(forecastJson)
+        sunrises = self._get_graph_timestamps(forecastJson, "sunrise")
+        sunsets = self._get_graph_timestamps(forecastJson, "sunset")
+        return WeatherForecast(currentState, dailyForecast, hourlyForecast, sunrises, sunsets, warnings)
 
-        sunrises = None
-        sunriseJson = forecastJson.get("graph", {}).get("sunrise", None)
-        if sunriseJson is not None:
-            sunrises = [datetime.fromtimestamp(epoch / 1000, UTC) for epoch in sunriseJson]
-
-        sunsets = None
-        sunsetJson = forecastJson.get("graph", {}).get("sunset", None)
-        if sunsetJson is not None:
-            sunsets = [datetime.fromtimestamp(epoch / 1000, UTC) for epoch in sunsetJson]
+    def _get_graph_timestamps(self, forecastJson, key) -> list[datetime] | None:
+        if isinstance(forecastJson, STRUCT_TYPES):
+            timestampsJson = getattr(forecastJson.graph, key, None)
+        else:
+            timestampsJson = (forecastJson.get("graph", None) or {}).get(key, None)
+        if timestampsJson is None:
+            return None
+        return [datetime.fromtimestamp(epoch / 1000, UTC) for epoch in timestampsJson]
 
-        return WeatherForecast(currentState, dailyForecast, hourlyForecast, sunrises, sunsets, warnings)
+    # The _get_* methods read the structs of decoding.MsgspecDecoder by attribute, which is
+    # cheaper than going through their dict-like get().
 
+    @_timed_section("current")
     def _get_current_state(self, forecastJson) -> CurrentState | None:
-        if "currentWeather" not in forecastJson:
-            return None
+        if isinstance(forecastJson, STRUCT_TYPES):
+            currentJson = forecastJson.currentWeather
+            if currentJson is None:
+                return None
+            icon, temperature = currentJson.icon, currentJson.temperature
+        else:
+            if "currentWeather" not in forecastJson:
+                return None
+            currentJson = forecastJson.get('currentWeather', {})
+            icon, temperature = currentJson.get('icon', None), currentJson.get('temperature')
 
-        currentIcon = to_int(forecastJson.get('currentWeather', {}).get('icon', None))
+        currentIcon = to_int(icon)
         currentCondition = None
         if currentIcon is not None:
             currentCondition = ICON_TO_CONDITION_MAP.get(currentIcon)
-        return CurrentState(
-            (to_float(forecastJson.get('currentWeather', {}).get('temperature')), "°C"),
-            currentIcon, currentCondition)
+        return CurrentState((to_float(temperature), "°C"), currentIcon, currentCondition)
 
+    @_timed_section("daily")
     def _get_daily_forecast(self, forecastJson) -> list[Forecast] | None:
         forecast: List[Forecast] = []
-        if "forecast" not in forecastJson:
-            return forecast
+        if isinstance(forecastJson, STRUCT_TYPES):
+            days = [(dailyJson.dayDate, dailyJson.iconDay, dailyJson.temperatureMax, dailyJson.temperatureMin, dailyJson.precipitation)
+                    for dailyJson in forecastJson.forecast or ()]
+        else:
+            if "forecast" not in forecastJson:
+                return forecast
+            days = [(dailyJson.get('dayDate'), dailyJson.get('iconDay', None), dailyJson.get('temperatureMax', None),
+                     dailyJson.get('temperatureMin', None), dailyJson.get('precipitation', None))
+                    for dailyJson in forecastJson["forecast"]]
 
-        for dailyJson in forecastJson["forecast"]:
+        for dayDate, iconDay, temperatureMax, temperatureMin, precipitation in days:
             timestamp = None
-            if "dayDate" in dailyJson:
-                timestamp = datetime.strptime(dailyJson["dayDate"], '%Y-%m-%d')
-            icon = to_int(dailyJson.get('iconDay', None))
+            if dayDate is not None:
+                timestamp = datetime.strptime(dayDate, '%Y-%m-%d')
+            icon = to_int(iconDay)
             condition = ICON_TO_CONDITION_MAP.get(icon)
-            temperatureMax = (to_float(dailyJson.get('temperatureMax', None)), "°C")
-            temperatureMin = (to_float(dailyJson.get('temperatureMin', None)), "°C")
-            precipitation = (to_float(dailyJson.get('precipitation', None)), "mm")
-            forecast.append(Forecast(timestamp, icon, condition, temperatureMax, temperatureMin, precipitation))
+            if self.compact:
+                forecast.append(compactmodels.CompactForecast(timestamp, icon, condition, to_float(temperatureMax),
+                                                              to_float(temperatureMin), to_float(precipitation)))
+                continue
+            forecast.append(Forecast(timestamp, icon, condition, (to_float(temperatureMax), "°C"), (to_float(temperatureMin), "°C"),
+                                     (to_float(precipitation), "mm")))
         return forecast
 
+    @_timed_section("hourly")
     def _get_hourly_forecast(self, forecastJson) -> list[Forecast] | None:
-        graphJson = forecastJson.get("graph", None)
-        if graphJson is None:
-            return None
+        if isinstance(forecastJson, STRUCT_TYPES):
+            graphJson = forecastJson.graph
+            if graphJson is None:
+                return None
+            startTimestampEpoch = to_int(graphJson.start)
+            temperatureMaxList = graphJson.temperatureMax1h or []
+            temperatureMeanList = graphJson.temperatureMean1h or []
+            temperatureMinList = graphJson.temperatureMin1h or []
+            precipitationList = graphJson.precipitation1h or []
+            windGustSpeedList = graphJson.gustSpeed1h or []
+            windSpeedList = graphJson.windSpeed1h or []
+            icons3h = graphJson.weatherIcon3h or []
+            windDirections3h = graphJson.windDirection3h or []
+        else:
+            graphJson = forecastJson.get("graph", None)
+            if graphJson is None:
+                return None
+            startTimestampEpoch = to_int(graphJson.get('start', None))
+            temperatureMaxList = graphJson.get("temperatureMax1h", [])
+            temperatureMeanList = graphJson.get("temperatureMean1h", [])
+            temperatureMinList = graphJson.get("temperatureMin1h", [])
+            precipitationList = graphJson.get("precipitation1h", [])
+            windGustSpeedList = graphJson.get("gustSpeed1h", [])
+            windSpeedList = graphJson.get("windSpeed1h", [])
+            icons3h = graphJson.get("weatherIcon3h", [])
+            windDirections3h = graphJson.get("windDirection3h", [])
 
-        startTimestampEpoch = to_int(graphJson.get('start', None))
         if startTimestampEpoch is None:
             return None
         startTimestamp = datetime.fromtimestamp(startTimestampEpoch / 1000, UTC)
 
-        forecast = []
-        temperatureMaxList = [ (value, "°C") for value in graphJson.get("temperatureMax1h", [])]
-        temperatureMeanList = [ (value, "°C") for value in graphJson.get("temperatureMean1h", [])]
-        temperatureMinList = [ (value, "°C") for value in graphJson.get("temperatureMin1h", [])]
-        precipitationList = [ (value, "mm") for value in graphJson.get("precipitation1h", [])]
-        windGustSpeedList = [ (value, "km/h") for value in graphJson.get("gustSpeed1h", [])]
-        windSpeedList = [ (value, "km/h") for value in graphJson.get("windSpeed1h", [])]
-
         # We get icons only once every 3 hours so we need to expand each elemen 3-times to match
-        iconList = list(itertools.chain.from_iterable(itertools.repeat(x, 3) for x in graphJson.get("weatherIcon3h", [])))
-        windDirectionlist = list(itertools.chain.from_iterable(itertools.repeat((x, "°"), 3) for x in graphJson.get("windDirection3h", [])))
+        iconList = list(itertools.chain.from_iterable(itertools.repeat(x, 3) for x in icons3h))
+        windDirectionlist = list(itertools.chain.from_iterable(itertools.repeat(x, 3) for x in windDirections3h))
 
         # This is the minimum amount of data we have
         minForecastHours = min(len(temperatureMaxList), len(temperatureMeanList), len(temperatureMinList), len(precipitationList), len(iconList))
         timestampList = [ startTimestamp + timedelta(hours=value) for value in range(0, minForecastHours) ]
+        hours = zip(timestampList, iconList, temperatureMaxList, temperatureMeanList, temperatureMinList, precipitationList,
+                    windDirectionlist, windSpeedList, windGustSpeedList, strict=False)
+
+        if self.compact:
+            return [compactmodels.CompactForecast(ts, icon, ICON_TO_CONDITION_MAP.get(icon), tMax, tMin, precipitation, tMean, windSpeed, windDirection, windGustSpeed)
+                    for ts, icon, tMax, tMean, tMin, precipitation, windDirection, windSpeed, windGustSpeed in hours]
 
-        for ts, icon, tMax, tMean, tMin, precipitation, windDirection, windSpeed, windGustSpeed in zip(timestampList, iconList, temperatureMaxList,
-                                                        temperatureMeanList, temperatureMinList, precipitationList, windDirectionlist, windSpeedList, windGustSpeedList, strict=False):
-            forecast.append(Forecast(ts, icon, ICON_TO_CONDITION_MAP.get(icon), tMax, tMin, precipitation, windSpeed=windSpeed, windDirection=windDirection,
-                                      windGustSpeed=windGustSpeed, temperatureMean=tMean))
+        forecast = []
+        for ts, icon, tMax, tMean, tMin, precipitation, windDirection, windSpeed, windGustSpeed in hours:
+            forecast.append(Forecast(ts, icon, ICON_TO_CONDITION_MAP.get(icon), (tMax, "°C"), (tMin, "°C"), (precipitation, "mm"),
+                                     windSpeed=(windSpeed, "km/h"), windDirection=(windDirection, "°"),
+                                     windGustSpeed=(windGustSpeed, "km/h"), temperatureMean=(tMean, "°C")))
         return forecast
 
+    @_timed_section("warnings")
     def _get_weather_warnings(self, forecastJson) -> list[Warning]:
-        warningsJson = forecastJson.get("warnings", None)
+        struct = isinstance(forecastJson, STRUCT_TYPES)
+        warningsJson = forecastJson.warnings if struct else forecastJson.get("warnings", None)
         if warningsJson is None:
             return []
 
         warnings = []
         for warningJson in warningsJson:
             try:
+                if struct:
+                    warnType, warnLevel, text, htmlText, outlook, validFromRaw, validToRaw = (
+                        warningJson.warnType, warningJson.warnLevel, warningJson.text, warningJson.htmlText,
+                        warningJson.outlook, warningJson.validFrom, warningJson.validTo)
+                    links = [(link.text, link.url) for link in warningJson.links]
+                else:
+                    warnType, warnLevel, text, htmlText, outlook, validFromRaw, validToRaw = (
+                        warningJson.get("warnType"), warningJson.get("warnLevel"), warningJson.get("text"),
+                        warningJson.get("htmlText"), warningJson.get("outlook"), warningJson.get("validFrom"),
+                        warningJson.get("validTo"))
+                    links = [(link.get("text"), link.get("url")) for link in warningJson.get("links")]
+
                 validFrom = None
                 validTo = None
-                validFromEpoch = to_int(warningJson.get("validFrom"))
-                validToEpoch = to_int(warningJson.get("validTo"))
+                validFromEpoch = to_int(validFromRaw)
+                validToEpoch = to_int(validToRaw)
                 if validFromEpoch is not None:
                     validFrom = datetime.fromtimestamp(validFromEpoch / 1000, UTC)
                 if validToEpoch is not None:
                     validTo = datetime.fromtimestamp(validToEpoch / 1000, UTC)
 
                 warning = Warning(
-                    to_int(warningJson.get("warnType")),
-                    to_int(warningJson.get("warnLevel")),
-                    warningJson.get("text"),
-                    warningJson.get("htmlText"),
-                    bool(warningJson.get("outlook")),
+                    to_int(warnType),
+                    to_int(warnLevel),
+                    self.texts.intern(text),
+                    self.texts.intern(htmlText),
+                    bool(outlook),
                     validFrom,
                     validTo,
-                    [(link.get("text"), link.get("url")) for link in warningJson.get("links")])
+                    [(self.texts.intern(linkText), self.texts.intern(url)) for linkText, url in links])
                 warnings.append(warning)
             except Exception as e:
                 logger.error("Failed to parse warning", exc_info=1)
+                self.metrics.increment("errors_swallowed", labels={"section": "warnings"})
         return warnings
 
-    def _get_current_weather_line_for_station(self, station):
-        if station is None:
-            return None
-        return next((row for row in self._get_csv_dictionary_for_url(CURRENT_CONDITION_URL)
-            if row['Station/Location'].casefold() == station.casefold()), None)
-
-    def _get_csv_dictionary_for_url(self, url, encoding='utf-8'):
-        try:
-            logger.debug("Requesting station data...")
-            with requests.get(url, stream = True) as r:
-                lines = (line.decode(encoding) for line in r.iter_lines())
-                yield from csv.DictReader(lines, delimiter=';')
-        except requests.exceptions.RequestException as _:
-            logger.error("Connection failure.", exc_info=1)
-            return None
-
-    def _get_forecast_json(self, postCode, language):
-        try:
-            url = FORECAST_URL.format(int(postCode))
-            logger.debug("Requesting forecast data from %s...", url)
-            return requests.get(url, headers =
-                { "User-Agent": FORECAST_USER_AGENT,
-                    "Accept-Language": language,
-                    "Accept": "application/json" }).json()
-        except requests.exceptions.RequestException as _:
-            logger.error("Connection failure.", exc_info=1)
-            return None
-
-    def get_pollen_station_list(self) -> list[StationInfo]:
-        station_list = self._get_csv_dictionary_for_url(POLLEN_STATIONS_URL, encoding='latin-1')
-        if station_list is None:
-            return None
+    def _get_stations_for_rows(self, station_list) -> list[StationInfo] | None:
         stations = []
         for row in station_list:
             stations.append(StationInfo(row.get('station_name'),
@@ -378,24 +587,644 @@ class MeteoClient(object):
             return None
         return stations
 
+    def _get_current_pollen_for_rows(self, pollen_csv) -> CurrentPollen | None:
+        # Only the most recent row is needed, so keep a running maximum instead of sorting.
+        latest = None
+        latestTimestamp = None
+        for row in pollen_csv:
+            timestamp = datetime.strptime(row["reference_timestamp"], POLLEN_DATE_FORMAT).replace(tzinfo=UTC)
+            if latestTimestamp is None or timestamp > latestTimestamp:
+                latest = row
+                latestTimestamp = timestamp
+        if latest is None:
+            return None
+        if self.compact:
+            return compactmodels.CompactCurrentPollen(latest["station_abbr"], latestTimestamp,
+                                                      *[to_float(latest.get(column)) for column, _ in POLLEN_COLUMNS])
+        return CurrentPollen(
+            latest["station_abbr"],
+            latestTimestamp,
+            *[(to_float(latest.get(column)), unit) for column, unit in POLLEN_COLUMNS])
+
+class MeteoClient(BaseMeteoClient):
+    """
+    Initializes the client.
+
+    Languages available are en, de, fr and it. All requests go through the given transport,
+    by default a pooled keep-alive RequestsTransport shared by every call of this client.
+
+    Current weather data is kept for current_weather_ttl seconds and then revalidated with
+    a conditional request.
+
+    With incremental_pollen, pollen data files are only downloaded in full once. Later calls
+    request just the rows appended since then with HTTP Range requests, starting a few bytes
+    early to check that the file wasn't rewritten.
+
+    If a persistent cache (e.g. swissweather.diskcache.SQLiteCache) is given, responses are
+    stored in it and reused, also across restarts, until they expire.
+
+    With a forecast_cache, decoded forecasts are kept in memory as long as the caching headers
+    of the forecast API allow, and expired ones are refreshed in the background while they're
+    still returned.
+
+    Request phases, bytes, decoding and parsing times, cache hits and skipped errors are
+    reported to metrics, e.g. a swissweather.metrics.MetricsAggregator.
+
+    With base_url, e.g. "http://localhost:8080", all requests go to that server with the
+    path and query of the MeteoSwiss URL instead, e.g. to a swissweather.serve proxy.
+
+    Failed requests are retried according to retry, slow ones are sent a second time
+    according to hedge, and each request including its retries is given up after deadline
+    seconds (see swissweather.retry, also for shorter deadlines of single calls). The
+    provenance of forecasts and current_weather_provenance tell whether data came from a
+    retry, a hedged request or a cache.
+    """
+    def __init__(self, language="en", transport: Transport | None = None,
+                 current_weather_ttl: float = CURRENT_CONDITION_INTERVAL, incremental_pollen: bool = False,
+                 cache: Cache | None = None, forecast_cache: ForecastCache | None = None,
+                 metrics: Metrics | None = None, decoder: JsonDecoder | None = None,
+                 base_url: str | None = None, retry: RetryPolicy | None = None, hedge: HedgePolicy | None = None,
+                 deadline: float | None = None, compact: bool = False):
+        super().__init__(language, metrics, decoder, compact)
+        self.base_url = base_url.rstrip("/") if base_url is not None else None
+        self.retry = retry
+        self.hedge = hedge
+        self.deadline = deadline
+        self._latencies = LatencyTracker(hedge.window) if hedge is not None else None
+        self._request_executor: ThreadPoolExecutor | None = None
+        self._refresh_executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.current_weather_ttl = current_weather_ttl
+        self._current_weather_snapshot: CurrentWeatherSnapshot | None = None
+        self._current_weather_lock = threading.Lock()
+        self._forecast_flights = SingleFlight()
+        self._warning_translations: OrderedDict[tuple, Warning] = OrderedDict()
+        self._warning_translations_lock = threading.Lock()
+        self.incremental_pollen = incremental_pollen
+        self._pollen_files: dict[str, PollenFileState] = {}
+        self._pollen_flights = SingleFlight()
+        self.cache = cache
+        self.forecast_cache = forecast_cache
+
+    def close(self):
+        for executor in (self._request_executor, self._refresh_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.transport.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    """
+    Returns current weather for all stations. With revalidate=True the cached data is checked
+    against upstream even if it hasn't expired yet.
+    """
+    def get_current_weather_for_all_stations(self, revalidate: bool = False) -> list[CurrentWeather] | None:
+        logger.debug("Retrieving current weather for all stations ...")
+        snapshot = self._get_current_weather_snapshot(revalidate)
+        if snapshot is None:
+            return []
+        return list(snapshot.rows)
+
+    """
+    How the current weather data returned last was retrieved.
+    """
+    @property
+    def current_weather_provenance(self) -> Provenance:
+        snapshot = self._current_weather_snapshot
+        return snapshot.provenance if snapshot is not None else Provenance(0)
+
+    def get_current_weather_for_station(self, station: str) -> CurrentWeather | None:
+        logger.debug("Retrieving current weather...")
+        return self.get_current_weather_for_stations([station]).get(station)
+
+    """
+    Returns current weather for all given station abbreviations from a single download.
+    Stations without data map to None.
+    """
+    def get_current_weather_for_stations(self, stations: list[str]) -> dict[str, CurrentWeather | None]:
+        snapshot = self._get_current_weather_snapshot()
+        weather = {}
+        for station in stations:
+            data = None
+            if station is not None and snapshot is not None:
+                data = snapshot.stations.get(station.casefold())
+            if data is None:
+                logger.warning("Couldn't find data for station %s", station)
+            weather[station] = data
+        return weather
+
+    def _get_current_weather_snapshot(self, revalidate: bool = False) -> CurrentWeatherSnapshot | None:
+        with self._current_weather_lock:
+            snapshot = self._current_weather_snapshot
+            now = time.monotonic()
+            if snapshot is not None and now < snapshot.expires and not revalidate:
+                self.metrics.increment("cache_hits", labels={"cache": "current_weather"})
+                return snapshot
+            self.metrics.increment("cache_misses", labels={"cache": "current_weather"})
+
+            headers = {}
+            if snapshot is not None:
+                if snapshot.etag is not None:
+                    headers["If-None-Match"] = snapshot.etag
+                if snapshot.lastModified is not None:
+                    headers["If-Modified-Since"] = snapshot.lastModified
+            logger.debug("Requesting station data...")
+            response = self._fetch_cached(CURRENT_CONDITION_URL, self.current_weather_ttl, headers=headers, revalidate=revalidate)
+            if response is None:
+                # Keep serving the old snapshot, but retry on next call.
+                if snapshot is not None:
+                    snapshot.provenance |= Provenance.STALE
+                return snapshot
+
+            # The persistent cache answers with the stored payload instead of a 304.
+            unchanged = response.status == 304 or (snapshot is not None and snapshot.etag is not None
+                                                   and response.headers.get("ETag") == snapshot.etag)
+            if unchanged and snapshot is not None:
+                logger.debug("Station data not modified.")
+                snapshot.expires = now + self.current_weather_ttl
+                snapshot.provenance = response.provenance | Provenance.CACHED
+                return snapshot
+
+            with self.metrics.timer("parse", {"section": "current_weather"}):
+                weather = fastcsv.parse_current_weather(response.content, compact=self.compact)
+                if weather is None:
+                    weather = [self._get_current_data_for_row(row) for row in self._get_csv_rows(response.content)]
+            snapshot = CurrentWeatherSnapshot(
+                weather,
+                {row.station.casefold(): row for row in weather if row.station is not None},
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                now + self.current_weather_ttl,
+                response.provenance)
+            self._current_weather_snapshot = snapshot
+            return snapshot
+
+    ## Forecast
+    """
+    Returns the forecast for the post code. With lazy=True each section of the returned
+    forecast is only parsed when it's first accessed.
+    """
+    def get_forecast(self, postCode, lazy: bool = False) -> WeatherForecast | None:
+        forecastJson, provenance = self._get_forecast_json(postCode, self.language)
+        logger.debug("Forecast JSON: %s", forecastJson)
+        if forecastJson is None:
+            return None
+        if lazy:
+            forecast = LazyWeatherForecast(forecastJson, self)
+        else:
+            forecast = self._get_forecast_for_json(forecastJson)
+        forecast.provenance = provenance
+        return forecast
+
+    """
+    Returns the forecast for the post code in each of languages, by default all languages
+    MeteoSwiss offers. The forecast data is fetched and parsed once in the first language
+    and shared by all returned forecasts, only the warnings differ. Warnings translated
+    before, e.g. for another post code in the same region, are taken from memory, so other
+    languages are only requested if there are warnings that weren't seen yet. A language
+    whose warnings can't be retrieved maps to None.
+    """
+    def get_forecast_for_languages(self, postCode, languages: Iterable[str] = FORECAST_LANGUAGES) -> dict[str, WeatherForecast | None]:
+        languages = list(dict.fromkeys(languages))
+        if not languages:
+            return {}
+        forecastJson, provenance = self._get_forecast_json(postCode, languages[0])
+        if forecastJson is None:
+            return dict.fromkeys(languages)
+        forecast = self._get_forecast_for_json(forecastJson)
+        forecast.provenance = provenance
+
+        forecasts: dict[str, WeatherForecast | None] = {languages[0]: forecast}
+        for language in languages[1:]:
+            warnings, warningsProvenance = self._get_translated_warnings(postCode, language, forecast.warnings)
+            if warnings is None:
+                forecasts[language] = None
+                continue
+            translated = WeatherForecast(forecast.current, forecast.dailyForecast, forecast.hourlyForecast,
+                                         forecast.sunrise, forecast.sunset, warnings)
+            translated.provenance = provenance | warningsProvenance
+            forecasts[language] = translated
+        return forecasts
+
+    def _get_translated_warnings(self, postCode, language, warnings: list[Warning]) -> tuple[list[Warning] | None, Provenance]:
+        keys = [(language, _warning_key(warning), warning.text) for warning in warnings]
+        with self._warning_translations_lock:
+            translations = [self._warning_translations.get(key) for key in keys]
+            for key, translation in zip(keys, translations):
+                if translation is not None:
+                    self._warning_translations.move_to_end(key)
+        if None not in translations:
+            return translations, Provenance.CACHED if translations else Provenance(0)
+
+        forecastJson, provenance = self._get_forecast_json(postCode, language)
+        if forecastJson is None:
+            return None, provenance
+        # Pair warnings across languages by what they warn of, keeping their order for duplicates
+        byKey: dict[tuple, list[Warning]] = {}
+        for translation in self._get_weather_warnings(forecastJson):
+            byKey.setdefault(_warning_key(translation), []).append(translation)
+        # The responses can come from different upstream updates. Warnings missing from this
+        # language's response are kept untranslated rather than dropped.
+        translations = []
+        with self._warning_translations_lock:
+            for warning, key in zip(warnings, keys):
+                candidates = byKey.get(_warning_key(warning))
+                if not candidates:
+                    logger.debug("No %s translation for warning %s", language, key[1])
+                    translations.append(warning)
+                    continue
+                translation = candidates.pop(0)
+                translations.append(translation)
+                self._warning_translations[key] = translation
+                self._warning_translations.move_to_end(key)
+            while len(self._warning_translations) > WARNING_TRANSLATIONS:
+                self._warning_translations.popitem(last=False)
+        return translations, provenance
+
+    """
+    Returns the hourly forecast in columnar form, see swissweather.frame.ForecastFrame.
+    """
+    def get_hourly_forecast_frame(self, postCode):
+        from swissweather.frame import ForecastFrame
+
+        forecastJson, _ = self._get_forecast_json(postCode, self.language)
+        if forecastJson is None:
+            return None
+        return ForecastFrame.from_json(forecastJson)
+
+    """
+    Retrieves forecasts for many post codes in parallel on up to max_workers threads.
+    Failed lookups map to None.
+    """
+    def get_forecasts(self, postCodes: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS) -> dict[int, WeatherForecast | None]:
+        return {result.postCode: result.forecast for result in self.iter_forecasts(postCodes, max_workers)}
+
+    """
+    Like get_forecasts, but yields a ForecastResult for each post code as soon as it completes.
+    An error for one post code doesn't abort the others, it's returned in its result.
+    """
+    def iter_forecasts(self, postCodes: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[ForecastResult]:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swissweather")
+        try:
+            # Each call runs in a copy of the caller's context, which carries a retry.deadline().
+            futures = {executor.submit(contextvars.copy_context().run, self.get_forecast, postCode): postCode
+                       for postCode in dict.fromkeys(postCodes)}
+            for future in as_completed(futures):
+                postCode = futures[future]
+                try:
+                    yield ForecastResult(postCode, future.result())
+                except Exception as e:
+                    logger.error("Failed to retrieve forecast for %s", postCode, exc_info=1)
+                    yield ForecastResult(postCode, None, e)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    """
+    Requests url, retrying failures according to the retry policy. Returns None if the request
+    failed, also if the status is 400 or above unless it's in allow_status.
+    """
+    def _fetch(self, url, headers=None, allow_status=()) -> Response | None:
+        labels = {"endpoint": endpoint_for_url(url)}
+        deadlineAt = deadline_at(self.deadline)
+        attempts = self.retry.attempts if self.retry is not None else 1
+        provenance = Provenance(0)
+        response = None
+        for attempt in range(attempts):
+            if attempt > 0:
+                delay = self.retry.delay(attempt - 1)
+                if deadlineAt is not None and time.monotonic() + delay >= deadlineAt:
+                    break
+                logger.debug("Retrying %s in %.2f s", url, delay)
+                self.metrics.increment("retries", labels=labels)
+                time.sleep(delay)
+                provenance |= Provenance.RETRIED
+            try:
+                response, hedged = self._send(url, headers, labels, deadlineAt)
+            except DeadlineExceeded as _:
+                logger.error("Request to %s exceeded its deadline.", url)
+                self.metrics.increment("deadline_exceeded", labels=labels)
+                return None
+            except requests.exceptions.RequestException as _:
+                logger.error("Connection failure.", exc_info=1)
+                self.metrics.increment("connection_errors", labels=labels)
+                response = None
+                continue
+            if hedged:
+                provenance |= Provenance.HEDGED
+            if self.retry is None or response.status not in self.retry.retry_statuses:
+                break
+
+        if response is None:
+            return None
+        response.provenance = provenance
+        if response.status >= 400 and response.status not in allow_status:
+            logger.error("Request to %s failed with HTTP %d.", url, response.status)
+            return None
+        return response
+
+    """
+    Sends a single request. With a deadline or hedging it runs on the request threads, so
+    waiting for it can be given up at the deadline, and a second request is sent if it takes
+    longer than the hedging threshold. Returns the response and whether the hedge answered it.
+    """
+    def _send(self, url, headers, labels, deadlineAt) -> tuple[Response, bool]:
+        upstreamUrl = self._upstream_url(url)
+        if self.hedge is None and deadlineAt is None:
+            return self._send_once(upstreamUrl, headers, labels), False
+
+        executor = self._get_request_executor()
+        primary = executor.submit(self._send_once, upstreamUrl, headers, labels)
+        pending = {primary}
+        hedgeDelay = self._hedge_delay(labels["endpoint"])
+        if hedgeDelay is not None:
+            done, _ = wait(pending, timeout=_remaining(deadlineAt, hedgeDelay))
+            if not done and (deadlineAt is None or time.monotonic() < deadlineAt):
+                logger.debug("Hedging request to %s after %.3f s", url, hedgeDelay)
+                self.metrics.increment("hedges", labels=labels)
+                pending.add(executor.submit(self._send_once, upstreamUrl, headers, labels))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=_remaining(deadlineAt), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded()
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), future is not primary
+                error = future.exception()
+        raise error
+
+    def _send_once(self, upstreamUrl, headers, labels) -> Response:
+        start = time.perf_counter()
+        response = self.transport.get(upstreamUrl, headers=headers)
+        duration = time.perf_counter() - start
+        self._record_response(response, duration, labels)
+        if self._latencies is not None:
+            self._latencies.add(labels["endpoint"], duration)
+        return response
+
+    def _hedge_delay(self, endpoint: str) -> float | None:
+        if self.hedge is None:
+            return None
+        latency = self._latencies.percentile(endpoint, self.hedge.percentile, self.hedge.min_samples)
+        if latency is None:
+            return None
+        return max(latency, self.hedge.min_delay)
+
+    def _get_request_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._request_executor is None:
+                self._request_executor = ThreadPoolExecutor(max_workers=DEFAULT_REQUEST_THREADS,
+                                                            thread_name_prefix="swissweather-request")
+            return self._request_executor
+
+    # Separate from the request threads, refreshes wait for requests running on those.
+    def _get_refresh_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=DEFAULT_REFRESH_THREADS,
+                                                            thread_name_prefix="swissweather-refresh")
+            return self._refresh_executor
+
+    def _upstream_url(self, url: str) -> str:
+        if self.base_url is None:
+            return url
+        parts = urlsplit(url)
+        return self.base_url + parts.path + ("?" + parts.query if parts.query else "")
+
+    # Transports can't tell DNS lookup and connecting apart from waiting for the response, so
+    # the time until the headers arrived is reported as a whole.
+    def _record_response(self, response: Response, duration: float, labels: dict[str, str]):
+        self.metrics.observe("request", duration, labels)
+        if response.elapsed is not None:
+            self.metrics.observe("request_wait", response.elapsed, labels)
+            self.metrics.observe("request_download", max(0.0, duration - response.elapsed), labels)
+        self.metrics.increment("bytes_received", len(response.content), labels)
+        self.metrics.increment("responses", labels=dict(labels, status=str(response.status)))
+
+    """
+    Like _fetch, but goes through the persistent cache if there is one. A stored response
+    younger than ttl seconds is returned without going to the network, an older one is
+    revalidated with a conditional request (also a fresh one with revalidate=True). If the
+    network request fails, a stored response is returned even if it's expired.
+    """
+    def _fetch_cached(self, url, ttl, headers=None, key=None, revalidate=False) -> Response | None:
+        if self.cache is None:
+            return self._fetch(url, headers=headers)
+
+        key = key if key is not None else url
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh() and not revalidate:
+            logger.debug("Using cached response for %s", key)
+            self.metrics.increment("cache_hits", labels={"cache": "persistent"})
+            return self._response_for_entry(url, entry, Provenance.CACHED)
+        self.metrics.increment("cache_misses", labels={"cache": "persistent"})
+
+        headers = dict(headers or {})
+        if entry is not None:
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.lastModified is not None:
+                headers["If-Modified-Since"] = entry.lastModified
+        response = self._fetch(url, headers=headers)
+        if response is None:
+            return self._response_for_entry(url, entry, Provenance.CACHED | Provenance.STALE) if entry is not None else None
+
+        if response.status == 304 and entry is not None:
+            entry.expires = time.time() + ttl
+            self.cache.set(entry)
+            return self._response_for_entry(url, entry, response.provenance | Provenance.CACHED)
+
+        if response.status == 200:
+            self.cache.set(CacheEntry(key, response.content, response.headers.get("ETag"),
+                                      response.headers.get("Last-Modified"), time.time() + ttl))
+        return response
+
+    def _response_for_entry(self, url, entry: CacheEntry, provenance: Provenance) -> Response:
+        headers = {}
+        if entry.etag is not None:
+            headers["ETag"] = entry.etag
+        if entry.lastModified is not None:
+            headers["Last-Modified"] = entry.lastModified
+        return Response(url, 200, entry.content, headers, provenance=provenance)
+
+    def _get_csv_dictionary_for_url(self, url, encoding='utf-8', ttl=0):
+        logger.debug("Requesting station data...")
+        response = self._fetch_cached(url, ttl)
+        if response is None:
+            return
+        yield from self._get_csv_rows(response.content, encoding)
+
+    def _get_csv_rows(self, content, encoding='utf-8'):
+        return csv.DictReader(content.decode(encoding).splitlines(), delimiter=';')
+
+    # Returns the decoded forecast or None, and its provenance. Concurrent requests for the
+    # same post code and language share a single upstream request.
+    def _get_forecast_json(self, postCode, language) -> tuple[object | None, Provenance]:
+        key = (int(postCode), language)
+        if self.forecast_cache is not None:
+            entry = self.forecast_cache.get(key)
+            if entry is not None and self.forecast_cache.is_fresh(entry):
+                self.metrics.increment("cache_hits", labels={"cache": "forecast"})
+                return entry.forecastJson, Provenance.CACHED
+            if entry is not None and self.forecast_cache.is_usable(entry):
+                self.metrics.increment("cache_stale_hits", labels={"cache": "forecast"})
+                if self.forecast_cache.start_refresh(key):
+                    self._get_refresh_executor().submit(self._refresh_forecast_json, key, postCode, language)
+                return entry.forecastJson, Provenance.CACHED | Provenance.STALE
+            self.metrics.increment("cache_misses", labels={"cache": "forecast"})
+        return self._forecast_flights.do(key, self._request_forecast_json, postCode, language)
+
+    def _refresh_forecast_json(self, key, postCode, language):
+        try:
+            self._forecast_flights.do(key, self._request_forecast_json, postCode, language)
+        except Exception as _:
+            logger.error("Failed to refresh forecast for %s", postCode, exc_info=1)
+            self.metrics.increment("errors_swallowed", labels={"section": "forecast_refresh"})
+        finally:
+            self.forecast_cache.finish_refresh(key)
+
+    def _request_forecast_json(self, postCode, language):
+        url = FORECAST_URL.format(int(postCode))
+        logger.debug("Requesting forecast data from %s...", url)
+        headers = { "User-Agent": FORECAST_USER_AGENT,
+                    "Accept-Language": language,
+                    "Accept": "application/json" }
+        key = (int(postCode), language)
+        entry = self.forecast_cache.get(key) if self.forecast_cache is not None else None
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.lastModified is not None:
+                headers["If-Modified-Since"] = entry.lastModified
+
+        # The response depends on the language, so it's part of the cache key.
+        response = self._fetch_cached(url, FORECAST_TTL, key=f"{url}#{language}", headers=headers)
+        if response is None:
+            if entry is not None:
+                # Better an expired forecast than none.
+                return entry.forecastJson, Provenance.CACHED | Provenance.STALE
+            return None, Provenance(0)
+        if response.status == 304 and entry is not None:
+            self.forecast_cache.renew(key, response.headers)
+            return entry.forecastJson, response.provenance | Provenance.CACHED
+        try:
+            with self.metrics.timer("decode", {"endpoint": "forecast"}):
+                forecastJson = self.decoder.decode_forecast(response.content)
+        except ValueError as _:
+            logger.error("Failed to decode forecast data.", exc_info=1)
+            return None, Provenance(0)
+        if self.forecast_cache is not None:
+            self.forecast_cache.set(key, forecastJson, response.headers)
+        return forecastJson, response.provenance
+
+    """
+    Retrieves the SwissMetNet stations, which report the current weather.
+    """
+    def get_smn_station_list(self) -> list[StationInfo] | None:
+        station_list = self._get_csv_dictionary_for_url(SMN_STATIONS_URL, encoding='latin-1', ttl=STATIONS_TTL)
+        return self._get_stations_for_rows(station_list)
+
+    def get_pollen_station_list(self) -> list[StationInfo]:
+        station_list = self._get_csv_dictionary_for_url(POLLEN_STATIONS_URL, encoding='latin-1', ttl=POLLEN_STATIONS_TTL)
+        return self._get_stations_for_rows(station_list)
+
     def get_current_pollen_for_station(self, stationAbbrev: str) -> CurrentPollen | None:
         url = POLLEN_DATA_URL.format(stationAbbrev.lower(), stationAbbrev.lower())
-        print("Loading " + url)
-        pollen_csv = self._get_csv_dictionary_for_url(url, encoding='latin-1')
-        pollen_data = []
-        for row in pollen_csv:
-            pollen_data.append(CurrentPollen(
-                row["station_abbr"],
-                datetime.strptime(row["reference_timestamp"], '%d.%m.%Y %H:%M').replace(tzinfo=UTC),
-                (to_float(row.get("kabetuh0")), 'No/m3'),
-                (to_float(row.get("khpoach0")), 'No/m3'),
-                (to_float(row.get("kaalnuh0")), 'No/m3'),
-                (to_float(row.get("kacoryh0")), 'No/m3'),
-                (to_float(row.get("kafaguh0")), 'No/m3'),
-                (to_float(row.get("kafraxh0")), 'No/m3'),
-                (to_float(row.get("kaquerh0")), 'No/m3')
-            ))
-        pollen_data.sort(key = lambda x: x.timestamp, reverse=True)
-        if len(pollen_data) > 0:
-            return pollen_data[0]
+        if self.incremental_pollen:
+            return self._pollen_flights.do(url, self._get_current_pollen_incremental, url)
+        response = self._fetch_cached(url, POLLEN_DATA_TTL)
+        if response is None:
+            return None
+        return self._get_current_pollen_for_content(response.content)
+
+    """
+    Retrieves current pollen data for all pollen stations in parallel on up to max_workers threads.
+    """
+    def get_current_pollen_for_all_stations(self, max_workers: int = DEFAULT_MAX_WORKERS) -> dict[str, CurrentPollen | None] | None:
+        stations = self.get_pollen_station_list()
+        if stations is None:
+            return None
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swissweather") as executor:
+            futures = {station.abbreviation: executor.submit(contextvars.copy_context().run,
+                                                             self.get_current_pollen_for_station, station.abbreviation)
+                       for station in stations}
+            pollen = {}
+            for abbreviation, future in futures.items():
+                try:
+                    pollen[abbreviation] = future.result()
+                except Exception as _:
+                    logger.error("Failed to retrieve pollen for %s", abbreviation, exc_info=1)
+                    pollen[abbreviation] = None
+            return pollen
+
+    @_timed_section("pollen")
+    def _get_current_pollen_for_content(self, content: bytes) -> CurrentPollen | None:
+        pollen = fastcsv.parse_latest_pollen(content, compact=self.compact)
+        if pollen is None:
+            pollen = self._get_current_pollen_for_rows(self._get_csv_rows(content, encoding='latin-1'))
+        return pollen
+
+    def _get_current_pollen_incremental(self, url) -> CurrentPollen | None:
+        state = self._pollen_files.get(url)
+        headers = None
+        if state is not None:
+            # No If-Range: appending rows changes the validator, so the server would send all of it.
+            # The overlap with what we've seen tells us whether the file was rewritten instead.
+            headers = { "Range": f"bytes={state.offset - len(state.tail)}-" }
+        response = self._fetch(url, headers=headers, allow_status=(416,))
+        if response is None:
+            return None
+
+        if state is not None and response.status == 206 and _continues(response, state):
+            # Rows after the last newline might still be incomplete, they're picked up next time.
+            content = response.content[len(state.tail):]
+            end = content.rfind(b"\n") + 1
+            if end > 0:
+                pollen = self._get_current_pollen_for_content(state.header + b"\n" + content[:end])
+                if pollen is not None and (state.latest is None or pollen.timestamp > state.latest.timestamp):
+                    state.latest = pollen
+                state.offset += end
+                state.tail = (state.tail + content[:end])[-POLLEN_OVERLAP:]
+            else:
+                logger.debug("No new pollen data in %s", url)
+            return state.latest
+
+        if response.status != 200:
+            # The file was rewritten or shortened (416), drop the state and start over.
+            self._pollen_files.pop(url, None)
+            return self._get_current_pollen_incremental(url) if state is not None else None
+
+        content = response.content
+        pollen = self._get_current_pollen_for_content(content)
+        offset = content.rfind(b"\n") + 1
+        self._pollen_files[url] = PollenFileState(content.split(b"\n", 1)[0].rstrip(b"\r"), offset,
+                                                  content[max(0, offset - POLLEN_OVERLAP):offset], pollen)
+        return pollen
+
+def _remaining(deadlineAt: float | None, limit: float | None = None) -> float | None:
+    if deadlineAt is None:
+        return limit
+    remaining = max(0.0, deadlineAt - time.monotonic())
+    return remaining if limit is None else min(remaining, limit)
+
+def _content_range(response: Response) -> tuple[int, int | None] | None:
+    # Content-Range: bytes 1234-5678/5679, the total can be *
+    contentRange = response.headers.get("Content-Range", "")
+    try:
+        byteRange, total = contentRange.split(" ", 1)[1].split("/", 1)
+        return int(byteRange.split("-", 1)[0]), None if total == "*" else int(total)
+    except (IndexError, ValueError):
         return None
+
+def _continues(response: Response, state: PollenFileState) -> bool:
+    # Whether a partial response continues the file we've seen so far
+    contentRange = _content_range(response)
+    if contentRange is None:
+        return False
+    start, total = contentRange
+    return (start == state.offset - len(state.tail) and (total is None or total >= state.offset) and
+            response.content.startswith(state.tail))
@@ -0,0 +1,159 @@
+"""
+Instrumentation hooks of the clients.
+
+Clients report timings through Metrics.observe() and counts through Metrics.increment().
+The default Metrics does nothing; MetricsAggregator keeps the totals in process and
+format_prometheus() renders them in the Prometheus text exposition format.
+
+Timings reported by MeteoClient, in seconds:
+    request              whole HTTP request, labels endpoint
+    request_wait         until response headers arrived, including connecting, labels endpoint
+    request_download     reading the response body, labels endpoint
+    decode               JSON decoding, labels endpoint
+    parse                converting decoded data to results, labels section
+
+Counters reported by MeteoClient:
+    bytes_received       response body bytes after decompression, not bytes on the wire, labels endpoint
+    responses            HTTP responses, labels endpoint and status
+    connection_errors    failed requests, labels endpoint
+    retries              requests sent again after a failure, labels endpoint
+    hedges               hedged requests sent, labels endpoint
+    deadline_exceeded    requests given up at their deadline, labels endpoint
+    cache_hits / cache_misses    labels cache (persistent, forecast, current_weather)
+    cache_stale_hits     stale forecasts served while refreshing, labels cache
+    errors_swallowed     items skipped because they couldn't be parsed, labels section
+"""
+
+from contextlib import contextmanager
+import math
+import re
+import threading
+import time
+from typing import Iterator, Mapping
+
+Labels = Mapping[str, str] | None
+
+class Metrics(object):
+    """
+    Receives measurements from a client. This base class discards them.
+    """
+    def observe(self, name: str, value: float, labels: Labels = None):
+        pass
+
+    def increment(self, name: str, value: float = 1, labels: Labels = None):
+        pass
+
+    @contextmanager
+    def timer(self, name: str, labels: Labels = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+NOOP_METRICS = Metrics()
+
+def _key(name: str, labels: Labels) -> tuple[str, tuple[tuple[str, str], ...]]:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items())) if labels else ()
+
+class Summary(object):
+    __slots__ = ("count", "sum", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+class MetricsAggregator(Metrics):
+    """
+    Keeps counters and count/sum/max summaries of observations per name and labels.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.summaries: dict[tuple[str, tuple], Summary] = {}
+
+    def observe(self, name: str, value: float, labels: Labels = None):
+        key = _key(name, labels)
+        with self._lock:
+            summary = self.summaries.get(key)
+            if summary is None:
+                summary = self.summaries[key] = Summary()
+            summary.add(value)
+
+    def increment(self, name: str, value: float = 1, labels: Labels = None):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name: str, labels: Labels = None) -> float:
+        return self.counters.get(_key(name, labels), 0)
+
+    def summary(self, name: str, labels: Labels = None) -> Summary | None:
+        return self.summaries.get(_key(name, labels))
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.summaries = {}
+
+_INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_]")
+
+def _metric_name(prefix: str, name: str) -> str:
+    return _INVALID_NAME_CHARACTERS.sub("_", prefix + name)
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{_INVALID_NAME_CHARACTERS.sub("_", key)}="{value}"'
+                          for (key, _), value in zip(labels, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    # Exact, so rate() over large counters doesn't lose increments to rounding
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+def format_prometheus(aggregator: MetricsAggregator, prefix: str = "swissweather_") -> str:
+    """
+    Renders the aggregated metrics in the Prometheus text format. Counters become counters
+    with a _total suffix, observations summaries with _count and _sum plus a _max gauge.
+    """
+    with aggregator._lock:
+        counters = sorted(aggregator.counters.items())
+        summaries = sorted((key, (summary.count, summary.sum, summary.max)) for key, summary in aggregator.summaries.items())
+
+    lines = []
+    lastName = None
+    for (name, labels), value in counters:
+        metric = _metric_name(prefix, name) + "_total"
+        if metric != lastName:
+            lines.append(f"# TYPE {metric} counter")
+            lastName = metric
+        lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), (count, total, maximum) in summaries:
+        metric = _metric_name(prefix, name)
+        if metric != lastName:
+            lines.append(f"# TYPE {metric} summary")
+            lastName = metric
+        lines.append(f"{metric}_count{_format_labels(labels)} {_format_value(count)}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(total)}")
+    for (name, labels), (count, total, maximum) in summaries:
+        metric = _metric_name(prefix, name) + "_max"
+        if metric != lastName:
+            lines.append(f"# TYPE {metric} gauge")
+            lastName = metric
+        lines.append(f"{metric}{_format_labels(labels)} {_format_value(maximum)}")
+    return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,108 @@
+"""
+Retries, hedged requests and deadlines for MeteoClient requests.
+
+    client = MeteoClient(retry=RetryPolicy(attempts=3), hedge=HedgePolicy(percentile=0.95), deadline=10)
+
+    # Tighter deadline for some calls, also applies to the requests of bulk calls
+    with deadline(2.0):
+        forecasts = client.get_forecasts(postCodes)
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntFlag
+import math
+import random
+import threading
+import time
+from typing import Iterator
+
+class Provenance(IntFlag):
+    """
+    How a result was obtained. No flags set means it was fetched with the first request.
+    """
+    CACHED = 1 # Served from a cache without downloading it again
+    STALE = 2 # Expired data, served because upstream failed or while it's refreshed
+    RETRIED = 4 # Fetched after at least one failed attempt
+    HEDGED = 8 # Answered by a hedged request
+
+class DeadlineExceeded(Exception):
+    pass
+
+_deadline: ContextVar[float | None] = ContextVar("swissweather_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Limits the total time of the requests made within the block, including retries. Nested
+    deadlines can only shorten the outer one.
+    """
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def deadline_at(default: float | None = None) -> float | None:
+    """
+    Returns the time.monotonic() time at which requests started now have to be done,
+    from the deadline() block or else default seconds from now. None means no limit.
+    """
+    at = _deadline.get()
+    if default is not None:
+        at = time.monotonic() + default if at is None else min(at, time.monotonic() + default)
+    return at
+
+@dataclass
+class RetryPolicy:
+    """
+    Failed requests are retried up to attempts - 1 times. Connection failures, timeouts and
+    retry_statuses responses are retried. Attempt n waits a random time of up to
+    backoff * 2 ** n seconds (at most max_backoff) before it's sent.
+    """
+    attempts: int = 3
+    backoff: float = 0.2
+    max_backoff: float = 5.0
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+@dataclass
+class HedgePolicy:
+    """
+    If a request takes longer than the given latency percentile of recent requests to the same
+    endpoint, a second identical request is sent and whichever answers first is used. Hedging
+    starts once min_samples latencies are known and never happens earlier than min_delay.
+    """
+    percentile: float = 0.95
+    min_samples: int = 20
+    min_delay: float = 0.05
+    window: int = 200 # Number of recent latencies kept per endpoint
+
+class LatencyTracker(object):
+    """
+    Keeps the most recent latencies per endpoint.
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, latency: float):
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def percentile(self, endpoint: str, percentile: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, max(0, math.ceil(percentile * len(latencies)) - 1))]
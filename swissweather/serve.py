@@ -0,0 +1,394 @@
+"""
+Caching proxy which lets many local clients share the MeteoSwiss data.
+
+    python -m swissweather.serve --host 127.0.0.1 --port 8080
+
+Each upstream file is fetched at most once per interval: concurrent requests for it wait for
+the same upstream request, and it's then served from memory with an ETag until it expires.
+
+Two kinds of paths are served:
+
+MeteoSwiss paths return the upstream payloads, so MeteoClient(base_url="http://127.0.0.1:8080")
+works unchanged against the proxy:
+
+    /ch.meteoschweiz.messwerte-aktuell/VQHA80.csv
+    /ch.meteoschweiz.ogd-smn/ogd-smn_meta_stations.csv
+    /ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv
+    /ch.meteoschweiz.ogd-pollen/<station>/ogd-pollen_<station>_d_recent.csv
+    /v1/plzDetail?plz=<post code> (language from Accept-Language)
+
+/api paths return the parsed results as JSON:
+
+    /api/current                  current weather of all stations
+    /api/current/<station>
+    /api/forecast/<post code>     ?language=de
+    /api/pollen/<station>
+    /api/stations/smn
+    /api/stations/pollen
+
+With ?format=compact, measurements are plain values and their units are listed once in
+"units" next to the "data".
+"""
+
+import argparse
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields, is_dataclass
+from datetime import datetime
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import re
+import threading
+import time
+import typing
+from typing import Any, Callable, Hashable, Mapping
+from urllib.parse import parse_qs, urlsplit
+
+from swissweather import fastcsv
+from swissweather.meteo import (CURRENT_CONDITION_URL, FORECAST_TTL, FORECAST_URL, FORECAST_USER_AGENT,
+                                POLLEN_DATA_TTL, POLLEN_DATA_URL, POLLEN_STATIONS_URL, SMN_STATIONS_URL,
+                                STATIONS_TTL, FloatValue, MeteoClient)
+from swissweather.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_ENTRIES = 4096
+LANGUAGES = ("en", "de", "fr", "it")
+
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+LATIN1_CSV_CONTENT_TYPE = "text/csv; charset=iso-8859-1"
+JSON_CONTENT_TYPE = "application/json"
+
+_STATION_PATTERN = re.compile(r"^[A-Za-z0-9]{1,8}$")
+_POLLEN_DATA_PATH = re.compile(r"^/ch\.meteoschweiz\.ogd-pollen/([a-z0-9]{1,8})/ogd-pollen_([a-z0-9]{1,8})_d_recent\.csv$")
+_RANGE_PATTERN = re.compile(r"^bytes=(\d+)-$")
+
+@dataclass
+class CachedResource:
+    status: int # 200, or 404 if upstream didn't have it
+    content: bytes
+    contentType: str
+    etag: str # Derived from the content, independent of upstream
+    upstreamEtag: str | None
+    upstreamLastModified: str | None
+    expires: float # Clock time after which upstream is asked again
+    views: dict[Hashable, bytes] = field(default_factory=dict) # Rendered /api responses
+
+def _etag(content: bytes) -> str:
+    return '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+def _is_float_value(fieldType) -> bool:
+    return fieldType is FloatValue or FloatValue in typing.get_args(fieldType)
+
+def to_json_value(value: Any, units: dict[str, str] | None = None) -> Any:
+    """
+    Converts results to JSON compatible values. Measurements are [value, unit] lists, or
+    just the value if units is given, which then collects the unit of each field.
+    """
+    if is_dataclass(value):
+        result = {}
+        for dataclassField in fields(value):
+            item = getattr(value, dataclassField.name)
+            if units is not None and item is not None and _is_float_value(dataclassField.type):
+                units[dataclassField.name] = item[1]
+                item = item[0]
+            result[dataclassField.name] = to_json_value(item, units)
+        return result
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item, units) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class ProxyServer(ThreadingHTTPServer):
+    """
+    HTTP server fetching upstream data through client, by default a new MeteoClient.
+    Use port 0 to pick a free port. Beyond max_entries, the least recently used
+    files are dropped.
+    """
+    daemon_threads = True
+
+    def __init__(self, client: MeteoClient | None = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        super().__init__((host, port), _ProxyHandler)
+        self.client = client if client is not None else MeteoClient()
+        self.max_entries = max_entries
+        self.clock = clock
+        self._resources: OrderedDict[Hashable, CachedResource] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> "ProxyServer":
+        # A short poll interval keeps stop() quick.
+        threading.Thread(target=self.serve_forever, args=(0.1,), name="swissweather-serve", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    ## Upstream
+
+    """
+    Returns the cached upstream file, fetching it first if it's missing or expired. Returns
+    None if upstream failed and nothing is cached. Expired files are served if upstream fails.
+    """
+    def get_resource(self, key: Hashable, url: str, ttl: float, contentType: str,
+                     headers: dict[str, str] | None = None) -> CachedResource | None:
+        with self._lock:
+            resource = self._resources.get(key)
+            if resource is not None:
+                self._resources.move_to_end(key)
+                if self.clock() < resource.expires:
+                    return resource
+        return self._flights.do(key, self._refresh_resource, key, url, ttl, contentType, headers)
+
+    def _refresh_resource(self, key, url, ttl, contentType, headers) -> CachedResource | None:
+        with self._lock:
+            resource = self._resources.get(key)
+        # Another request might have refreshed it just before this one got its turn.
+        if resource is not None and self.clock() < resource.expires:
+            return resource
+
+        headers = dict(headers or {})
+        if resource is not None and resource.status == 200:
+            if resource.upstreamEtag is not None:
+                headers["If-None-Match"] = resource.upstreamEtag
+            if resource.upstreamLastModified is not None:
+                headers["If-Modified-Since"] = resource.upstreamLastModified
+        response = self.client._fetch(url, headers=headers, allow_status=(404,))
+        if response is None:
+            return resource
+
+        if response.status == 304 and resource is not None:
+            resource.expires = self.clock() + ttl
+            return resource
+        if response.status not in (200, 404):
+            logger.error("Unexpected HTTP %d from %s", response.status, url)
+            return resource
+
+        content = response.content if response.status == 200 else b""
+        resource = CachedResource(response.status, content, contentType, _etag(content),
+                                  response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                  self.clock() + ttl)
+        with self._lock:
+            self._resources[key] = resource
+            self._resources.move_to_end(key)
+            while len(self._resources) > self.max_entries:
+                self._resources.popitem(last=False)
+        return resource
+
+    def _get_forecast_resource(self, postCode: int, language: str) -> CachedResource | None:
+        return self.get_resource(("forecast", postCode, language), FORECAST_URL.format(postCode), FORECAST_TTL,
+                                 JSON_CONTENT_TYPE, { "User-Agent": FORECAST_USER_AGENT,
+                                                      "Accept-Language": language,
+                                                      "Accept": "application/json" })
+
+    def _get_pollen_resource(self, station: str) -> CachedResource | None:
+        station = station.lower()
+        return self.get_resource(("pollen", station), POLLEN_DATA_URL.format(station, station), POLLEN_DATA_TTL,
+                                 LATIN1_CSV_CONTENT_TYPE)
+
+    def _get_current_resource(self) -> CachedResource | None:
+        return self.get_resource("current", CURRENT_CONDITION_URL, self.client.current_weather_ttl, CSV_CONTENT_TYPE)
+
+    def _get_stations_resource(self, url: str) -> CachedResource | None:
+        return self.get_resource(url, url, STATIONS_TTL, LATIN1_CSV_CONTENT_TYPE)
+
+    ## Requests
+
+    """
+    Handles a GET request and returns the status, response headers and body.
+    """
+    def handle_get(self, target: str, headers: Mapping[str, str]) -> tuple[int, dict[str, str], bytes]:
+        parts = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        if parts.path.startswith("/api/"):
+            return self._handle_api(parts.path, query, headers)
+        return self._handle_mirror(parts.path, query, headers)
+
+    def _language(self, requested: str | None) -> str | None:
+        if requested is None:
+            return self.client.language
+        requested = requested.split(",")[0].split(";")[0].split("-")[0].strip().lower()
+        return requested if requested in LANGUAGES else None
+
+    def _handle_mirror(self, path: str, query: dict[str, str], headers: Mapping[str, str]):
+        if path == urlsplit(CURRENT_CONDITION_URL).path:
+            resource = self._get_current_resource()
+        elif path == urlsplit(SMN_STATIONS_URL).path:
+            resource = self._get_stations_resource(SMN_STATIONS_URL)
+        elif path == urlsplit(POLLEN_STATIONS_URL).path:
+            resource = self._get_stations_resource(POLLEN_STATIONS_URL)
+        elif path == urlsplit(FORECAST_URL).path:
+            postCode = _to_post_code(query.get("plz"))
+            language = self._language(headers.get("Accept-Language"))
+            if postCode is None or language is None:
+                return _error(400)
+            resource = self._get_forecast_resource(postCode, language)
+        else:
+            match = _POLLEN_DATA_PATH.match(path)
+            if match is None or match.group(1) != match.group(2):
+                return _error(404)
+            resource = self._get_pollen_resource(match.group(1))
+        return self._respond(resource, headers)
+
+    def _handle_api(self, path: str, query: dict[str, str], headers: Mapping[str, str]):
+        compact = query.get("format") == "compact"
+        segments = path[len("/api/"):].strip("/").split("/")
+        view: tuple = tuple(segments)
+        if segments == ["current"]:
+            resource = self._get_current_resource()
+            render = lambda content: self._parse_current_weather(content)
+        elif len(segments) == 2 and segments[0] == "current" and _STATION_PATTERN.match(segments[1]):
+            resource = self._get_current_resource()
+            station = segments[1].casefold()
+            render = lambda content: next((weather for weather in self._parse_current_weather(content)
+                                           if weather.station is not None and weather.station.casefold() == station), None)
+        elif len(segments) == 2 and segments[0] == "forecast" and _to_post_code(segments[1]) is not None:
+            language = self._language(query.get("language", headers.get("Accept-Language")))
+            if language is None:
+                return _error(400)
+            resource = self._get_forecast_resource(_to_post_code(segments[1]), language)
+            render = lambda content: self.client._get_forecast_for_json(self.client.decoder.decode_forecast(content))
+        elif len(segments) == 2 and segments[0] == "pollen" and _STATION_PATTERN.match(segments[1]):
+            resource = self._get_pollen_resource(segments[1])
+            render = self.client._get_current_pollen_for_content
+        elif segments == ["stations", "smn"] or segments == ["stations", "pollen"]:
+            resource = self._get_stations_resource(SMN_STATIONS_URL if segments[1] == "smn" else POLLEN_STATIONS_URL)
+            render = lambda content: self.client._get_stations_for_rows(self.client._get_csv_rows(content, encoding='latin-1'))
+        else:
+            return _error(404)
+
+        if resource is None:
+            return _error(502)
+        if resource.status != 200:
+            return _error(resource.status)
+
+        # Results are rendered once per upstream file, view and format.
+        key = (view, compact)
+        body = resource.views.get(key)
+        if body is None:
+            try:
+                result = render(resource.content)
+            except ValueError as _:
+                logger.error("Failed to parse upstream data for %s", path, exc_info=1)
+                return _error(502)
+            if result is None:
+                return _error(404)
+            units = {} if compact else None
+            data = to_json_value(result, units)
+            body = json.dumps({"units": units, "data": data} if compact else data,
+                              ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+            resource.views[key] = body
+        return self._respond_body(resource, body, JSON_CONTENT_TYPE, headers, _etag(resource.etag.encode('ascii') + repr(key).encode('utf-8')))
+
+    def _respond(self, resource: CachedResource | None, headers: Mapping[str, str]):
+        if resource is None:
+            return _error(502)
+        if resource.status != 200:
+            return _error(resource.status)
+
+        # Incremental pollen clients only ask for the bytes appended since their last request.
+        # With If-Range, a range is only served from the same version of the file.
+        match = _RANGE_PATTERN.match(headers.get("Range") or "")
+        if match is not None and headers.get("If-Range", resource.etag) == resource.etag:
+            start = int(match.group(1))
+            size = len(resource.content)
+            if start >= size:
+                return 416, {"Content-Range": f"bytes */{size}", "ETag": resource.etag}, b""
+            status, responseHeaders, body = self._respond_body(resource, resource.content[start:], resource.contentType, {}, resource.etag)
+            responseHeaders["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+            return 206, responseHeaders, body
+        return self._respond_body(resource, resource.content, resource.contentType, headers, resource.etag)
+
+    def _respond_body(self, resource: CachedResource, body: bytes, contentType: str, headers: Mapping[str, str], etag: str):
+        responseHeaders = {
+            "ETag": etag,
+            "Content-Type": contentType,
+            "Cache-Control": f"max-age={max(0, int(resource.expires - self.clock()))}",
+        }
+        if headers.get("If-None-Match") == etag:
+            return 304, responseHeaders, b""
+        return 200, responseHeaders, body
+
+    def _parse_current_weather(self, content: bytes):
+        weather = fastcsv.parse_current_weather(content)
+        if weather is None:
+            weather = [self.client._get_current_data_for_row(row) for row in self.client._get_csv_rows(content)]
+        return weather
+
+def _to_post_code(value: str | None) -> int | None:
+    # Post codes have four digits, the forecast API takes them padded with two zeros.
+    if value is None or not value.isdigit() or len(value) not in (4, 6):
+        return None
+    if len(value) == 6 and not value.endswith("00"):
+        return None
+    return int(value[:4])
+
+def _error(status: int) -> tuple[int, dict[str, str], bytes]:
+    return status, {"Content-Type": "text/plain; charset=utf-8"}, b""
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET requests on keep-alive connections with the status, headers and body returned
+    by get(), which subclasses implement.
+    """
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, otherwise Nagle and delayed ACKs add ~40 ms per keep-alive request.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def get(self) -> tuple[int, dict[str, str], bytes]:
+        raise NotImplementedError()
+
+    def do_GET(self):
+        try:
+            status, headers, body = self.get()
+        except Exception as _:
+            logger.error("Failed to handle %s", self.path, exc_info=1)
+            status, headers, body = _error(500)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+class _ProxyHandler(KeepAliveHandler):
+
+    def get(self) -> tuple[int, dict[str, str], bytes]:
+        return self.server.handle_get(self.path, self.headers)
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m swissweather.serve", description="Caching proxy for MeteoSwiss data.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--language", default="en", choices=LANGUAGES, help="Forecast language if the request doesn't ask for one")
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES, help="Number of upstream files kept in memory")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    server = ProxyServer(MeteoClient(language=args.language), args.host, args.port, args.max_entries)
+    logger.info("Serving on %s", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from concurrent.futures import Future
+import threading
+from typing import Any, Callable, Hashable
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+
+    Callers that arrive while a call for their key is in flight wait for it and get
+    the same result (or exception) instead of running the function again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
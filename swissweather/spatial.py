@@ -0,0 +1,135 @@
+"""
+Spatial index over stations for nearest station and radius queries.
+
+Stations are stored as points on the unit sphere in a k-d tree. The straight line (chord)
+distance between two such points grows with the great-circle distance, so the tree can be
+searched with plain euclidean distances, which are converted to kilometres for the results.
+"""
+
+import heapq
+import math
+from typing import Iterable
+
+from swissweather.meteo import StationInfo
+
+EARTH_RADIUS_KM = 6371.0088
+
+def _to_point(lat: float, lng: float) -> tuple[float, float, float]:
+    lat = math.radians(lat)
+    lng = math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+def _chord_to_km(squaredChord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squaredChord) / 2))
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Returns the great-circle distance between two WGS84 coordinates in km.
+    """
+    a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class _Tree(object):
+    """
+    Balanced k-d tree stored in flat lists: the node of the range [lo, hi) is at the middle
+    index and splits on axis depth % 3, its subtrees are [lo, mid) and [mid + 1, hi).
+    """
+    def __init__(self, stations: list[StationInfo]):
+        entries = [(_to_point(station.lat, station.lng), station) for station in stations
+                   if station.lat is not None and station.lng is not None]
+        self._build(entries, 0, len(entries), 0)
+        self.points = [point for point, _ in entries]
+        self.stations = [station for _, station in entries]
+
+    @classmethod
+    def _build(cls, entries, lo: int, hi: int, depth: int):
+        if hi - lo <= 1:
+            return
+        axis = depth % 3
+        entries[lo:hi] = sorted(entries[lo:hi], key=lambda entry: entry[0][axis])
+        mid = (lo + hi) // 2
+        cls._build(entries, lo, mid, depth + 1)
+        cls._build(entries, mid + 1, hi, depth + 1)
+
+    def nearest(self, target, k: int) -> list[tuple[float, int]]:
+        best: list[tuple[float, int]] = [] # max-heap of (-squared distance, index)
+        points = self.points
+
+        def search(lo: int, hi: int, depth: int):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = points[mid]
+            distance = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if len(best) < k:
+                heapq.heappush(best, (-distance, mid))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, mid))
+            axis = depth % 3
+            diff = target[axis] - point[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            search(near[0], near[1], depth + 1)
+            if len(best) < k or diff * diff < -best[0][0]:
+                search(far[0], far[1], depth + 1)
+
+        search(0, len(points), 0)
+        return sorted((-distance, index) for distance, index in best)
+
+    def within(self, target, radius: float) -> list[tuple[float, int]]:
+        found = []
+        points = self.points
+        limit = radius * radius
+
+        def search(lo: int, hi: int, depth: int):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = points[mid]
+            distance = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if distance <= limit:
+                found.append((distance, mid))
+            axis = depth % 3
+            diff = target[axis] - point[axis]
+            if diff <= radius:
+                search(lo, mid, depth + 1)
+            if diff >= -radius:
+                search(mid + 1, hi, depth + 1)
+
+        search(0, len(points), 0)
+        return sorted(found)
+
+class StationIndex(object):
+    """
+    Answers nearest station and radius queries over any set of stations, e.g. the SwissMetNet
+    stations from get_smn_station_list() together with the pollen stations from
+    get_pollen_station_list(). Stations without coordinates are left out.
+
+    Results are (station, distance in km) tuples ordered by distance. rebuild() replaces the
+    indexed stations, while queries running concurrently keep using the previous tree.
+    """
+    def __init__(self, stations: Iterable[StationInfo] = ()):
+        self.rebuild(stations)
+
+    def rebuild(self, stations: Iterable[StationInfo]):
+        self._tree = _Tree(list(stations))
+
+    def __len__(self) -> int:
+        return len(self._tree.stations)
+
+    def nearest_stations(self, lat: float, lng: float, k: int = 1) -> list[tuple[StationInfo, float]]:
+        tree = self._tree
+        if k <= 0:
+            return []
+        return [(tree.stations[index], _chord_to_km(distance))
+                for distance, index in tree.nearest(_to_point(lat, lng), k)]
+
+    def stations_within(self, lat: float, lng: float, radius_km: float) -> list[tuple[StationInfo, float]]:
+        tree = self._tree
+        if radius_km < 0:
+            return []
+        return [(tree.stations[index], _chord_to_km(distance))
+                for distance, index in tree.within(_to_point(lat, lng), _km_to_chord(radius_km))]
@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from swissweather.retry import Provenance
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+# MeteoClient talks to two hosts (data.geo.admin.ch and app-prod-ws.meteoswiss-app.ch)
+DEFAULT_POOL_HOSTS = 4
+DEFAULT_POOL_CONNECTIONS_PER_HOST = 10
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    content: bytes
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    elapsed: float | None = None # Seconds until the response headers arrived, if known
+    provenance: Provenance = Provenance(0) # Set by MeteoClient
+
+    def __post_init__(self):
+        if not isinstance(self.headers, CaseInsensitiveDict):
+            self.headers = CaseInsensitiveDict(self.headers or {})
+
+class Transport(object):
+    """
+    Performs HTTP GET requests for MeteoClient.
+
+    Implementations return the fully read response (with any content encoding already removed)
+    and raise requests.exceptions.RequestException subclasses on connection failures and timeouts.
+    """
+    def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+class RequestsTransport(Transport):
+    """
+    Transport backed by a pooled keep-alive requests.Session.
+
+    At most connections_per_host sockets are opened to each host; further concurrent requests
+    wait for a pooled connection to free up instead of opening new ones.
+    """
+    def __init__(self, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_hosts: int = DEFAULT_POOL_HOSTS,
+                 connections_per_host: int = DEFAULT_POOL_CONNECTIONS_PER_HOST):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=connections_per_host, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        with self.session.get(url, headers=headers, timeout=self.timeout) as r:
+            return Response(url, r.status_code, r.content, r.headers, r.elapsed.total_seconds())
+
+    def close(self):
+        self.session.close()
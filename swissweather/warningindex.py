@@ -0,0 +1,192 @@
+"""
+In-memory index of the weather warnings of many post codes.
+
+Forecasts of neighbouring post codes mostly carry the same regional warnings. WarningsIndex
+keeps each distinct warning once, with the set of post codes it applies to, and indexes it by
+type, level, validity and post code, so questions like "which post codes have an active
+forest fire warning of at least significant hazard" are answered without scanning forecasts:
+
+    index = WarningsIndex()
+    for result in client.iter_forecasts(postCodes):
+        index.update_from_result(result)
+
+    for entry in index.query(WarningType.FOREST_FIRES, min_level=WarningLevel.SIGNIFICANT_HAZARD,
+                             at=datetime.now(UTC)):
+        notify(entry.postCodes, entry.warning)
+
+Updating a post code returns a WarningChange with its new and cleared warnings, or pass the
+index to a WarningsWatcher to keep it current.
+"""
+
+from bisect import bisect_right, insort
+from dataclasses import dataclass
+from datetime import UTC, datetime
+import threading
+from typing import Iterable
+
+from swissweather.meteo import ForecastResult, Warning, WarningLevel, WarningType
+
+# Warnings without validFrom are valid since forever, without validTo until further notice
+_NO_START = datetime.min.replace(tzinfo=UTC)
+_NO_END = datetime.max.replace(tzinfo=UTC)
+
+WarningKey = tuple
+
+@dataclass
+class WarningChange:
+    postCode: int
+    added: list[Warning]
+    cleared: list[Warning]
+
+def warning_key(warning: Warning) -> WarningKey:
+    """
+    Identifies equal warnings, Warning itself isn't hashable.
+    """
+    return (warning.warningType, warning.warningLevel, warning.outlook, warning.validFrom, warning.validTo,
+            warning.text, warning.htmlText, tuple(warning.links))
+
+@dataclass
+class WarningEntry:
+    warning: Warning
+    postCodes: frozenset[int]
+
+    def is_active(self, at: datetime) -> bool:
+        return _is_active(self.warning, at)
+
+def _is_active(warning: Warning, at: datetime) -> bool:
+    return (warning.validFrom is None or warning.validFrom <= at) and (warning.validTo is None or at < warning.validTo)
+
+class WarningsIndex(object):
+    """
+    Distinct warnings of all updated post codes. Safe to use from several threads.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._warnings: dict[WarningKey, Warning] = {}
+        self._postCodes: dict[WarningKey, set[int]] = {}
+        self._byPostCode: dict[int, dict[WarningKey, None]] = {} # Ordered like the forecast
+        self._byType: dict[WarningType, set[WarningKey]] = {}
+        self._byLevel: dict[WarningLevel, set[WarningKey]] = {}
+        # (validFrom, key) sorted by validFrom and (validTo, key) sorted by validTo
+        self._byStart: list[tuple[datetime, WarningKey]] = []
+        self._byEnd: list[tuple[datetime, WarningKey]] = []
+
+    def __len__(self) -> int:
+        return len(self._warnings)
+
+    @property
+    def post_codes(self) -> set[int]:
+        with self._lock:
+            return set(self._byPostCode)
+
+    """
+    Replaces the warnings of postCode. Returns the added and cleared warnings, or None if
+    they didn't change.
+    """
+    def update(self, postCode: int, warnings: Iterable[Warning]) -> WarningChange | None:
+        current = {warning_key(warning): warning for warning in warnings}
+        with self._lock:
+            previous = self._byPostCode.get(postCode, {})
+            added = [warning for key, warning in current.items() if key not in previous]
+            cleared = [self._warnings[key] for key in previous if key not in current]
+            for key in previous.keys() - current.keys():
+                self._remove(postCode, key)
+            for key, warning in current.items():
+                if key not in previous:
+                    self._add(postCode, key, warning)
+            if current:
+                self._byPostCode[postCode] = dict.fromkeys(current)
+            else:
+                self._byPostCode.pop(postCode, None)
+        if not added and not cleared:
+            return None
+        return WarningChange(postCode, added, cleared)
+
+    """
+    Updates the post code of a ForecastResult from MeteoClient.iter_forecasts(). Failed
+    lookups keep the warnings known so far.
+    """
+    def update_from_result(self, result: ForecastResult) -> WarningChange | None:
+        if result.forecast is None:
+            return None
+        return self.update(result.postCode, result.forecast.warnings)
+
+    def remove(self, postCode: int) -> WarningChange | None:
+        return self.update(postCode, [])
+
+    """
+    Returns the distinct warnings matching all given criteria: of warning_type (a type or
+    several), at least min_level, valid at the time at (timezone aware), for any of
+    post_codes. The postCodes of each entry are limited to post_codes.
+    """
+    def query(self, warning_type: WarningType | Iterable[WarningType] | None = None,
+              min_level: WarningLevel | None = None, at: datetime | None = None,
+              post_codes: Iterable[int] | None = None) -> list[WarningEntry]:
+        if at is not None and at.tzinfo is None:
+            raise ValueError("at must be a timezone aware datetime")
+        with self._lock:
+            candidates: set[WarningKey] | None = None
+            if warning_type is not None:
+                types = [warning_type] if isinstance(warning_type, int) else warning_type
+                candidates = set().union(*(self._byType.get(t, ()) for t in types))
+            if min_level is not None:
+                levels = set().union(*(keys for level, keys in self._byLevel.items() if level is not None and level >= min_level))
+                candidates = levels if candidates is None else candidates & levels
+            postCodes = None
+            if post_codes is not None:
+                postCodes = set(post_codes)
+                local = set().union(*(self._byPostCode.get(postCode, ()) for postCode in postCodes))
+                candidates = local if candidates is None else candidates & local
+            if at is not None:
+                # Of the warnings started by then and those not ended yet, only the fewer are checked
+                started = bisect_right(self._byStart, at, key=lambda item: item[0])
+                ended = bisect_right(self._byEnd, at, key=lambda item: item[0])
+                if started <= len(self._byEnd) - ended:
+                    indices, items = range(started), self._byStart
+                else:
+                    indices, items = range(ended, len(self._byEnd)), self._byEnd
+                active = {items[index][1] for index in indices if _is_active(self._warnings[items[index][1]], at)}
+                candidates = active if candidates is None else candidates & active
+            if candidates is None:
+                candidates = set(self._warnings)
+
+            entries = [WarningEntry(self._warnings[key], frozenset(self._postCodes[key] if postCodes is None
+                                                                   else self._postCodes[key] & postCodes))
+                       for key in candidates]
+        entries.sort(key=lambda entry: (-(entry.warning.warningLevel or 0), entry.warning.warningType or 0,
+                                        entry.warning.validFrom or _NO_START))
+        return entries
+
+    def warnings_for(self, postCode: int) -> list[Warning]:
+        with self._lock:
+            return [self._warnings[key] for key in self._byPostCode.get(postCode, ())]
+
+    def _add(self, postCode: int, key: WarningKey, warning: Warning):
+        postCodes = self._postCodes.get(key)
+        if postCodes is not None:
+            postCodes.add(postCode)
+            return
+        self._warnings[key] = warning
+        self._postCodes[key] = {postCode}
+        self._byType.setdefault(warning.warningType, set()).add(key)
+        self._byLevel.setdefault(warning.warningLevel, set()).add(key)
+        insort(self._byStart, (warning.validFrom or _NO_START, key), key=lambda item: item[0])
+        insort(self._byEnd, (warning.validTo or _NO_END, key), key=lambda item: item[0])
+
+    def _remove(self, postCode: int, key: WarningKey):
+        postCodes = self._postCodes[key]
+        postCodes.discard(postCode)
+        if postCodes:
+            return
+        warning = self._warnings.pop(key)
+        del self._postCodes[key]
+        self._byType[warning.warningType].discard(key)
+        self._byLevel[warning.warningLevel].discard(key)
+        _remove_sorted(self._byStart, warning.validFrom or _NO_START, key)
+        _remove_sorted(self._byEnd, warning.validTo or _NO_END, key)
+
+def _remove_sorted(items: list[tuple[datetime, WarningKey]], time: datetime, key: WarningKey):
+    index = bisect_right(items, time, key=lambda item: item[0]) - 1
+    while items[index][1] != key:
+        index -= 1
+    del items[index]
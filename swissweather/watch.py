@@ -0,0 +1,171 @@
+"""
+Pollers which follow the MeteoSwiss publication cadence and notify subscribers of changes only.
+"""
+
+from dataclasses import dataclass, fields
+import logging
+import math
+import random
+import threading
+import time
+from typing import Callable, Generic, Iterable, TypeVar
+
+from swissweather.meteo import (CURRENT_CONDITION_INTERVAL, DEFAULT_MAX_WORKERS, CurrentWeather, MeteoClient,
+                                Warning)
+from swissweather.warningindex import WarningChange, WarningsIndex
+
+logger = logging.getLogger(__name__)
+
+# VQHA80 for a 10 minute slot usually shows up a few minutes after the slot ends.
+CURRENT_CONDITION_DELAY = 180
+WARNINGS_INTERVAL = 600
+DEFAULT_BACKOFF = 30
+DEFAULT_MAX_BACKOFF = 300
+DEFAULT_JITTER = 10
+
+MEASUREMENTS = [field.name for field in fields(CurrentWeather)[2:]]
+
+@dataclass
+class StationChange:
+    station: str
+    previous: CurrentWeather | None # None for a new station
+    current: CurrentWeather
+
+T = TypeVar("T")
+
+class Watcher(Generic[T]):
+    """
+    Polls every interval seconds, offset by delay from the interval boundaries, e.g. at
+    hh:03, hh:13, ... for interval=600 and delay=180. When a poll finds no new data yet it's
+    retried with exponential backoff plus random jitter, until the next regular poll is due.
+
+    Subscribers are called with the list of changes found by a poll, if there are any.
+    """
+    def __init__(self, interval: float, delay: float = 0, backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, jitter: float = DEFAULT_JITTER,
+                 clock: Callable[[], float] = time.time):
+        self.interval = interval
+        self.delay = delay
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.clock = clock
+        self._subscribers: list[Callable[[list[T]], None]] = []
+        self._retries = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, callback: Callable[[list[T]], None]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[list[T]], None]):
+        self._subscribers.remove(callback)
+
+    def poll(self) -> list[T] | None:
+        """
+        Polls once. Returns the changes, or None if upstream had no new data (yet).
+        """
+        raise NotImplementedError()
+
+    def poll_once(self) -> float:
+        """
+        Polls, notifies subscribers and returns the time at which to poll next.
+        """
+        try:
+            changes = self.poll()
+        except Exception as _:
+            logger.error("Poll failed.", exc_info=1)
+            changes = None
+
+        if changes:
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber(changes)
+                except Exception as _:
+                    logger.error("Subscriber failed.", exc_info=1)
+        return self.next_poll_time(changes is not None)
+
+    def next_poll_time(self, fresh: bool) -> float:
+        now = self.clock()
+        scheduled = (math.floor((now - self.delay) / self.interval) + 1) * self.interval + self.delay
+        if fresh:
+            self._retries = 0
+            return scheduled
+        retry = now + min(self.backoff * 2 ** self._retries, self.max_backoff) + random.uniform(0, self.jitter)
+        self._retries += 1
+        return min(retry, scheduled)
+
+    def run(self):
+        nextPoll = self.clock()
+        while not self._stop.wait(max(0.0, nextPoll - self.clock())):
+            nextPoll = self.poll_once()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class CurrentWeatherWatcher(Watcher[StationChange]):
+    """
+    Watches current weather of all stations and reports the stations whose measurements changed.
+    """
+    def __init__(self, client: MeteoClient, interval: float = CURRENT_CONDITION_INTERVAL,
+                 delay: float = CURRENT_CONDITION_DELAY, **kwargs):
+        super().__init__(interval, delay, **kwargs)
+        self.client = client
+        self.stations: dict[str, CurrentWeather] = {}
+
+    def poll(self) -> list[StationChange] | None:
+        snapshot = self.client.get_current_weather_for_all_stations(revalidate=True)
+        if not snapshot:
+            return None
+        latest = max((weather.date for weather in snapshot if weather.date is not None), default=None)
+        previousLatest = max((weather.date for weather in self.stations.values() if weather.date is not None), default=None)
+        if latest is None or (previousLatest is not None and latest <= previousLatest):
+            logger.debug("No new current weather data yet.")
+            return None
+
+        changes = []
+        for weather in snapshot:
+            previous = self.stations.get(weather.station)
+            if previous is None or any(getattr(previous, name) != getattr(weather, name) for name in MEASUREMENTS):
+                changes.append(StationChange(weather.station, previous, weather))
+            self.stations[weather.station] = weather
+        return changes
+
+class WarningsWatcher(Watcher[WarningChange]):
+    """
+    Watches weather warnings for the given post codes and reports new and cleared warnings.
+    The warnings are kept in index, pass a WarningsIndex to query them.
+    """
+    def __init__(self, client: MeteoClient, postCodes: Iterable[int], interval: float = WARNINGS_INTERVAL,
+                 delay: float = 0, max_workers: int = DEFAULT_MAX_WORKERS, index: WarningsIndex | None = None,
+                 **kwargs):
+        super().__init__(interval, delay, **kwargs)
+        self.client = client
+        self.postCodes = list(postCodes)
+        self.max_workers = max_workers
+        self.index = index if index is not None else WarningsIndex()
+        self.warnings: dict[int, list[Warning]] = {}
+
+    def poll(self) -> list[WarningChange] | None:
+        changes = []
+        failed = False
+        for result in self.client.iter_forecasts(self.postCodes, self.max_workers):
+            if result.forecast is None:
+                failed = True
+                continue
+            change = self.index.update(result.postCode, result.forecast.warnings)
+            if change is not None:
+                changes.append(change)
+            self.warnings[result.postCode] = result.forecast.warnings
+        if failed and not changes:
+            # Retry soon instead of waiting for the next interval.
+            return None
+        return changes
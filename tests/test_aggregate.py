@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import replace
+import unittest
+from swissweather import aggregate
+from swissweather.aggregate import SnapshotFrame, altitude_band
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+class TestSnapshotFrame(unittest.TestCase):
+
+    def setUp(self):
+        client = MeteoClient(transport=FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv",
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/ogd-smn_meta_stations.csv': "smn_stations_response.csv",
+        }))
+        self.snapshot = client.get_current_weather_for_all_stations()
+        self.stations = client.get_smn_station_list()
+
+    def frames(self):
+        frames = [SnapshotFrame(self.snapshot, self.stations, use_numpy=False)]
+        if aggregate.numpy is not None:
+            frames.append(SnapshotFrame(self.snapshot, self.stations))
+        return frames
+
+    def test_by_canton(self):
+        for frame in self.frames():
+            temperatures = frame.aggregate("airTemperature", by="canton")
+            self.assertEqual(set(temperatures), {"ZH", "BE", "TI", "GE", "BL", "AI", "VS", None})
+            zurich = temperatures["ZH"]
+            kloten, fluntern = [w.airTemperature[0] for w in self.snapshot if w.station in ("KLO", "SMA")]
+            self.assertEqual(zurich.count, 2)
+            self.assertEqual(zurich.min, min(kloten, fluntern))
+            self.assertEqual(zurich.max, max(kloten, fluntern))
+            self.assertAlmostEqual(zurich.mean, (kloten + fluntern) / 2)
+            self.assertEqual(zurich.unit, "°C")
+            self.assertEqual(temperatures[None].count,
+                             sum(1 for w in self.snapshot if w.airTemperature[0] is not None) - 8)
+
+    def test_missing_values(self):
+        snapshot = [replace(w, precipitation=(None, "mm")) if w.station == "KLO" else w for w in self.snapshot]
+        snapshot = [replace(w, gustPeak1s=(None, "km/h")) if w.station in ("BER", "SAE") else w for w in snapshot]
+        for useNumpy in (False, True):
+            frame = SnapshotFrame(snapshot, self.stations, use_numpy=useNumpy)
+            precipitation = frame.aggregate("precipitation")
+            self.assertEqual(precipitation["ZH"].count, 1)
+            self.assertEqual(precipitation["ZH"].sum, [w.precipitation[0] for w in snapshot if w.station == "SMA"][0])
+            gusts = frame.aggregate("gustPeak1s")
+            for canton in ("BE", "AI"):
+                self.assertEqual(gusts[canton].count, 0)
+                self.assertIsNone(gusts[canton].max)
+                self.assertIsNone(gusts[canton].mean)
+                self.assertIsNone(gusts[canton].sum)
+
+    def test_backends_agree(self):
+        if aggregate.numpy is None:
+            self.skipTest("numpy isn't installed")
+        python, vectorized = self.frames()
+        for variable in ("airTemperature", "precipitation", "gustPeak1s", "pressureSeaLevel"):
+            for by in ("canton", altitude_band(1000), None):
+                expected = python.aggregate(variable, by)
+                actual = vectorized.aggregate(variable, by)
+                self.assertEqual(expected.keys(), actual.keys())
+                for key in expected:
+                    self.assertEqual((expected[key].count, expected[key].min, expected[key].max),
+                                     (actual[key].count, actual[key].min, actual[key].max))
+                    if expected[key].count:
+                        self.assertAlmostEqual(expected[key].sum, actual[key].sum)
+
+    def test_altitude_bands(self):
+        frame = SnapshotFrame(self.snapshot, self.stations)
+        bands = frame.aggregate("airTemperature", by=altitude_band(1000))
+        self.assertEqual(bands[2000].count, 1) # Säntis
+        self.assertEqual(bands[0].count, 7)
+        frame.aggregate("airTemperature", by=altitude_band(1000))
+        frame.aggregate("airTemperature", by="canton")
+        # Only the attribute grouping is cached, not the closures
+        self.assertEqual(list(frame._groups), ["canton"])
+
+    def test_all_stations(self):
+        frame = SnapshotFrame(self.snapshot)
+        overall = frame.aggregate("airTemperature", by=None)
+        values = [w.airTemperature[0] for w in self.snapshot if w.airTemperature[0] is not None]
+        self.assertEqual(list(overall), [None])
+        self.assertEqual(overall[None].count, len(values))
+        self.assertEqual(overall[None].max, max(values))
+
+    def test_unknown_variable(self):
+        with self.assertRaises(ValueError):
+            SnapshotFrame(self.snapshot).aggregate("station")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import os
+import unittest
+from swissweather.aio import AsyncMeteoClient, AsyncResponse, AsyncTransport
+from swissweather.meteo import MeteoClient, WarningType
+from tests.test_meteoclient import FakeTransport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+FIXTURES = {
+    'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv",
+    'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv': "pollen_stations_response.csv",
+    'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv': "pollen_data_response.csv",
+    'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json",
+}
+
+class FakeAsyncResponse(AsyncResponse):
+    def __init__(self, status, content, chunk_size):
+        self.status = status
+        self.headers = {}
+        self.content = content
+        self.chunk_size = chunk_size
+
+    async def iter_chunks(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            yield self.content[i:i + self.chunk_size]
+
+class FakeAsyncTransport(AsyncTransport):
+    """
+    Serves fixture files in small chunks to exercise streaming parsing.
+    """
+    def __init__(self, files, chunk_size=100):
+        self.files = files
+        self.chunk_size = chunk_size
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @contextlib.asynccontextmanager
+    async def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if url not in self.files:
+                yield FakeAsyncResponse(404, b"", self.chunk_size)
+            else:
+                with open(os.path.join(TEST_PATH, self.files[url]), "rb") as f:
+                    yield FakeAsyncResponse(200, f.read(), self.chunk_size)
+        finally:
+            self.in_flight -= 1
+
+class TestAsyncMeteoClient(unittest.TestCase):
+
+    def test_forecast(self):
+        client = AsyncMeteoClient(transport=FakeAsyncTransport(FIXTURES))
+        forecast = asyncio.run(client.get_forecast(9999))
+        expected = MeteoClient(transport=FakeTransport(FIXTURES)).get_forecast(9999)
+        self.assertEqual(forecast, expected)
+        self.assertEqual(forecast.warnings[0].warningType, WarningType.FOREST_FIRES)
+
+    def test_forecast_error_response(self):
+        client = AsyncMeteoClient(transport=FakeAsyncTransport({}))
+        self.assertIsNone(asyncio.run(client.get_forecast(9999)))
+
+    def test_current_weather_all_stations(self):
+        client = AsyncMeteoClient(transport=FakeAsyncTransport(FIXTURES, chunk_size=7))
+        weather = asyncio.run(client.get_current_weather_for_all_stations())
+        expected = MeteoClient(transport=FakeTransport(FIXTURES)).get_current_weather_for_all_stations()
+        self.assertEqual(weather, expected)
+
+    def test_pollen(self):
+        client = AsyncMeteoClient(transport=FakeAsyncTransport(FIXTURES))
+        sync_client = MeteoClient(transport=FakeTransport(FIXTURES))
+        stations = asyncio.run(client.get_pollen_station_list())
+        self.assertEqual(stations, sync_client.get_pollen_station_list())
+        self.assertEqual(stations[-1].name, 'Zürich')
+        pollen = asyncio.run(client.get_current_pollen_for_station('PBE'))
+        self.assertEqual(pollen, sync_client.get_current_pollen_for_station('PBE'))
+        self.assertIsNone(asyncio.run(client.get_current_pollen_for_station('XXX')))
+
+    def test_bounded_concurrency(self):
+        transport = FakeAsyncTransport(FIXTURES)
+        client = AsyncMeteoClient(transport=transport, max_concurrency=3, rate_limit=1000)
+
+        async def fetch_all():
+            return await asyncio.gather(*[client.get_forecast(9999) for _ in range(20)])
+
+        forecasts = asyncio.run(fetch_all())
+        self.assertEqual(len(forecasts), 20)
+        self.assertTrue(all(forecast is not None for forecast in forecasts))
+        self.assertEqual(transport.max_in_flight, 3)
+
+if __name__ == "__main__":
+    unittest.main()
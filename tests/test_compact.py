@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import dataclasses
+import tempfile
+import unittest
+from swissweather.aggregate import SnapshotFrame
+from swissweather.compact import CompactCurrentPollen, CompactCurrentWeather, CompactForecast
+from swissweather.history import HistoryStore
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+class TestCompactModels(unittest.TestCase):
+
+    def setUp(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        self.weather = MeteoClient(transport=transport).get_current_weather_for_station("KLO")
+
+    def test_current_weather(self):
+        compact = CompactCurrentWeather.from_legacy(self.weather)
+        self.assertEqual(compact.airTemperature, 24.8)
+        self.assertEqual(compact.tuples.airTemperature, (24.8, "°C"))
+        self.assertEqual(compact.tuples.precipitation[1], "mm")
+        self.assertEqual(compact.to_legacy(), self.weather)
+        self.assertFalse(hasattr(compact, "__dict__"))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            compact.airTemperature = 3.0
+        with self.assertRaises(AttributeError):
+            compact.tuples.station
+
+    def test_forecast_optional_fields(self):
+        client = MeteoClient()
+        daily = client._get_daily_forecast({"forecast": [{"dayDate": "2022-08-21", "iconDay": 1, "temperatureMax": 25}]})[0]
+        compact = CompactForecast.from_legacy(daily)
+        self.assertEqual(compact.temperatureMax, 25.0)
+        self.assertIsNone(compact.windSpeed)
+        self.assertEqual(compact.to_legacy(), daily)
+
+class TestCompactClient(unittest.TestCase):
+
+    def test_current_weather(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        legacy = MeteoClient(transport=transport).get_current_weather_for_all_stations()
+        compact = MeteoClient(transport=transport, compact=True).get_current_weather_for_all_stations()
+        self.assertIsInstance(compact[0], CompactCurrentWeather)
+        self.assertEqual(compact, [CompactCurrentWeather.from_legacy(weather) for weather in legacy])
+
+        # The csv module fallback builds the same objects
+        client = MeteoClient(compact=True)
+        row = {"Station/Location": "KLO", "Date": "202208211200", "tre200s0": "24.8"}
+        self.assertEqual(client._get_current_data_for_row(row).airTemperature, 24.8)
+
+    def test_snapshot_consumers(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        legacy = MeteoClient(transport=transport).get_current_weather_for_all_stations()
+        compact = MeteoClient(transport=transport, compact=True).get_current_weather_for_all_stations()
+
+        legacyFrame = SnapshotFrame(legacy, use_numpy=False)
+        compactFrame = SnapshotFrame(compact, use_numpy=False)
+        self.assertEqual(compactFrame.aggregate("airTemperature"), legacyFrame.aggregate("airTemperature"))
+
+        with tempfile.TemporaryDirectory() as legacyDirectory, tempfile.TemporaryDirectory() as compactDirectory:
+            self.assertEqual(HistoryStore(compactDirectory).ingest(compact), HistoryStore(legacyDirectory).ingest(legacy))
+            self.assertEqual(list(HistoryStore(compactDirectory).history("KLO", "airTemperature").items()),
+                             list(HistoryStore(legacyDirectory).history("KLO", "airTemperature").items()))
+
+    def test_forecast(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=800100': "full_forecast_response.json"
+        })
+        legacy = MeteoClient(transport=transport).get_forecast(8001)
+        compact = MeteoClient(transport=transport, compact=True).get_forecast(8001)
+        self.assertIsInstance(compact.dailyForecast[0], CompactForecast)
+        self.assertEqual(compact.dailyForecast, [CompactForecast.from_legacy(daily) for daily in legacy.dailyForecast])
+
+        graph = {"graph": {"start": 1661032800000, "weatherIcon3h": [1, 2], "windDirection3h": [90, 180],
+                           "temperatureMax1h": [20.5] * 6, "temperatureMean1h": [19.0] * 6, "temperatureMin1h": [18.0] * 6,
+                           "precipitation1h": [0.1] * 6, "windSpeed1h": [5.0] * 6, "gustSpeed1h": [12.0] * 6}}
+        legacyHourly = MeteoClient()._get_hourly_forecast(graph)
+        compactHourly = MeteoClient(compact=True)._get_hourly_forecast(graph)
+        self.assertEqual(len(compactHourly), 6)
+        self.assertEqual(compactHourly[3].windDirection, 180)
+        self.assertEqual(compactHourly, [CompactForecast.from_legacy(hourly) for hourly in legacyHourly])
+
+    def test_pollen(self):
+        url = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv'
+        transport = FakeTransport({url: "pollen_data_response.csv"})
+        legacy = MeteoClient(transport=transport).get_current_pollen_for_station("PBE")
+        compact = MeteoClient(transport=transport, compact=True).get_current_pollen_for_station("PBE")
+        self.assertEqual(compact, CompactCurrentPollen.from_legacy(legacy))
+        self.assertEqual(MeteoClient(compact=True)._get_current_pollen_for_rows(
+            [{"station_abbr": "PBE", "reference_timestamp": "28.05.2025 23:00", "kabetuh0": "43"}]).birch, 43.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import unittest
+from swissweather import decoding
+from swissweather.frame import ForecastFrame
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+def read_forecast() -> bytes:
+    with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+        forecastJson = json.load(f)
+    # The fixture has no wind speeds, add them so there's an hourly forecast.
+    hours = len(forecastJson["graph"]["temperatureMean1h"])
+    forecastJson["graph"]["windSpeed1h"] = [float(i % 20) for i in range(hours)]
+    forecastJson["graph"]["gustSpeed1h"] = [None] + [float(i % 30) for i in range(1, hours)]
+    return json.dumps(forecastJson).encode('utf-8')
+
+class TestDecoding(unittest.TestCase):
+
+    def setUp(self):
+        self.content = read_forecast()
+        self.client = MeteoClient(transport=FakeTransport({}), decoder=decoding.JsonDecoder())
+        self.expected = self.client._get_forecast_for_json(json.loads(self.content))
+
+    def assert_same_results(self, decoder):
+        decoded = decoder.decode_forecast(self.content)
+        self.assertEqual(self.client._get_forecast_for_json(decoded), self.expected)
+        self.assertEqual(ForecastFrame.from_json(decoded).forecasts,
+                         ForecastFrame.from_json(json.loads(self.content)).forecasts)
+
+    def test_json(self):
+        self.assert_same_results(decoding.JsonDecoder())
+
+    @unittest.skipIf(decoding.orjson is None, "orjson isn't installed")
+    def test_orjson(self):
+        self.assert_same_results(decoding.OrjsonDecoder())
+
+    @unittest.skipIf(decoding.msgspec is None, "msgspec isn't installed")
+    def test_msgspec(self):
+        decoder = decoding.MsgspecDecoder()
+        self.assert_same_results(decoder)
+        decoded = decoder.decode_forecast(self.content)
+        self.assertIsInstance(decoded, decoding.ForecastStruct)
+        self.assertIn("graph", decoded)
+        self.assertNotIn("warningsOverview", decoded)
+        self.assertEqual(decoded["forecast"][0].get("dayDate"), "2022-08-21")
+        self.assertIsNone(decoded.graph.get("windSpeed3h"))
+        with self.assertRaises(KeyError):
+            decoded.graph["precipitation10m"]
+
+    @unittest.skipIf(decoding.msgspec is None, "msgspec isn't installed")
+    def test_msgspec_unexpected_structure(self):
+        content = b'{"graph": {"start": 1700000000000, "temperatureMax1h": ["n/a"]}, "other": 1}'
+        decoded = decoding.MsgspecDecoder().decode_forecast(content)
+        self.assertEqual(decoded, json.loads(content))
+
+    def test_missing_sections(self):
+        content = b'{"graph": null, "warnings": null}'
+        expected = self.client._get_forecast_for_json(json.loads(content))
+        self.assertIsNone(expected.hourlyForecast)
+        for decoder in (decoding.default_decoder(), decoding.JsonDecoder()):
+            self.assertEqual(self.client._get_forecast_for_json(decoder.decode_forecast(content)), expected)
+
+    def test_invalid_json(self):
+        for decoder in (decoding.default_decoder(), decoding.JsonDecoder()):
+            with self.assertRaises(ValueError):
+                decoder.decode_forecast(b'{"graph": ')
+
+    def test_client_uses_decoder(self):
+        transport = FakeTransport({'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=800100': "full_forecast_response.json"})
+        for decoder in (decoding.default_decoder(), decoding.JsonDecoder()):
+            forecast = MeteoClient(transport=transport, decoder=decoder).get_forecast(8001)
+            self.assertEqual(len(forecast.dailyForecast), 6)
+            self.assertEqual(len(forecast.warnings), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import time
+import unittest
+from swissweather.diskcache import LAST_ACCESS_RESOLUTION, CacheEntry, SQLiteCache
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+FORECAST_URL = 'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900'
+CURRENT_URL = 'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv'
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_set(self):
+        cache = SQLiteCache(self.path)
+        self.assertIsNone(cache.get("a"))
+        cache.set(CacheEntry("a", b"payload", '"etag"', None, time.time() + 60))
+        entry = cache.get("a")
+        self.assertEqual(entry.content, b"payload")
+        self.assertEqual(entry.etag, '"etag"')
+        self.assertTrue(entry.is_fresh())
+        cache.close()
+
+        # Survives reopening
+        self.assertEqual(SQLiteCache(self.path).get("a").content, b"payload")
+
+    def last_access(self, cache, key):
+        return cache._db.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+    def test_lru_eviction(self):
+        cache = SQLiteCache(self.path, max_bytes=25)
+        cache.set(CacheEntry("a", b"0123456789", None, None, 0))
+        cache.set(CacheEntry("b", b"0123456789", None, None, 0))
+        # Both were last used long ago, b a bit more recently
+        cache._db.execute("UPDATE responses SET last_access = ? WHERE key = 'a'", (time.time() - 3600,))
+        cache._db.execute("UPDATE responses SET last_access = ? WHERE key = 'b'", (time.time() - 1800,))
+        cache.get("a")
+        cache.set(CacheEntry("c", b"0123456789", None, None, 0))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_recent_reads_are_not_written(self):
+        cache = SQLiteCache(self.path)
+        cache.set(CacheEntry("a", b"payload", None, None, 0))
+        written = self.last_access(cache, "a")
+        cache.get("a")
+        self.assertEqual(self.last_access(cache, "a"), written)
+
+        cache._db.execute("UPDATE responses SET last_access = ? WHERE key = 'a'", (written - LAST_ACCESS_RESOLUTION,))
+        cache.get("a")
+        self.assertGreaterEqual(self.last_access(cache, "a"), written)
+        cache.close()
+
+    def test_client_warm_start(self):
+        files = { FORECAST_URL: "full_forecast_response.json", CURRENT_URL: "full_current_response.csv" }
+        first = MeteoClient(transport=FakeTransport(files), cache=SQLiteCache(self.path))
+        self.assertIsNotNone(first.get_forecast(9999))
+        self.assertIsNotNone(first.get_current_weather_for_station("KLO"))
+        first.close()
+
+        # A restarted client serves from the cache without requests.
+        transport = FakeTransport({})
+        second = MeteoClient(transport=transport, cache=SQLiteCache(self.path))
+        self.assertEqual(second.get_forecast(9999).warnings[0].text, first.get_forecast(9999).warnings[0].text)
+        self.assertEqual(second.get_current_weather_for_station("KLO").airTemperature, (24.8, "°C"))
+        self.assertEqual(transport.requests, [])
+
+        # Other languages are cached separately.
+        self.assertIsNone(MeteoClient(language="de", transport=transport, cache=SQLiteCache(self.path)).get_forecast(9999))
+
+    def test_client_revalidates_expired_entries(self):
+        cache = SQLiteCache(self.path)
+        transport = FakeTransport({ CURRENT_URL: "full_current_response.csv" }, etag='"1"')
+        MeteoClient(transport=transport, cache=cache).get_current_weather_for_all_stations()
+        entry = cache.get(CURRENT_URL)
+        entry.expires = 0
+        cache.set(entry)
+
+        client = MeteoClient(transport=transport, cache=cache)
+        self.assertEqual(len(client.get_current_weather_for_all_stations()), 158)
+        self.assertEqual(transport.requests[-1][1]["If-None-Match"], '"1"')
+        self.assertTrue(cache.get(CURRENT_URL).is_fresh())
+
+if __name__ == "__main__":
+    unittest.main()
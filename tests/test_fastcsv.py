@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+import os
+import unittest
+from swissweather import fastcsv
+from swissweather.meteo import MeteoClient
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+def read_fixture(name):
+    with open(os.path.join(TEST_PATH, name), "rb") as f:
+        return f.read()
+
+class TestFastCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MeteoClient()
+
+    def test_current_weather_identical(self):
+        content = read_fixture("full_current_response.csv")
+        expected = [self.client._get_current_data_for_row(row) for row in self.client._get_csv_rows(content)]
+        self.assertEqual(fastcsv.parse_current_weather(content), expected)
+
+    def test_current_weather_short_rows_and_missing_columns(self):
+        content = b"Station/Location;Date;tre200s0;rre150z0\nKLO;202208211330;24.80\n\nABO;202208211330;-;0.5\n"
+        expected = [self.client._get_current_data_for_row(row) for row in self.client._get_csv_rows(content)]
+        weather = fastcsv.parse_current_weather(content)
+        self.assertEqual(weather, expected)
+        self.assertEqual(weather[0].precipitation, (None, "mm"))
+        self.assertEqual(weather[1].airTemperature, (None, "°C"))
+
+    def test_current_weather_shares_timestamps(self):
+        weather = fastcsv.parse_current_weather(read_fixture("full_current_response.csv"))
+        self.assertIs(weather[0].date, weather[1].date)
+
+    def test_quoted_fields_fall_back(self):
+        self.assertIsNone(fastcsv.parse_current_weather(b'Station/Location;Date\n"KLO";202208211330\n'))
+
+    def test_latest_pollen_identical(self):
+        content = read_fixture("pollen_data_response.csv")
+        expected = self.client._get_current_pollen_for_rows(self.client._get_csv_rows(content, encoding='latin-1'))
+        self.assertEqual(fastcsv.parse_latest_pollen(content), expected)
+
+    def test_pollen_timestamps(self):
+        timestamps = fastcsv.PollenTimestampCache()
+        for raw in ["28.05.2025 23:00", "01.01.2025 00:59", "1.1.2025 1:00"]:
+            self.assertEqual(timestamps.parse(raw.encode('latin-1')),
+                             datetime.strptime(raw, '%d.%m.%Y %H:%M').replace(tzinfo=timezone.utc))
+        with self.assertRaises(ValueError):
+            timestamps.parse(b"28.05.2025 24:00")
+
+    def test_latest_pollen_empty(self):
+        self.assertIsNone(fastcsv.parse_latest_pollen(b"station_abbr;reference_timestamp;kabetuh0\n"))
+        self.assertIsNone(fastcsv.parse_latest_pollen(b""))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import unittest
+from swissweather.forecastcache import ForecastCache, cache_lifetime
+from swissweather.meteo import DEFAULT_REFRESH_THREADS, MeteoClient
+from swissweather.transport import Response, Transport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class CachingTransport(Transport):
+    """
+    Serves the forecast fixture with the given headers and answers matching
+    If-None-Match requests with 304. Requests block while gate is cleared.
+    """
+    def __init__(self, headers):
+        self.headers = headers
+        self.requests = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.done = threading.Event()
+        with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+            self.content = f.read()
+
+    def get(self, url, headers=None):
+        self.gate.wait(5)
+        self.requests.append((url, headers))
+        try:
+            if "ETag" in self.headers and (headers or {}).get("If-None-Match") == self.headers["ETag"]:
+                return Response(url, 304, b"", self.headers)
+            return Response(url, 200, self.content, self.headers)
+        finally:
+            self.done.set()
+
+class TestCacheLifetime(unittest.TestCase):
+
+    def test_max_age(self):
+        self.assertEqual(cache_lifetime({"Cache-Control": "public, max-age=120"}), (120, 300))
+        self.assertEqual(cache_lifetime({"Cache-Control": "max-age=120, stale-while-revalidate=30", "Age": "20"}), (100, 30))
+
+    def test_no_cache(self):
+        self.assertEqual(cache_lifetime({"Cache-Control": "no-store"})[0], 0)
+        self.assertEqual(cache_lifetime({"Cache-Control": "no-cache", "Expires": "Thu, 01 Dec 2094 16:00:00 GMT"})[0], 0)
+
+    def test_expires(self):
+        headers = {"Date": "Tue, 15 Oct 2024 10:00:00 GMT", "Expires": "Tue, 15 Oct 2024 10:05:00 GMT"}
+        self.assertEqual(cache_lifetime(headers)[0], 300)
+        self.assertEqual(cache_lifetime({"Expires": "0"})[0], 0)
+        # max-age takes precedence
+        self.assertEqual(cache_lifetime(dict(headers, **{"Cache-Control": "max-age=60"}))[0], 60)
+
+    def test_default(self):
+        self.assertEqual(cache_lifetime({}, default_ttl=42), (42, 300))
+
+class TestForecastCache(unittest.TestCase):
+
+    def client(self, headers, **kwargs):
+        self.clock = FakeClock()
+        self.transport = CachingTransport(headers)
+        return MeteoClient(transport=self.transport, forecast_cache=ForecastCache(clock=self.clock, **kwargs))
+
+    def test_fresh_responses_are_reused(self):
+        client = self.client({"Cache-Control": "max-age=120"})
+        first = client.get_forecast(8001)
+        self.assertIsNotNone(first)
+        self.clock.now += 119
+        self.assertEqual(client.get_forecast(8001), first)
+        self.assertEqual(len(self.transport.requests), 1)
+        # Keyed by language as well
+        client.language = "de"
+        client.get_forecast(8001)
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_ttl_is_clamped(self):
+        client = self.client({"Cache-Control": "max-age=100000, stale-while-revalidate=0"}, min_ttl=10, max_ttl=600)
+        client.get_forecast(8001)
+        self.clock.now += 601
+        client.get_forecast(8001)
+        self.assertEqual(len(self.transport.requests), 2)
+
+        client = self.client({"Cache-Control": "no-store"}, min_ttl=30)
+        client.get_forecast(8001)
+        self.clock.now += 29
+        client.get_forecast(8001)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_stale_while_revalidate(self):
+        client = self.client({"Cache-Control": "max-age=60, stale-while-revalidate=600", "ETag": '"v1"'})
+        first = client.get_forecast(8001)
+        self.clock.now += 120
+
+        # Stale forecasts are returned at once while a single refresh runs in the background.
+        self.transport.gate.clear()
+        self.transport.done.clear()
+        for _ in range(10):
+            self.assertEqual(client.get_forecast(8001), first)
+        self.transport.gate.set()
+        self.assertTrue(self.transport.done.wait(5))
+        client._refresh_executor.shutdown(wait=True)
+
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(self.transport.requests[1][1]["If-None-Match"], '"v1"')
+        # The 304 made the entry fresh again
+        client.get_forecast(8001)
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_refresh_threads_are_bounded(self):
+        client = self.client({"Cache-Control": "max-age=60, stale-while-revalidate=600"})
+        postCodes = range(8000, 8020)
+        for postCode in postCodes:
+            client.get_forecast(postCode)
+        self.clock.now += 120
+
+        self.transport.gate.clear()
+        for postCode in postCodes:
+            self.assertIsNotNone(client.get_forecast(postCode))
+        refreshThreads = [thread for thread in threading.enumerate() if thread.name.startswith("swissweather-refresh")]
+        self.assertLessEqual(len(refreshThreads), DEFAULT_REFRESH_THREADS)
+        self.transport.gate.set()
+        client._refresh_executor.shutdown(wait=True)
+        self.assertEqual(len(self.transport.requests), 40)
+
+    def test_expired_beyond_stale_window(self):
+        client = self.client({"Cache-Control": "max-age=60, stale-while-revalidate=10"})
+        client.get_forecast(8001)
+        self.clock.now += 71
+        self.assertIsNotNone(client.get_forecast(8001))
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_max_entries(self):
+        client = self.client({"Cache-Control": "max-age=600"}, max_entries=2)
+        for postCode in (8001, 3000, 6003):
+            client.get_forecast(postCode)
+        self.assertEqual(len(client.forecast_cache), 2)
+        self.assertIsNone(client.forecast_cache.get((8001, "en")))
+
+if __name__ == '__main__':
+    unittest.main()
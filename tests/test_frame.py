@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import json
+import math
+import os
+import unittest
+from swissweather.frame import ForecastFrame, expand
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+def load_forecast_json():
+    with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+        forecastJson = json.load(f)
+    # The recorded response predates hourly wind data.
+    graphJson = forecastJson["graph"]
+    graphJson["windSpeed1h"] = [float(i % 20) for i in range(144)]
+    graphJson["gustSpeed1h"] = [float(i % 30) for i in range(144)]
+    graphJson["gustSpeed1h"][5] = None
+    return forecastJson
+
+class TestForecastFrame(unittest.TestCase):
+
+    def test_expand(self):
+        self.assertEqual(expand(array('d', [1.0, 2.0]), 3), array('d', [1.0, 1.0, 1.0, 2.0, 2.0, 2.0]))
+        self.assertEqual(expand(array('i', []), 3), array('i'))
+
+    def test_matches_hourly_forecast(self):
+        forecastJson = load_forecast_json()
+        frame = ForecastFrame.from_json(forecastJson)
+        expected = MeteoClient()._get_hourly_forecast(forecastJson)
+        self.assertEqual(len(frame), 125)
+        self.assertEqual(frame.forecasts, expected)
+        self.assertEqual(frame.timestamps[1], expected[1].timestamp)
+        self.assertEqual(frame.conditions[0], "clear-night")
+
+    def test_columns(self):
+        frame = ForecastFrame.from_json(load_forecast_json())
+        self.assertEqual(frame["temperatureMax"].unit, "°C")
+        self.assertEqual(frame["windDirection"].unit, "°")
+        self.assertEqual(list(frame["windDirection"].values[:4]), [150.0, 150.0, 150.0, 164.0])
+        self.assertTrue(math.isnan(frame["windGustSpeed"].values[5]))
+        self.assertIsNone(frame["windGustSpeed"][5])
+        self.assertIsNone(frame.forecasts[5].windGustSpeed[0])
+
+    def test_no_graph(self):
+        self.assertIsNone(ForecastFrame.from_json({}))
+
+    def test_client(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(transport=transport)
+        frame = client.get_hourly_forecast_frame(9999)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.forecasts, client.get_forecast(9999).hourlyForecast)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import replace
+from datetime import timedelta
+import os
+import tempfile
+import unittest
+from swissweather.history import HistoryStore
+from swissweather.meteo import MeteoClient
+from tests.test_meteoclient import FakeTransport
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        self.snapshot = MeteoClient(transport=transport).get_current_weather_for_all_stations()
+        self.start = self.snapshot[0].date
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def snapshot_at(self, minutes, temperatureOffset=0.0):
+        return [replace(weather, date=weather.date + timedelta(minutes=minutes),
+                        airTemperature=(weather.airTemperature[0] + temperatureOffset if weather.airTemperature[0] is not None else None, "°C"))
+                for weather in self.snapshot]
+
+    def test_ingest_and_query(self):
+        store = HistoryStore(self.directory.name)
+        self.assertEqual(store.ingest(self.snapshot), 158)
+        self.assertEqual(store.ingest(self.snapshot), 0)
+        for i in range(1, 6):
+            store.ingest(self.snapshot_at(10 * i, temperatureOffset=i))
+
+        series = store.history("KLO", "airTemperature")
+        self.assertEqual(len(series), 6)
+        self.assertEqual(series.unit, "°C")
+        self.assertEqual(list(series.values), [24.8, 25.8, 26.8, 27.8, 28.8, 29.8])
+
+        series = store.history("KLO", "airTemperature", self.start + timedelta(minutes=10), self.start + timedelta(minutes=30))
+        items = list(series.items())
+        self.assertEqual(items, [(self.start + timedelta(minutes=10), 25.8), (self.start + timedelta(minutes=20), 26.8)])
+
+        self.assertEqual(len(store.history("KLO", "airTemperature", self.start + timedelta(days=1))), 0)
+        self.assertEqual(len(store.history("XXX", "airTemperature")), 0)
+        with self.assertRaises(ValueError):
+            store.history("KLO", "nonsense")
+        with self.assertRaises(ValueError):
+            store.history("KLO", "airTemperature", self.start.replace(tzinfo=None))
+
+    def test_missing_values(self):
+        store = HistoryStore(self.directory.name)
+        store.ingest(self.snapshot)
+        # BAN has no temperature sensor
+        self.assertEqual(list(store.history("BAN", "airTemperature").items()), [(self.start, None)])
+
+    def test_reopen_and_repair(self):
+        store = HistoryStore(self.directory.name)
+        store.ingest(self.snapshot)
+        # Simulate an interrupted append
+        with open(os.path.join(self.directory.name, "KLO", "airTemperature.f64"), "ab") as f:
+            f.write(b"\0" * 8)
+
+        reopened = HistoryStore(self.directory.name)
+        self.assertEqual(reopened.ingest(self.snapshot), 0)
+        self.assertEqual(reopened.ingest(self.snapshot_at(10)), 158)
+        self.assertEqual(list(reopened.history("KLO", "airTemperature").values), [24.8, 24.8])
+        self.assertEqual(len(reopened.stations()), 158)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import unittest
+from swissweather.meteo import FORECAST_LANGUAGES, MeteoClient, TextTable
+from swissweather.transport import Response, Transport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+class LanguageTransport(Transport):
+    """
+    Serves the forecast fixture with the warning texts prefixed by the requested language.
+    """
+    def __init__(self, warnings=True):
+        self.requests = []
+        with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+            self.forecast = json.load(f)
+        if not warnings:
+            self.forecast["warnings"] = []
+
+    def get(self, url, headers=None):
+        language = headers["Accept-Language"]
+        self.requests.append((url, language))
+        forecast = dict(self.forecast)
+        forecast["warnings"] = [dict(warning, text=f"{language}: {warning['text']}", htmlText=f"{language}: {warning['htmlText']}")
+                                for warning in forecast["warnings"]]
+        return Response(url, 200, json.dumps(forecast).encode("utf-8"))
+
+class TestLanguages(unittest.TestCase):
+
+    def test_forecast_data_is_shared(self):
+        transport = LanguageTransport()
+        client = MeteoClient(transport=transport)
+        forecasts = client.get_forecast_for_languages(8001)
+        self.assertEqual(list(forecasts), list(FORECAST_LANGUAGES))
+        german = forecasts["de"]
+        for language, forecast in forecasts.items():
+            self.assertIs(forecast.hourlyForecast, german.hourlyForecast)
+            self.assertIs(forecast.dailyForecast, german.dailyForecast)
+            self.assertEqual(len(forecast.warnings), len(german.warnings))
+            self.assertTrue(all(warning.text.startswith(f"{language}: ") for warning in forecast.warnings))
+        self.assertEqual(forecasts["en"].hourlyForecast, client.get_forecast(8001).hourlyForecast)
+
+    def test_translations_are_reused_across_post_codes(self):
+        transport = LanguageTransport()
+        client = MeteoClient(transport=transport)
+        client.get_forecast_for_languages(8001, ["de", "fr"])
+        self.assertEqual(len(transport.requests), 2)
+        forecasts = client.get_forecast_for_languages(3000, ["de", "fr"])
+        self.assertEqual(len(transport.requests), 3)
+        self.assertTrue(forecasts["fr"].warnings[0].text.startswith("fr: "))
+
+    def test_no_warnings_means_one_request(self):
+        transport = LanguageTransport(warnings=False)
+        client = MeteoClient(transport=transport)
+        forecasts = client.get_forecast_for_languages(8001)
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(forecasts["it"].warnings, [])
+
+    def test_no_languages(self):
+        transport = LanguageTransport()
+        self.assertEqual(MeteoClient(transport=transport).get_forecast_for_languages(8001, []), {})
+        self.assertEqual(transport.requests, [])
+
+    def test_warning_texts_are_interned(self):
+        client = MeteoClient(transport=LanguageTransport())
+        first = client.get_forecast(8001).warnings[0]
+        second = client.get_forecast(3000).warnings[0]
+        self.assertIs(first.text, second.text)
+        self.assertIs(first.htmlText, second.htmlText)
+
+    def test_translations_follow_the_primary_warnings(self):
+        transport = LanguageTransport()
+        second = dict(transport.forecast["warnings"][0], warnType=11, text="Flood", htmlText="Flood")
+        transport.forecast["warnings"] = transport.forecast["warnings"] + [second]
+        client = MeteoClient(transport=transport)
+        primary = client.get_forecast_for_languages(8001, ["de"])["de"].warnings
+
+        # The other language's response was published after a change upstream
+        transport.forecast["warnings"] = [second, dict(second, warnType=12)]
+        french = client._get_translated_warnings(8001, "fr", primary)[0]
+        self.assertEqual([warning.warningType for warning in french], [warning.warningType for warning in primary])
+        self.assertIs(french[0], primary[0])
+        self.assertEqual(french[1].text, "fr: Flood")
+
+    def test_text_table_is_bounded(self):
+        table = TextTable(max_entries=2)
+        first = table.intern("".join(["a", "b"]))
+        self.assertIs(table.intern("".join(["a", "b"])), first)
+        table.intern("c")
+        # "ab" was used more recently than "c"
+        table.intern("ab")
+        table.intern("d")
+        self.assertEqual(len(table), 2)
+        self.assertIs(table.intern("".join(["a", "b"])), first)
+        self.assertIsNone(table.intern(None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,62 @@
 # -*- coding: utf-8 -*-
 
 from datetime import datetime, timezone
+import hashlib
 import unittest
 import os
+import threading
+import requests
 import responses
-from swissweather.meteo import MeteoClient, WarningLevel, WarningType
+from swissweather.meteo import POLLEN_OVERLAP, MeteoClient, WarningLevel, WarningType
+from swissweather.transport import Response, Transport
 
 TEST_PATH = os.path.dirname(os.path.realpath(__file__))
 
+class FakeTransport(Transport):
+    """
+    Serves fixture files for URLs instead of going to network.
+    """
+    def __init__(self, files, status=200, etag=None):
+        self.files = files
+        self.status = status
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        if url not in self.files:
+            return Response(url, 404, b"")
+        if self.etag is not None and (headers or {}).get("If-None-Match") == self.etag:
+            return Response(url, 304, b"", {"ETag": self.etag})
+        with open(os.path.join(TEST_PATH, self.files[url]), "rb") as f:
+            return Response(url, self.status, f.read(), {"ETag": self.etag} if self.etag else {})
+
+class RangeTransport(Transport):
+    """
+    Serves in-memory files, honoring Range and If-Range requests. The ETag changes with the content.
+    """
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+        self.responses = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        headers = headers or {}
+        content = self.files[url]
+        etag = '"' + hashlib.sha1(content).hexdigest() + '"'
+        if "Range" in headers and headers.get("If-Range", etag) == etag:
+            start = int(headers["Range"][len("bytes="):-1])
+            if start >= len(content):
+                response = Response(url, 416, b"", {"ETag": etag, "Content-Range": f"bytes */{len(content)}"})
+            else:
+                response = Response(url, 206, content[start:],
+                                    {"ETag": etag, "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"})
+        else:
+            response = Response(url, 200, content, {"ETag": etag})
+        self.responses.append((response.status, len(response.content)))
+        return response
+
 class TestMeteoClient(unittest.TestCase):
 
     @responses.activate
@@ -169,5 +218,205 @@ class TestMeteoClient(unittest.TestCase):
         status = client.get_current_pollen_for_station('PBE')
         self.assertIsNone(status)
 
+    @responses.activate
+    def test_forecast_timeout(self):
+        responses.add(**{
+            'method'         : responses.GET,
+            'url'            : 'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900',
+            'body'           : requests.exceptions.ReadTimeout(),
+        })
+
+        client = MeteoClient()
+        forecast = client.get_forecast(9999)
+        self.assertIsNone(forecast)
+
+    def test_injected_transport(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(language="de", transport=transport)
+        forecast = client.get_forecast(9999)
+        self.assertIsNotNone(forecast)
+        self.assertEqual(forecast.warnings[0].warningType, WarningType.FOREST_FIRES)
+        self.assertEqual(len(transport.requests), 1)
+        self.assertEqual(transport.requests[0][1]["Accept-Language"], "de")
+
+    def test_injected_transport_error_status(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        }, status=503)
+        client = MeteoClient(transport=transport)
+        self.assertIsNone(client.get_forecast(9999))
+
+    def test_current_weather_cached_within_interval(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        client = MeteoClient(transport=transport)
+        self.assertEqual(client.get_current_weather_for_station("KLO").airTemperature, (24.8, "°C"))
+        self.assertEqual(client.get_current_weather_for_station("abo").airTemperature, (17.8, "°C"))
+        self.assertIsNone(client.get_current_weather_for_station("XXX"))
+        self.assertEqual(len(client.get_current_weather_for_all_stations()), 158)
+        self.assertEqual(len(transport.requests), 1)
+
+    def test_current_weather_revalidated_after_interval(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        }, etag='"abc"')
+        client = MeteoClient(transport=transport, current_weather_ttl=0)
+        first = client.get_current_weather_for_station("KLO")
+        second = client.get_current_weather_for_station("KLO")
+        self.assertIs(first, second)
+        self.assertEqual(len(transport.requests), 2)
+        self.assertEqual(transport.requests[1][1]["If-None-Match"], '"abc"')
+
+    def test_current_weather_for_stations(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv"
+        })
+        client = MeteoClient(transport=transport)
+        weather = client.get_current_weather_for_stations(["KLO", "abo", "XXX"])
+        self.assertEqual(list(weather.keys()), ["KLO", "abo", "XXX"])
+        self.assertEqual(weather["KLO"].airTemperature, (24.8, "°C"))
+        self.assertEqual(weather["abo"].station, "ABO")
+        self.assertIsNone(weather["XXX"])
+        self.assertEqual(len(transport.requests), 1)
+
+    def test_get_forecasts(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(transport=transport)
+        forecasts = client.get_forecasts([9999, 1234, 9999])
+        self.assertEqual(set(forecasts.keys()), {9999, 1234})
+        self.assertEqual(forecasts[9999].warnings[0].warningType, WarningType.FOREST_FIRES)
+        self.assertIsNone(forecasts[1234])
+        self.assertEqual(len(transport.requests), 2)
+
+    def test_iter_forecasts_keeps_errors(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(transport=transport)
+        results = {result.postCode: result for result in client.iter_forecasts([9999, "not a post code"])}
+        self.assertIsNotNone(results[9999].forecast)
+        self.assertIsNone(results[9999].error)
+        self.assertIsNone(results["not a post code"].forecast)
+        self.assertIsInstance(results["not a post code"].error, ValueError)
+
+    def test_concurrent_forecast_requests_are_coalesced(self):
+        callers = 5
+        arrived = threading.Condition()
+        calls = []
+
+        class BlockingTransport(FakeTransport):
+            def get(self, url, headers=None):
+                # Holds the request until every caller asked for the forecast
+                with arrived:
+                    arrived.wait_for(lambda: len(calls) == callers, timeout=5)
+                return super().get(url, headers)
+
+        transport = BlockingTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(transport=transport)
+        results = []
+
+        def get_forecast():
+            with arrived:
+                calls.append(threading.current_thread())
+                arrived.notify_all()
+            results.append(client.get_forecast(9999))
+
+        threads = [threading.Thread(target=get_forecast) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), callers)
+        self.assertTrue(all(result is not None for result in results))
+        self.assertEqual(len(transport.requests), 1)
+
+    def test_lazy_forecast(self):
+        transport = FakeTransport({
+            'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=999900': "full_forecast_response.json"
+        })
+        client = MeteoClient(transport=transport)
+        lazy = client.get_forecast(9999, lazy=True)
+        self.assertNotIn("hourlyForecast", vars(lazy))
+        self.assertEqual(lazy.warnings[0].warningType, WarningType.FOREST_FIRES)
+        self.assertIs(lazy.warnings, lazy.warnings)
+        self.assertNotIn("hourlyForecast", vars(lazy))
+        self.assertEqual(lazy, client.get_forecast(9999))
+        self.assertEqual(client.get_forecast(9999), lazy)
+
+    def test_pollen_incremental(self):
+        url = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv'
+        with open(os.path.join(TEST_PATH, "pollen_data_response.csv"), "rb") as f:
+            content = f.read()
+        transport = RangeTransport({url: content})
+        client = MeteoClient(transport=transport, incremental_pollen=True)
+
+        first = client.get_current_pollen_for_station('PBE')
+        self.assertEqual(first.timestamp, datetime(2025, 5, 28, 23, 0, tzinfo=timezone.utc))
+        self.assertNotIn("Range", transport.requests[0][1] or {})
+
+        # Nothing new, only the overlap is downloaded
+        self.assertEqual(client.get_current_pollen_for_station('PBE'), first)
+        self.assertEqual(transport.responses[-1], (206, POLLEN_OVERLAP))
+        self.assertNotIn("If-Range", transport.requests[-1][1])
+
+        # New rows, the last one not yet complete
+        transport.files[url] = content + b"PBE;29.05.2025 00:00;50;7;1;1;1;1;1\nPBE;29.05.2025 01:00;5"
+        second = client.get_current_pollen_for_station('PBE')
+        self.assertEqual(second.timestamp, datetime(2025, 5, 29, 0, 0, tzinfo=timezone.utc))
+        self.assertEqual(second.birch, (50, 'No/m3'))
+        self.assertEqual(transport.responses[-1], (206, POLLEN_OVERLAP + 58))
+
+        transport.files[url] += b"1;8;1;1;1;1;1\n"
+        third = client.get_current_pollen_for_station('PBE')
+        self.assertEqual(third.timestamp, datetime(2025, 5, 29, 1, 0, tzinfo=timezone.utc))
+        self.assertEqual(third.birch, (51, 'No/m3'))
+        self.assertEqual(transport.responses[-1], (206, POLLEN_OVERLAP + 36))
+
+        # File rewritten and shorter
+        transport.files[url] = content
+        self.assertEqual(client.get_current_pollen_for_station('PBE'), first)
+        self.assertEqual(transport.responses[-2:], [(416, 0), (200, len(content))])
+
+        # File rewritten with the same length, the overlap doesn't match
+        transport.files[url] = content[:-10] + b"0" * 9 + b"\n"
+        client.get_current_pollen_for_station('PBE')
+        self.assertEqual(transport.responses[-2:], [(206, POLLEN_OVERLAP), (200, len(content))])
+
+    def test_pollen_all_stations(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv': "pollen_stations_response.csv",
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv': "pollen_data_response.csv",
+        })
+        client = MeteoClient(transport=transport)
+        pollen = client.get_current_pollen_for_all_stations()
+        self.assertEqual(len(pollen), 16)
+        self.assertEqual(pollen['PBE'].birch[0], 43)
+        self.assertIsNone(pollen['PZH'])
+
+    def test_pollen_all_stations_with_broken_file(self):
+        brokenUrl = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pzh/ogd-pollen_pzh_d_recent.csv'
+
+        class BrokenFileTransport(FakeTransport):
+            def get(self, url, headers=None):
+                if url == brokenUrl:
+                    return Response(url, 200, b"station_abbr;reference_timestamp;kabetuh0\nPZH;yesterday;12\n")
+                return super().get(url, headers)
+
+        transport = BrokenFileTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv': "pollen_stations_response.csv",
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv': "pollen_data_response.csv",
+        })
+        pollen = MeteoClient(transport=transport).get_current_pollen_for_all_stations()
+        self.assertEqual(len(pollen), 16)
+        self.assertEqual(pollen['PBE'].birch[0], 43)
+        self.assertIsNone(pollen['PZH'])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
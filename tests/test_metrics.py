@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import unittest
+from swissweather.meteo import MeteoClient
+from swissweather.metrics import MetricsAggregator, format_prometheus
+from swissweather.transport import Response, Transport
+from tests.test_meteoclient import FakeTransport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+CURRENT_URL = 'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv'
+
+class JsonTransport(Transport):
+    def __init__(self, forecastJson):
+        self.content = json.dumps(forecastJson).encode('utf-8')
+
+    def get(self, url, headers=None):
+        return Response(url, 200, self.content, {}, 0.01)
+
+class TestMetricsAggregator(unittest.TestCase):
+
+    def test_aggregates(self):
+        metrics = MetricsAggregator()
+        metrics.increment("responses", labels={"endpoint": "forecast", "status": "200"})
+        metrics.increment("responses", labels={"status": "200", "endpoint": "forecast"})
+        metrics.observe("request", 0.5, {"endpoint": "forecast"})
+        metrics.observe("request", 1.5, {"endpoint": "forecast"})
+        self.assertEqual(metrics.counter("responses", {"endpoint": "forecast", "status": "200"}), 2)
+        self.assertEqual(metrics.counter("responses"), 0)
+        summary = metrics.summary("request", {"endpoint": "forecast"})
+        self.assertEqual((summary.count, summary.sum, summary.max), (2, 2.0, 1.5))
+
+        metrics.reset()
+        self.assertIsNone(metrics.summary("request", {"endpoint": "forecast"}))
+
+    def test_prometheus_format(self):
+        metrics = MetricsAggregator()
+        metrics.increment("bytes_received", 1024, {"endpoint": "forecast"})
+        metrics.increment("bytes_received", 10, {"endpoint": "current_weather"})
+        metrics.observe("parse", 0.25, {"section": 'we"ird'})
+        self.assertEqual(format_prometheus(metrics),
+            '# TYPE swissweather_bytes_received_total counter\n'
+            'swissweather_bytes_received_total{endpoint="current_weather"} 10\n'
+            'swissweather_bytes_received_total{endpoint="forecast"} 1024\n'
+            '# TYPE swissweather_parse summary\n'
+            'swissweather_parse_count{section="we\\"ird"} 1\n'
+            'swissweather_parse_sum{section="we\\"ird"} 0.25\n'
+            '# TYPE swissweather_parse_max gauge\n'
+            'swissweather_parse_max{section="we\\"ird"} 0.25\n')
+        self.assertEqual(format_prometheus(MetricsAggregator()), "")
+
+    def test_prometheus_values_are_exact(self):
+        metrics = MetricsAggregator()
+        metrics.increment("bytes_received", 123456789)
+        metrics.increment("retries", 0.5)
+        metrics.observe("request", 1234.56789012345)
+        output = format_prometheus(metrics)
+        self.assertIn("swissweather_bytes_received_total 123456789\n", output)
+        self.assertIn("swissweather_retries_total 0.5\n", output)
+        self.assertIn("swissweather_request_sum 1234.56789012345\n", output)
+
+class TestClientMetrics(unittest.TestCase):
+
+    def test_current_weather(self):
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=FakeTransport({CURRENT_URL: "full_current_response.csv"}), metrics=metrics)
+        client.get_current_weather_for_station("KLO")
+        client.get_current_weather_for_station("BER")
+        labels = {"endpoint": "current_weather"}
+        self.assertEqual(metrics.summary("request", labels).count, 1)
+        self.assertEqual(metrics.counter("bytes_received", labels), os.path.getsize(os.path.join(TEST_PATH, "full_current_response.csv")))
+        self.assertEqual(metrics.counter("responses", {"endpoint": "current_weather", "status": "200"}), 1)
+        self.assertEqual(metrics.counter("cache_misses", {"cache": "current_weather"}), 1)
+        self.assertEqual(metrics.counter("cache_hits", {"cache": "current_weather"}), 1)
+        self.assertEqual(metrics.summary("parse", {"section": "current_weather"}).count, 1)
+
+    def test_forecast(self):
+        with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+            forecastJson = json.load(f)
+        forecastJson["warnings"].append({"warnType": 1, "warnLevel": 2}) # No links, fails to parse
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=JsonTransport(forecastJson), metrics=metrics)
+        forecast = client.get_forecast(8001)
+        self.assertEqual(len(forecast.warnings), len(forecastJson["warnings"]) - 1)
+
+        labels = {"endpoint": "forecast"}
+        self.assertEqual(metrics.summary("request_wait", labels).sum, 0.01)
+        self.assertEqual(metrics.summary("request_download", labels).count, 1)
+        self.assertEqual(metrics.summary("decode", labels).count, 1)
+        for section in ("current", "daily", "hourly", "warnings"):
+            self.assertEqual(metrics.summary("parse", {"section": section}).count, 1)
+        self.assertEqual(metrics.counter("errors_swallowed", {"section": "warnings"}), 1)
+
+        # Lazy forecasts report sections when they're parsed
+        lazy = client.get_forecast(8001, lazy=True)
+        self.assertEqual(metrics.summary("parse", {"section": "hourly"}).count, 1)
+        lazy.hourlyForecast
+        self.assertEqual(metrics.summary("parse", {"section": "hourly"}).count, 2)
+
+    def test_http_errors(self):
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=FakeTransport({}), metrics=metrics)
+        self.assertIsNone(client.get_forecast(8001))
+        self.assertEqual(metrics.counter("responses", {"endpoint": "forecast", "status": "404"}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+import unittest
+import requests
+from swissweather.forecastcache import ForecastCache
+from swissweather.meteo import MeteoClient
+from swissweather.metrics import MetricsAggregator
+from swissweather.retry import HedgePolicy, LatencyTracker, Provenance, RetryPolicy, deadline, deadline_at
+from swissweather.transport import Response, Transport
+
+TEST_PATH = os.path.dirname(os.path.realpath(__file__))
+
+class ScriptedTransport(Transport):
+    """
+    Answers requests with the given outcomes in order: an HTTP status, an exception to raise
+    or a (delay, status) tuple. Once the script is used up, requests succeed.
+    """
+    def __init__(self, outcomes=()):
+        self.outcomes = list(outcomes)
+        self.requests = []
+        self.lock = threading.Lock()
+        with open(os.path.join(TEST_PATH, "full_forecast_response.json"), "rb") as f:
+            self.content = f.read()
+
+    def get(self, url, headers=None):
+        with self.lock:
+            self.requests.append((url, headers))
+            outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, tuple):
+            delay, outcome = outcome
+            time.sleep(delay)
+        return Response(url, outcome, self.content if outcome == 200 else b"")
+
+FAST_RETRY = RetryPolicy(attempts=3, backoff=0.001, max_backoff=0.001)
+
+class TestDeadline(unittest.TestCase):
+
+    def test_nested_deadlines_only_shorten(self):
+        self.assertIsNone(deadline_at())
+        with deadline(10):
+            outer = deadline_at()
+            with deadline(100):
+                self.assertEqual(deadline_at(), outer)
+            with deadline(1):
+                self.assertLess(deadline_at(), outer)
+            self.assertLess(deadline_at(default=1), outer)
+        self.assertIsNone(deadline_at())
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(window=10)
+        for latency in range(1, 21):
+            tracker.add("forecast", latency / 10)
+        self.assertEqual(tracker.percentile("forecast", 0.5), 1.5)
+        self.assertEqual(tracker.percentile("forecast", 1.0), 2.0)
+        self.assertIsNone(tracker.percentile("forecast", 0.5, min_samples=11))
+        self.assertIsNone(tracker.percentile("warnings", 0.5))
+
+class TestRetries(unittest.TestCase):
+
+    def test_retries_server_errors(self):
+        transport = ScriptedTransport([503, 502])
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=transport, retry=FAST_RETRY, metrics=metrics)
+        forecast = client.get_forecast(8001)
+        self.assertIsNotNone(forecast)
+        self.assertEqual(forecast.provenance, Provenance.RETRIED)
+        self.assertEqual(len(transport.requests), 3)
+        self.assertEqual(metrics.counter("retries", {"endpoint": "forecast"}), 2)
+
+    def test_retries_connection_errors(self):
+        transport = ScriptedTransport([requests.exceptions.ConnectionError()])
+        client = MeteoClient(transport=transport, retry=FAST_RETRY)
+        self.assertEqual(client.get_forecast(8001).provenance, Provenance.RETRIED)
+
+    def test_gives_up_after_attempts(self):
+        transport = ScriptedTransport([503, 503, 503, 200])
+        client = MeteoClient(transport=transport, retry=FAST_RETRY)
+        self.assertIsNone(client.get_forecast(8001))
+        self.assertEqual(len(transport.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        transport = ScriptedTransport([404])
+        client = MeteoClient(transport=transport, retry=FAST_RETRY)
+        self.assertIsNone(client.get_forecast(8001))
+        self.assertEqual(len(transport.requests), 1)
+
+    def test_no_retries_by_default(self):
+        transport = ScriptedTransport([503])
+        client = MeteoClient(transport=transport)
+        self.assertIsNone(client.get_forecast(8001))
+        self.assertEqual(client.get_forecast(8001).provenance, Provenance(0))
+
+    def test_backoff_doesnt_exceed_deadline(self):
+        transport = ScriptedTransport([503, 503])
+        client = MeteoClient(transport=transport, retry=RetryPolicy(attempts=3, backoff=10, max_backoff=10))
+        start = time.monotonic()
+        with deadline(0.5):
+            forecast = client.get_forecast(8001)
+        # Either the drawn delay fit into the deadline or the retries were given up
+        self.assertLess(time.monotonic() - start, 0.5)
+        if forecast is None:
+            self.assertLess(len(transport.requests), 3)
+
+class TestDeadlines(unittest.TestCase):
+
+    def test_slow_request_is_abandoned(self):
+        transport = ScriptedTransport([(0.5, 200)])
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=transport, metrics=metrics)
+        start = time.monotonic()
+        with deadline(0.1):
+            self.assertIsNone(client.get_forecast(8001))
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(metrics.counter("deadline_exceeded", {"endpoint": "forecast"}), 1)
+        client.close()
+
+    def test_client_deadline(self):
+        transport = ScriptedTransport([(0.5, 200)])
+        client = MeteoClient(transport=transport, deadline=0.1)
+        self.assertIsNone(client.get_forecast(8001))
+        self.assertIsNotNone(client.get_forecast(8001))
+        client.close()
+
+    def test_deadline_applies_to_bulk_requests(self):
+        transport = ScriptedTransport([(0.5, 200)])
+        client = MeteoClient(transport=transport)
+        with deadline(0.1):
+            forecasts = client.get_forecasts([8001])
+        self.assertEqual(forecasts, {8001: None})
+        client.close()
+
+class TestHedging(unittest.TestCase):
+
+    def test_slow_request_is_hedged(self):
+        transport = ScriptedTransport()
+        metrics = MetricsAggregator()
+        client = MeteoClient(transport=transport, metrics=metrics,
+                             hedge=HedgePolicy(percentile=0.9, min_samples=3, min_delay=0.01))
+        for _ in range(3):
+            self.assertEqual(client.get_forecast(8001).provenance, Provenance(0))
+        transport.outcomes = [(1.0, 200)]
+        start = time.monotonic()
+        forecast = client.get_forecast(8001)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(forecast.provenance, Provenance.HEDGED)
+        self.assertEqual(metrics.counter("hedges", {"endpoint": "forecast"}), 1)
+        self.assertEqual(len(transport.requests), 5)
+        client.close()
+
+    def test_no_hedging_without_samples(self):
+        transport = ScriptedTransport([(0.1, 200)])
+        client = MeteoClient(transport=transport, hedge=HedgePolicy(min_samples=3))
+        self.assertEqual(client.get_forecast(8001).provenance, Provenance(0))
+        self.assertEqual(len(transport.requests), 1)
+        client.close()
+
+class TestProvenance(unittest.TestCase):
+
+    def test_forecast_cache(self):
+        transport = ScriptedTransport()
+        client = MeteoClient(transport=transport, forecast_cache=ForecastCache())
+        self.assertEqual(client.get_forecast(8001).provenance, Provenance(0))
+        self.assertEqual(client.get_forecast(8001, lazy=True).provenance, Provenance.CACHED)
+
+    def test_expired_forecast_served_on_failure(self):
+        clock = [0.0]
+        transport = ScriptedTransport()
+        client = MeteoClient(transport=transport, forecast_cache=ForecastCache(stale_while_revalidate=0, clock=lambda: clock[0]))
+        client.get_forecast(8001)
+        clock[0] += 10000
+        transport.outcomes = [503]
+        self.assertEqual(client.get_forecast(8001).provenance, Provenance.CACHED | Provenance.STALE)
+
+    def test_current_weather(self):
+        transport = ScriptedTransport()
+        transport.content = open(os.path.join(TEST_PATH, "full_current_response.csv"), "rb").read()
+        client = MeteoClient(transport=transport, retry=FAST_RETRY, current_weather_ttl=0)
+        transport.outcomes = [500]
+        self.assertIsNotNone(client.get_current_weather_for_all_stations())
+        self.assertEqual(client.current_weather_provenance, Provenance.RETRIED)
+        transport.outcomes = [500, 500, 500]
+        self.assertIsNotNone(client.get_current_weather_for_all_stations())
+        self.assertEqual(client.current_weather_provenance, Provenance.RETRIED | Provenance.STALE)
+
+if __name__ == '__main__':
+    unittest.main()
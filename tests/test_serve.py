@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+import unittest
+import requests
+from swissweather.meteo import POLLEN_OVERLAP, MeteoClient
+from swissweather.serve import ProxyServer, _POLLEN_DATA_PATH
+from swissweather.transport import RequestsTransport
+from tests.test_meteoclient import TEST_PATH, FakeTransport, RangeTransport
+
+FILES = {
+    'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv': "full_current_response.csv",
+    'https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/ogd-smn_meta_stations.csv': "smn_stations_response.csv",
+    'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv': "pollen_stations_response.csv",
+    'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv': "pollen_data_response.csv",
+    'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=800100': "full_forecast_response.json",
+}
+
+class SlowTransport(FakeTransport):
+    def get(self, url, headers=None):
+        time.sleep(0.1)
+        return super().get(url, headers)
+
+class RecordingTransport(RequestsTransport):
+    def __init__(self):
+        super().__init__()
+        self.responses = []
+
+    def get(self, url, headers=None):
+        response = super().get(url, headers)
+        self.responses.append((response.status, len(response.content)))
+        return response
+
+class FailingTransport(FakeTransport):
+    def get(self, url, headers=None):
+        raise requests.exceptions.ConnectionError("offline")
+
+class TestProxyServer(unittest.TestCase):
+
+    def setUp(self):
+        self.upstream = FakeTransport(FILES, etag='"upstream"')
+        self.server = ProxyServer(MeteoClient(transport=self.upstream), port=0).start()
+        self.direct = MeteoClient(transport=FakeTransport(FILES))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def proxied_client(self, **kwargs):
+        return MeteoClient(base_url=self.server.base_url + "/", **kwargs)
+
+    def test_client_through_proxy(self):
+        for _ in range(3):
+            client = self.proxied_client()
+            self.assertEqual(client.get_current_weather_for_station("KLO"), self.direct.get_current_weather_for_station("KLO"))
+            self.assertEqual(client.get_forecast(8001), self.direct.get_forecast(8001))
+            self.assertEqual(client.get_current_pollen_for_station("PBE"), self.direct.get_current_pollen_for_station("PBE"))
+            self.assertEqual(client.get_smn_station_list(), self.direct.get_smn_station_list())
+            self.assertEqual(client.get_pollen_station_list(), self.direct.get_pollen_station_list())
+        # Three clients, but each file was only fetched once
+        self.assertEqual(len(self.upstream.requests), 5)
+
+    def test_incremental_pollen_through_proxy(self):
+        url = 'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv'
+        with open(os.path.join(TEST_PATH, "pollen_data_response.csv"), "rb") as f:
+            content = f.read()
+        upstream = RangeTransport({url: content})
+        clock = [0.0]
+        server = ProxyServer(MeteoClient(transport=upstream), port=0, clock=lambda: clock[0]).start()
+        self.addCleanup(server.stop)
+        transport = RecordingTransport()
+        client = MeteoClient(transport=transport, base_url=server.base_url, incremental_pollen=True)
+
+        expected = self.direct.get_current_pollen_for_station("PBE")
+        self.assertEqual(client.get_current_pollen_for_station("PBE"), expected)
+        self.assertEqual(client.get_current_pollen_for_station("PBE"), expected)
+
+        appended = b"PBE;29.05.2025 00:00;50;7;1;1;1;1;1\n"
+        upstream.files[url] = content + appended
+        clock[0] += 3600 * 24
+        self.assertEqual(client.get_current_pollen_for_station("PBE").birch, (50, 'No/m3'))
+        self.assertEqual(transport.responses, [(200, len(content)), (206, POLLEN_OVERLAP),
+                                               (206, POLLEN_OVERLAP + len(appended))])
+
+    def test_etags(self):
+        for path in ("/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv", "/api/current/KLO", "/api/forecast/8001"):
+            response = requests.get(self.server.base_url + path)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers["ETag"]
+            self.assertEqual(requests.get(self.server.base_url + path, headers={"If-None-Match": etag}).status_code, 304)
+        self.assertNotEqual(requests.get(self.server.base_url + "/api/current/BER").headers["ETag"], etag)
+
+    def test_api(self):
+        weather = requests.get(self.server.base_url + "/api/current/klo").json()
+        self.assertEqual(weather["station"], "KLO")
+        self.assertEqual(weather["airTemperature"], [self.direct.get_current_weather_for_station("KLO").airTemperature[0], "°C"])
+        self.assertEqual(len(requests.get(self.server.base_url + "/api/current").json()), 158)
+
+        compact = requests.get(self.server.base_url + "/api/current/KLO?format=compact").json()
+        self.assertEqual(compact["units"]["airTemperature"], "°C")
+        self.assertEqual(compact["data"]["airTemperature"], weather["airTemperature"][0])
+
+        forecast = requests.get(self.server.base_url + "/api/forecast/8001?language=de").json()
+        self.assertEqual(len(forecast["dailyForecast"]), 6)
+        self.assertEqual(forecast["warnings"][0]["warningType"], 10)
+        self.assertEqual(self.upstream.requests[-1][1]["Accept-Language"], "de")
+
+        pollen = requests.get(self.server.base_url + "/api/pollen/PBE").json()
+        self.assertEqual(pollen["stationAbbr"], "PBE")
+        stations = requests.get(self.server.base_url + "/api/stations/smn").json()
+        self.assertEqual(stations[0]["abbreviation"], "KLO")
+
+    def test_errors(self):
+        for path, status in (("/api/current/XXX", 404), ("/api/pollen/PXX", 404), ("/api/forecast/80", 404),
+                             ("/api/forecast/8001?language=xx", 400), ("/unknown", 404),
+                             ("/v1/plzDetail?plz=abc", 400), ("/v1/plzDetail?plz=800123", 400),
+                             ("/api/forecast/800123", 404)):
+            self.assertEqual(requests.get(self.server.base_url + path).status_code, status, path)
+
+    def test_upstream_failure(self):
+        server = ProxyServer(MeteoClient(transport=FailingTransport(FILES)), port=0).start()
+        try:
+            self.assertEqual(requests.get(server.base_url + "/api/current").status_code, 502)
+        finally:
+            server.stop()
+
+    def test_stale_copy_served_when_upstream_fails(self):
+        now = [0.0]
+        server = ProxyServer(MeteoClient(transport=self.upstream), port=0, clock=lambda: now[0])
+        status, _, body = server.handle_get("/api/current/KLO", {})
+        self.assertEqual(status, 200)
+        # Expired: revalidated with the upstream ETag
+        now[0] += 601
+        self.assertEqual(server.handle_get("/api/current/KLO", {})[2], body)
+        self.assertEqual(self.upstream.requests[-1][1]["If-None-Match"], '"upstream"')
+        now[0] += 601
+        server.client.transport = FailingTransport(FILES)
+        self.assertEqual(server.handle_get("/api/current/KLO", {})[0::2], (200, body))
+        server.server_close()
+
+    def test_coalescing(self):
+        upstream = SlowTransport(FILES)
+        server = ProxyServer(MeteoClient(transport=upstream), port=0).start()
+        try:
+            results = []
+            def fetch():
+                results.append(requests.get(server.base_url + "/api/forecast/8001").status_code)
+            threads = [threading.Thread(target=fetch) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, [200] * 8)
+            self.assertEqual(len(upstream.requests), 1)
+        finally:
+            server.stop()
+
+    def test_pollen_paths(self):
+        self.assertIsNotNone(_POLLEN_DATA_PATH.match("/ch.meteoschweiz.ogd-pollen/pbe/ogd-pollen_pbe_d_recent.csv"))
+        self.assertIsNone(_POLLEN_DATA_PATH.match("/ch.meteoschweiz.ogd-pollen/../ogd-pollen_pbe_d_recent.csv"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+from swissweather.meteo import MeteoClient, StationInfo
+from swissweather.spatial import StationIndex, haversine
+from tests.test_meteoclient import FakeTransport
+
+class TestStationIndex(unittest.TestCase):
+
+    def setUp(self):
+        transport = FakeTransport({
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/ogd-smn_meta_stations.csv': "smn_stations_response.csv",
+            'https://data.geo.admin.ch/ch.meteoschweiz.ogd-pollen/ogd-pollen_meta_stations.csv': "pollen_stations_response.csv",
+        })
+        client = MeteoClient(transport=transport)
+        self.smnStations = client.get_smn_station_list()
+        self.pollenStations = client.get_pollen_station_list()
+
+    def test_smn_station_list(self):
+        self.assertEqual(len(self.smnStations), 8)
+        self.assertEqual(self.smnStations[0].abbreviation, "KLO")
+        self.assertEqual(self.smnStations[0].name, "Zürich / Kloten")
+        self.assertEqual(self.smnStations[0].canton, "ZH")
+        self.assertAlmostEqual(self.smnStations[0].lat, 47.479558)
+
+    def test_nearest_stations(self):
+        index = StationIndex(self.smnStations + self.pollenStations)
+        # Zurich main station
+        nearest = index.nearest_stations(47.378, 8.540, 2)
+        self.assertEqual(len(nearest), 2)
+        self.assertEqual(nearest[0][0].abbreviation, "PZH")
+        self.assertLess(nearest[0][1], nearest[1][1])
+        self.assertAlmostEqual(nearest[0][1], haversine(47.378, 8.540, nearest[0][0].lat, nearest[0][0].lng), places=6)
+
+        self.assertEqual(len(index.nearest_stations(47.378, 8.540, 1000)), len(index))
+        self.assertEqual(index.nearest_stations(47.378, 8.540, 0), [])
+
+    def test_stations_within(self):
+        index = StationIndex(self.smnStations)
+        within = index.stations_within(47.378, 8.540, 15)
+        self.assertEqual([station.abbreviation for station, _ in within], ["SMA", "KLO"])
+        self.assertEqual(index.stations_within(47.378, 8.540, 0.1), [])
+        self.assertEqual(len(index.stations_within(47.378, 8.540, 30000)), len(index))
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(42)
+        stations = [StationInfo(str(i), str(i), None, None, rng.uniform(45.5, 48), rng.uniform(5.8, 10.6), None)
+                    for i in range(500)]
+        index = StationIndex(stations)
+        for _ in range(200):
+            lat, lng = rng.uniform(45, 48.5), rng.uniform(5, 11)
+            expected = sorted((haversine(lat, lng, station.lat, station.lng), station.name) for station in stations)
+            nearest = index.nearest_stations(lat, lng, 5)
+            self.assertEqual([station.name for station, _ in nearest], [name for _, name in expected[:5]])
+            within = index.stations_within(lat, lng, 25)
+            self.assertEqual(sorted(station.name for station, _ in within),
+                             sorted(name for distance, name in expected if distance <= 25))
+
+    def test_rebuild(self):
+        index = StationIndex(self.smnStations)
+        index.rebuild([station for station in self.smnStations if station.abbreviation != "SMA"])
+        self.assertEqual(len(index), 7)
+        self.assertEqual(index.nearest_stations(47.378, 8.540)[0][0].abbreviation, "KLO")
+        # Stations without coordinates are skipped
+        index.rebuild([StationInfo("Nowhere", "NOW", None, None, None, None, None)])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.nearest_stations(47.378, 8.540), [])
+
+if __name__ == '__main__':
+    unittest.main()
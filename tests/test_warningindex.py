@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import UTC, datetime, timedelta
+import unittest
+from swissweather.meteo import ForecastResult, MeteoClient, Warning, WarningLevel, WarningType
+from swissweather.warningindex import WarningsIndex
+from swissweather.watch import WarningsWatcher
+from tests.test_meteoclient import FakeTransport
+from tests.test_watch import FakeClock, ForecastClient
+
+def warning(warningType, level, validFrom=None, validTo=None, text=""):
+    return Warning(warningType, level, text, text, False, validFrom, validTo, [("Info", "https://example.com")])
+
+MONDAY = datetime(2024, 7, 1, tzinfo=UTC)
+TUESDAY = datetime(2024, 7, 2, tzinfo=UTC)
+WEDNESDAY = datetime(2024, 7, 3, tzinfo=UTC)
+
+FIRE = warning(WarningType.FOREST_FIRES, WarningLevel.SIGNIFICANT_HAZARD, MONDAY)
+FIRE_LOW = warning(WarningType.FOREST_FIRES, WarningLevel.MODERATE_HAZARD, MONDAY, TUESDAY)
+STORM = warning(WarningType.THUNDERSTORMS, WarningLevel.SEVERE_HAZARD, TUESDAY, WEDNESDAY)
+
+class TestWarningsIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = WarningsIndex()
+        self.index.update(8000, [FIRE, STORM])
+        self.index.update(8001, [FIRE])
+        self.index.update(6500, [FIRE_LOW])
+
+    def test_identical_warnings_are_deduplicated(self):
+        self.assertEqual(len(self.index), 3)
+        copy = warning(WarningType.FOREST_FIRES, WarningLevel.SIGNIFICANT_HAZARD, MONDAY)
+        self.index.update(3000, [copy])
+        self.assertEqual(len(self.index), 3)
+        self.assertIs(self.index.warnings_for(3000)[0], FIRE)
+        entries = self.index.query(WarningType.FOREST_FIRES, min_level=WarningLevel.SIGNIFICANT_HAZARD)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].postCodes, {8000, 8001, 3000})
+
+    def test_query_by_type_and_level(self):
+        self.assertEqual([entry.warning for entry in self.index.query(WarningType.FOREST_FIRES)], [FIRE, FIRE_LOW])
+        self.assertEqual([entry.warning for entry in self.index.query(min_level=WarningLevel.SIGNIFICANT_HAZARD)], [STORM, FIRE])
+        self.assertEqual(self.index.query([WarningType.WIND, WarningType.FLOOD]), [])
+
+    def test_query_by_time(self):
+        atMonday = self.index.query(at=MONDAY)
+        self.assertEqual([entry.warning for entry in atMonday], [FIRE, FIRE_LOW])
+        atTuesday = self.index.query(at=TUESDAY)
+        self.assertEqual([entry.warning for entry in atTuesday], [STORM, FIRE])
+        self.assertEqual(self.index.query(at=datetime(2024, 6, 1, tzinfo=UTC)), [])
+
+    def test_expired_warnings_are_skipped(self):
+        expired = [warning(WarningType.WIND, WarningLevel.MODERATE_HAZARD, MONDAY, MONDAY + timedelta(hours=hour), text=str(hour))
+                   for hour in range(1, 24)]
+        self.index.update(1000, expired)
+        self.assertEqual([entry.warning for entry in self.index.query(at=TUESDAY)], [STORM, FIRE])
+        self.assertEqual(len(self.index.query(WarningType.WIND, at=MONDAY + timedelta(minutes=90))), 22)
+
+    def test_naive_time_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.index.query(at=datetime(2024, 7, 1))
+
+    def test_query_by_post_codes(self):
+        entries = self.index.query(WarningType.FOREST_FIRES, post_codes=[8001, 6500, 1000])
+        self.assertEqual([(entry.warning, entry.postCodes) for entry in entries], [(FIRE, {8001}), (FIRE_LOW, {6500})])
+
+    def test_incremental_updates(self):
+        change = self.index.update(8000, [FIRE])
+        self.assertEqual(change.added, [])
+        self.assertEqual(change.cleared, [STORM])
+        self.assertIsNone(self.index.update(8000, [FIRE]))
+        self.assertEqual(self.index.query(WarningType.THUNDERSTORMS), [])
+
+        self.index.remove(8000)
+        self.index.remove(8001)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.post_codes, {6500})
+        self.assertEqual(self.index.query(at=MONDAY)[0].warning, FIRE_LOW)
+
+    def test_failed_results_keep_warnings(self):
+        self.assertIsNone(self.index.update_from_result(ForecastResult(8000, None)))
+        self.assertEqual(len(self.index.warnings_for(8000)), 2)
+
+    def test_forecast_warnings(self):
+        transport = FakeTransport({'https://app-prod-ws.meteoswiss-app.ch/v1/plzDetail?plz=800100': "full_forecast_response.json"})
+        client = MeteoClient(transport=transport)
+        index = WarningsIndex()
+        for result in client.iter_forecasts([8001]):
+            index.update_from_result(result)
+        entries = index.query(WarningType.FOREST_FIRES, min_level=WarningLevel.SIGNIFICANT_HAZARD)
+        self.assertEqual(entries[0].postCodes, {8001})
+
+    def test_watcher_updates_index(self):
+        index = WarningsIndex()
+        client = ForecastClient({8000: [FIRE], 3000: [FIRE, STORM]})
+        watcher = WarningsWatcher(client, [8000, 3000], clock=FakeClock(0), index=index)
+        watcher.poll_once()
+        self.assertEqual(index.query(WarningType.FOREST_FIRES)[0].postCodes, {8000, 3000})
+        client.warnings = {8000: [], 3000: [STORM]}
+        watcher.poll_once()
+        self.assertEqual(index.query(WarningType.FOREST_FIRES), [])
+        self.assertEqual(index.post_codes, {3000})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from dataclasses import replace
+from datetime import timedelta
+import unittest
+from swissweather.meteo import ForecastResult, MeteoClient, Warning, WarningLevel, WarningType, WeatherForecast
+from swissweather.watch import CurrentWeatherWatcher, Watcher, WarningsWatcher
+from tests.test_meteoclient import FakeTransport
+
+CURRENT_URL = 'https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv'
+
+class FakeClock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class SnapshotClient(object):
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.revalidated = []
+
+    def get_current_weather_for_all_stations(self, revalidate=False):
+        self.revalidated.append(revalidate)
+        return self.snapshot
+
+class ForecastClient(object):
+    def __init__(self, warnings):
+        self.warnings = warnings
+
+    def iter_forecasts(self, postCodes, max_workers):
+        for postCode in postCodes:
+            warnings = self.warnings.get(postCode)
+            forecast = WeatherForecast(None, [], [], None, None, warnings) if warnings is not None else None
+            yield ForecastResult(postCode, forecast)
+
+def warning(warningType):
+    return Warning(warningType, WarningLevel.MODERATE_HAZARD, "", "", False, None, None, [])
+
+class TestWatcher(unittest.TestCase):
+
+    def test_schedule_is_aligned(self):
+        clock = FakeClock(1_000_000_000 + 10)
+        watcher = Watcher(600, 180, clock=clock)
+        nextPoll = watcher.next_poll_time(True)
+        self.assertEqual((nextPoll - 180) % 600, 0)
+        self.assertGreater(nextPoll, clock.now)
+        self.assertLessEqual(nextPoll - clock.now, 600)
+
+    def test_backoff_when_late(self):
+        clock = FakeClock(1_000_000_000 - 1_000_000_000 % 600 + 180)
+        watcher = Watcher(600, 180, backoff=10, max_backoff=40, jitter=1, clock=clock)
+        delays = [watcher.next_poll_time(False) - clock.now for _ in range(5)]
+        for delay, expected in zip(delays, [10, 20, 40, 40, 40]):
+            self.assertGreaterEqual(delay, expected)
+            self.assertLessEqual(delay, expected + 1)
+        # Retries never go past the next regular poll
+        watcher.backoff = 1000
+        watcher.max_backoff = 1000
+        self.assertEqual(watcher.next_poll_time(False), clock.now + 600)
+        # Data arriving resets the backoff
+        watcher.next_poll_time(True)
+        watcher.backoff = 10
+        self.assertLessEqual(watcher.next_poll_time(False) - clock.now, 11)
+
+    def test_subscriber_failure_is_isolated(self):
+        watcher = Watcher(600, clock=FakeClock(0))
+        watcher.poll = lambda: ["change"]
+        received = []
+        def failing(changes):
+            raise ValueError()
+        watcher.subscribe(failing)
+        watcher.subscribe(received.append)
+        watcher.poll_once()
+        self.assertEqual(received, [["change"]])
+
+class TestCurrentWeatherWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = MeteoClient(transport=FakeTransport({CURRENT_URL: "full_current_response.csv"})).get_current_weather_for_all_stations()
+
+    def test_emits_changed_stations_only(self):
+        client = SnapshotClient(self.snapshot)
+        watcher = CurrentWeatherWatcher(client, clock=FakeClock(0))
+        received = []
+        watcher.subscribe(received.append)
+
+        watcher.poll_once()
+        self.assertEqual(len(received[0]), len(self.snapshot))
+        self.assertTrue(all(change.previous is None for change in received[0]))
+        self.assertEqual(client.revalidated, [True])
+
+        # Same data again is late data, nothing is emitted
+        watcher.poll_once()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(watcher._retries, 1)
+
+        later = [replace(weather, date=weather.date + timedelta(minutes=10)) for weather in self.snapshot]
+        later[0] = replace(later[0], airTemperature=(-40.0, "°C"))
+        client.snapshot = later
+        watcher.poll_once()
+        self.assertEqual(len(received), 2)
+        self.assertEqual(len(received[1]), 1)
+        self.assertEqual(received[1][0].station, later[0].station)
+        self.assertEqual(received[1][0].previous, self.snapshot[0])
+        self.assertEqual(received[1][0].current.airTemperature, (-40.0, "°C"))
+        self.assertEqual(watcher._retries, 0)
+
+    def test_failed_fetch_backs_off(self):
+        watcher = CurrentWeatherWatcher(SnapshotClient(None), clock=FakeClock(0), jitter=0)
+        self.assertEqual(watcher.poll_once(), 30)
+
+class TestWarningsWatcher(unittest.TestCase):
+
+    def test_emits_added_and_cleared_warnings(self):
+        client = ForecastClient({8000: [warning(WarningType.WIND)], 3000: []})
+        watcher = WarningsWatcher(client, [8000, 3000], clock=FakeClock(0))
+        received = []
+        watcher.subscribe(received.append)
+
+        watcher.poll_once()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0][0].postCode, 8000)
+        self.assertEqual(received[0][0].added, [warning(WarningType.WIND)])
+
+        watcher.poll_once()
+        self.assertEqual(len(received), 1)
+
+        client.warnings = {8000: [warning(WarningType.THUNDERSTORMS)], 3000: []}
+        watcher.poll_once()
+        self.assertEqual(received[1][0].added, [warning(WarningType.THUNDERSTORMS)])
+        self.assertEqual(received[1][0].cleared, [warning(WarningType.WIND)])
+
+    def test_failed_forecasts_are_retried(self):
+        watcher = WarningsWatcher(ForecastClient({}), [8000], clock=FakeClock(0), jitter=0)
+        self.assertEqual(watcher.poll_once(), 30)
+
+if __name__ == '__main__':
+    unittest.main()